@@ -14,6 +14,7 @@ from .auth_router import auth_router
 from .health_router import health_router
 from .inference_router import inference_router
 from .task_router import task_router
+from .upload_router import upload_router
 
 # Import des gestionnaires d'erreurs
 from . import error_handlers
@@ -28,6 +29,7 @@ __all__ = [
     'health_router',
     'inference_router',
     'task_router',
+    'upload_router',
     'error_handlers',
     'response_models'
 ]
\ No newline at end of file
@@ -11,7 +11,6 @@ import logging
 import psutil
 from typing import Dict, Any, Optional
 
-import torch
 from fastapi import APIRouter, Depends, Request, Response, status
 from pydantic import BaseModel
 
@@ -82,6 +81,7 @@ async def detailed_health_check():
     # GPU information if available
     gpu_info = None
     try:
+        import torch
         if torch.cuda.is_available():
             gpu_info = {
                 "available": True,
@@ -159,10 +159,12 @@ def check_services() -> Dict[str, Any]:
     try:
         from model_manager import ModelManager
         manager = ModelManager.get_instance()
+        warmup = manager.get_warmup_status()
         services["models"] = {
-            "status": "ok",
-            "message": "Model manager initialized",
-            "loaded_models": len(manager.loaded_models)
+            "status": "ok" if warmup["ready"] else "warning",
+            "message": "Model manager initialized" if warmup["ready"] else "Model warmup incomplete",
+            "loaded_models": len(manager.loaded_models),
+            "warmup": warmup["models"]
         }
     except Exception as e:
         logger.warning(f"Problem with model manager: {str(e)}")
@@ -213,7 +215,24 @@ async def readiness_probe(response: Response):
             response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
             return {"status": "not_ready", "reason": services[service_name]["message"]}
     
-    return {"status": "ready"}
+    # Models configured for preloading must be warm, so that the first
+    # request routed to this replica doesn't pay the cold-start latency
+    try:
+        from model_manager import ModelManager
+        warmup = ModelManager.get_instance().get_warmup_status()
+    except Exception as e:
+        logger.warning(f"Unable to get model warmup status: {str(e)}")
+        warmup = {"ready": True, "pending": [], "failed": [], "models": {}}
+    
+    if not warmup["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        if warmup["failed"]:
+            reason = f"Model warmup failed: {', '.join(warmup['failed'])}"
+        else:
+            reason = f"Models warming up: {', '.join(warmup['pending'])}"
+        return {"status": "not_ready", "reason": reason, "models": warmup["models"]}
+    
+    return {"status": "ready", "models": warmup["models"]}
 
 @health_router.get("/live")
 async def liveness_probe():
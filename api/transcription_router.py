@@ -6,11 +6,13 @@ with or without speaker identification.
 """
 
 import os
+import json
+import asyncio
 import logging
 import time
 import traceback
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Depends, Request
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
@@ -29,11 +31,12 @@ from transcription_models import (
     process_multiple_speakers,
     transcribe_external_audio,
     get_available_models,
-    analyze_transcript
+    analyze_transcript,
+    LiveTranscriber
 )
 
 # Import for authentication
-from auth import get_current_active_user, User
+from auth import get_current_active_user, get_current_user, User
 
 # Import configuration
 from config import api_config, model_config, system_prompts
@@ -49,6 +52,10 @@ from inference_engine import (
 
 # Import prompt manager
 from utils.prompt_manager import get_prompt_manager
+from utils.upload_storage import stream_upload_to_disk, get_file_hash, get_max_upload_size_mb, resolve_file_id
+from utils.upload_index import get_upload_index
+from utils.file_responses import file_download_response, StreamingJSONResponse
+from transcription_models.ct2_engine import ENGINES as TRANSCRIPTION_ENGINES, FASTER_WHISPER_AVAILABLE
 
 # Logging configuration
 logger = logging.getLogger("api.transcription")
@@ -112,13 +119,45 @@ async def save_uploaded_file(file: UploadFile) -> str:
     timestamp = int(time.time())
     safe_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
     
-    # Save file
-    contents = await file.read()
-    with open(safe_path, "wb") as f:
-        f.write(contents)
+    # Stream the file to disk in chunks, hashing it and enforcing the size limit on the fly
+    await stream_upload_to_disk(file, safe_path, max_size_mb=get_max_upload_size_mb(file.filename))
     
     return safe_path
 
+async def resolve_media_input(file: Optional[UploadFile], file_id: Optional[str], user: User) -> str:
+    """
+    Gets the path of the media of a request: a multipart upload or a file ID of a resumable upload
+    
+    Args:
+        file: Uploaded file (multipart)
+        file_id: Identifier of a finalized resumable upload
+        user: Current user (must own the file)
+        
+    Returns:
+        Path to the media file
+    """
+    if file_id:
+        record = resolve_file_id(file_id, user.username)
+        if not allowed_file(record["filename"]):
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+        return record["path"]
+    
+    if file is None:
+        raise HTTPException(status_code=400, detail="A file or a file_id is required")
+    return await save_uploaded_file(file)
+
+def validate_engine(engine: Optional[str]):
+    """Rejects unknown transcription engines, and ctranslate2 where faster-whisper is not installed"""
+    if engine is None:
+        return
+    if engine.lower() not in TRANSCRIPTION_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown transcription engine '{engine}', use one of {list(TRANSCRIPTION_ENGINES)}"
+        )
+    if engine.lower() == "ctranslate2" and not FASTER_WHISPER_AVAILABLE:
+        raise HTTPException(status_code=400, detail="The ctranslate2 engine is not installed on this server")
+
 def create_output_filename(original_filename: str) -> str:
     """Creates a filename for the transcription output"""
     base_name = os.path.basename(original_filename)
@@ -153,9 +192,11 @@ def formatted_analyze_transcript(transcription: str, language: Optional[str] = N
 
 async def process_transcription_task(task_id: str, file_path: str, output_txt: str, 
                                      model_size: str, is_diarization: bool = False,
-                                     huggingface_token: Optional[str] = None,
                                      analyze: bool = False,
-                                     analysis_type: str = "general"):
+                                     analysis_type: str = "general",
+                                     content_hash: Optional[str] = None,
+                                     reuse_results: bool = True,
+                                     engine: Optional[str] = None):
     """Asynchronous function to process a transcription task in the background"""
     try:
         # Update status
@@ -164,25 +205,50 @@ async def process_transcription_task(task_id: str, file_path: str, output_txt: s
             "message": "Transcription in progress..."
         })
         
+        # Identical content already transcribed with the same settings: reuse the result
+        upload_index = get_upload_index()
+        result_params = {
+            "model_size": model_size,
+            "is_diarization": is_diarization,
+            "analyze": analyze,
+            "analysis_type": analysis_type if analyze else None,
+            "engine": engine
+        }
+        cached = upload_index.get_result(content_hash, "transcription", result_params) if reuse_results else None
+        if cached is not None:
+            with open(output_txt, "w", encoding="utf-8") as f:
+                f.write(cached["output_text"])
+            update_task(task_id, {
+                "status": "completed",
+                "results": cached["result"],
+                "reused_result": True,
+                "message": "Transcription reused from an identical upload"
+            })
+            logger.info(f"Transcription task {task_id} reused the result of an identical upload")
+            return
+        
         # Initialize progress tracker
         progress_tracker = ProgressTracker(task_id)
         
-        # Call appropriate function based on transcription type
+        # Call appropriate function based on transcription type, off the event loop so that
+        # concurrent tasks reach the transcription engine together (and can be batched)
+        loop = asyncio.get_running_loop()
         if is_diarization:
-            result = process_multiple_speakers(
+            result = await loop.run_in_executor(None, lambda: process_multiple_speakers(
                 file_path, 
                 output_txt=output_txt,
                 model_size=model_size,
-                huggingface_token=huggingface_token,
-                progress=progress_tracker
-            )
+                progress=progress_tracker,
+                engine=engine
+            ))
         else:
-            result = process_monologue(
+            result = await loop.run_in_executor(None, lambda: process_monologue(
                 file_path, 
                 output_txt=output_txt,
                 model_size=model_size,
-                progress=progress_tracker
-            )
+                progress=progress_tracker,
+                engine=engine
+            ))
         
         # If analysis is requested, perform it
         if analyze and "transcription" in result:
@@ -207,6 +273,12 @@ async def process_transcription_task(task_id: str, file_path: str, output_txt: s
             "message": "Transcription completed successfully"
         })
         
+        if os.path.exists(output_txt):
+            with open(output_txt, "r", encoding="utf-8") as f:
+                output_text = f.read()
+            upload_index.put_result(content_hash, "transcription", result_params,
+                                    {"result": result, "output_text": output_text})
+        
         logger.info(f"Transcription task {task_id} completed successfully")
         
     except Exception as e:
@@ -221,26 +293,31 @@ async def process_transcription_task(task_id: str, file_path: str, output_txt: s
 @transcription_router.post('/monologue', response_model=TranscriptionResponse)
 async def transcribe_monologue(
     request: Request,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a file
     model_size: str = Form("medium"),
+    engine: Optional[str] = Form(None),  # 'openai', 'ctranslate2' or 'auto' (configured engine by default)
     current_user: User = Depends(get_current_active_user)
 ):
     """Transcribes a video or audio file (monologue mode)"""
+    validate_engine(engine)
+    
     try:
-        # Save uploaded file
-        file_path = await save_uploaded_file(file)
+        # Save uploaded file (or reuse a resumable upload)
+        file_path = await resolve_media_input(file, file_id, current_user)
         logger.info(f"File saved to {file_path}")
         
         # Create output file
         output_txt = create_output_filename(file_path)
         
-        # Process transcription
-        result = process_monologue(
+        # Process transcription (in the executor, the event loop keeps serving other requests)
+        result = await asyncio.get_running_loop().run_in_executor(None, lambda: process_monologue(
             file_path, 
             output_txt=output_txt,
             model_size=model_size,
-            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
-        )
+            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}"),
+            engine=engine
+        ))
         
         # Apply JSONSimplifier post-processor if available
         json_simplifier = getattr(request.app.state, "json_simplifier", None)
@@ -275,37 +352,34 @@ async def transcribe_monologue(
 @transcription_router.post('/multiple_speakers', response_model=TranscriptionResponse)
 async def transcribe_multiple_speakers(
     request: Request,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a file
     model_size: str = Form("medium"),
-    huggingface_token: Optional[str] = Form(None),
+    huggingface_token: Optional[str] = Form(None),  # deprecated, ignored: diarization needs no token
+    word_level: bool = Form(False),  # assign speakers word by word
+    engine: Optional[str] = Form(None),  # 'openai', 'ctranslate2' or 'auto' (configured engine by default)
     current_user: User = Depends(get_current_active_user)
 ):
     """Transcribes a video or audio file with speaker identification"""
-    # Use provided token or environment one
-    token = huggingface_token or os.environ.get('HUGGINGFACE_TOKEN') or model_config["diarization"]["huggingface_token"]
-    
-    if not token:
-        raise HTTPException(
-            status_code=400, 
-            detail="A Hugging Face token is required for speaker identification"
-        )
+    validate_engine(engine)
     
     try:
-        # Save uploaded file
-        file_path = await save_uploaded_file(file)
+        # Save uploaded file (or reuse a resumable upload)
+        file_path = await resolve_media_input(file, file_id, current_user)
         logger.info(f"File saved to {file_path}")
         
         # Create output file
         output_txt = create_output_filename(file_path)
         
-        # Process transcription with speaker identification
-        result = process_multiple_speakers(
+        # Process transcription with speaker identification (in the executor)
+        result = await asyncio.get_running_loop().run_in_executor(None, lambda: process_multiple_speakers(
             file_path, 
             output_txt=output_txt,
             model_size=model_size,
-            huggingface_token=token,
-            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
-        )
+            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}"),
+            word_level=word_level,
+            engine=engine
+        ))
         
         # Apply JSONSimplifier post-processor if available
         json_simplifier = getattr(request.app.state, "json_simplifier", None)
@@ -346,9 +420,12 @@ async def transcribe_audio(
     request: Request,
     file: UploadFile = File(...),
     model_size: str = Form("medium"),
+    engine: Optional[str] = Form(None),  # 'openai', 'ctranslate2' or 'auto' (configured engine by default)
     current_user: User = Depends(get_current_active_user)
 ):
     """Transcribes an existing audio file"""
+    validate_engine(engine)
+    
     # Check extension
     if not file.filename.lower().endswith(('.mp3', '.wav', '.ogg', '.flac', '.m4a')):
         raise HTTPException(
@@ -364,13 +441,14 @@ async def transcribe_audio(
         # Create output file
         output_txt = create_output_filename(audio_path)
         
-        # Transcribe audio
-        result = transcribe_external_audio(
+        # Transcribe audio (in a worker thread, the batched engine blocks until its windows are decoded)
+        result = await asyncio.get_running_loop().run_in_executor(None, lambda: transcribe_external_audio(
             audio_path, 
             model_size=model_size,
             output_txt=output_txt,
-            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
-        )
+            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}"),
+            engine=engine
+        ))
         
         # Apply JSONSimplifier post-processor if available
         json_simplifier = getattr(request.app.state, "json_simplifier", None)
@@ -441,47 +519,42 @@ async def analyze_transcription(
 @transcription_router.post('/async_transcribe', response_model=TaskResponse)
 async def async_transcribe(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a file
     model_size: str = Form("medium"),
     enable_diarization: bool = Form(False),
     analyze: bool = Form(False),
     analysis_type: str = Form("general"),
-    huggingface_token: Optional[str] = Form(None),
+    huggingface_token: Optional[str] = Form(None),  # deprecated, ignored: diarization needs no token
+    reuse_results: bool = Form(True),  # return the result of an identical upload with the same settings
+    engine: Optional[str] = Form(None),  # 'openai', 'ctranslate2' or 'auto' (configured engine by default)
     current_user: User = Depends(get_current_active_user)
 ):
     """Starts an asynchronous transcription (in background)"""
+    validate_engine(engine)
+    
     try:
-        # Save uploaded file
-        file_path = await save_uploaded_file(file)
+        # Save uploaded file (or reuse a resumable upload)
+        file_path = await resolve_media_input(file, file_id, current_user)
         logger.info(f"File saved to {file_path} for asynchronous transcription")
         
         # Create output file
         output_txt = create_output_filename(file_path)
         
-        # Check if diarization is requested and token is available
-        if enable_diarization:
-            token = huggingface_token or os.environ.get('HUGGINGFACE_TOKEN') or model_config["diarization"]["huggingface_token"]
-            if not token:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="A Hugging Face token is required for speaker identification"
-                )
-            
-            # Define task type
-            task_type = TaskType.TRANSCRIPTION_MULTISPEAKER
-        else:
-            token = None
-            task_type = TaskType.TRANSCRIPTION_MONOLOGUE
+        # Define task type
+        task_type = TaskType.TRANSCRIPTION_MULTISPEAKER if enable_diarization else TaskType.TRANSCRIPTION_MONOLOGUE
         
         # Task parameters
         task_params = {
             "file_path": file_path,
+            "content_hash": get_file_hash(file_path),
             "output_txt": output_txt,
             "model_size": model_size,
             "is_diarization": enable_diarization,
-            "huggingface_token": token,
             "analyze": analyze,
-            "analysis_type": analysis_type
+            "analysis_type": analysis_type,
+            "reuse_results": reuse_results,
+            "engine": engine
         }
         
         # Create task
@@ -499,9 +572,11 @@ async def async_transcribe(
             output_txt=output_txt,
             model_size=model_size,
             is_diarization=enable_diarization,
-            huggingface_token=token,
             analyze=analyze,
-            analysis_type=analysis_type
+            analysis_type=analysis_type,
+            content_hash=task_params["content_hash"],
+            reuse_results=reuse_results,
+            engine=engine
         )
         
         return TaskResponse(
@@ -553,11 +628,12 @@ async def get_task_result(
                 if "plain_explanation" in processed:
                     result["plain_explanation"] = processed["plain_explanation"]
         
-        return {
+        # Completed results can be large: they are encoded while being sent
+        return StreamingJSONResponse({
             "status": "completed",
             "result": result,
             "message": task.get("message", "Task completed successfully")
-        }
+        })
         
     except HTTPException:
         raise
@@ -568,6 +644,162 @@ async def get_task_result(
             detail=f"Error retrieving task result: {str(e)}"
         )
 
+@transcription_router.get('/task/{task_id}/download', response_model=None)
+async def download_task_transcript(
+    task_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Downloads the transcript file of a completed task (supports Range and ETag revalidation)"""
+    task = get_task_status(task_id)
+
+    if not task or task.get("user_id") != current_user.username:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task["status"] != "completed":
+        raise HTTPException(status_code=400, detail=f"Task {task_id} is not yet completed")
+
+    output_txt = task.get("params", {}).get("output_txt")
+    if not output_txt or not os.path.exists(output_txt):
+        raise HTTPException(status_code=404, detail="Transcript file not found")
+
+    return file_download_response(output_txt, request)
+
+async def authenticate_websocket(websocket: WebSocket, token: Optional[str]) -> Optional[User]:
+    """
+    Authenticates a WebSocket connection (token query parameter or Authorization header)
+    
+    Args:
+        websocket: Connection to authenticate
+        token: JWT token given as query parameter
+        
+    Returns:
+        Authenticated user, or None once the connection has been refused
+    """
+    if not token:
+        authorization = websocket.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:].strip()
+    
+    if token:
+        try:
+            return await get_current_user(token)
+        except HTTPException:
+            pass
+    
+    # Policy violation: the handshake is refused
+    await websocket.close(code=1008, reason="Invalid credentials")
+    return None
+
+@transcription_router.websocket('/live')
+async def live_transcription(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    language: Optional[str] = None,
+    model_size: Optional[str] = None,
+    sample_rate: int = 16000,
+    encoding: str = "pcm_s16le"
+):
+    """
+    Transcribes an audio stream as it is received
+    
+    The client sends mono PCM audio as binary messages and {"type": "stop"} as a
+    text message at the end of the stream. The server answers with JSON messages:
+    "ready", "partial" (text of the end of the stream, may still change),
+    "final" (stable segment with its timestamps in the stream), then "done".
+    """
+    current_user = await authenticate_websocket(websocket, token)
+    if current_user is None:
+        return
+    
+    whisper_config = model_config["whisper"]
+    try:
+        transcriber = LiveTranscriber(
+            model_size=model_size or whisper_config.get("live_model_size"),
+            language=language or whisper_config.get("language"),
+            sample_rate=sample_rate,
+            encoding=encoding,
+            step_seconds=whisper_config.get("live_step_seconds", 1.0),
+            max_buffer_seconds=whisper_config.get("live_max_buffer_seconds", 25)
+        )
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+    
+    await websocket.accept()
+    await websocket.send_json({"type": "ready", "sample_rate": sample_rate, "encoding": encoding})
+    logger.info(f"Live transcription started for {current_user.username}")
+    
+    loop = asyncio.get_running_loop()
+    audio_received = asyncio.Event()
+    stream_state = {"ended": False, "disconnected": False}
+    
+    async def receive_audio():
+        """Appends the received frames to the buffer while the previous ones are decoded"""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    stream_state["disconnected"] = True
+                    break
+                if message.get("bytes"):
+                    transcriber.add_audio(message["bytes"])
+                    audio_received.set()
+                elif message.get("text"):
+                    try:
+                        command = json.loads(message["text"])
+                    except ValueError:
+                        command = {}
+                    if isinstance(command, dict) and command.get("type") == "stop":
+                        break
+        except (WebSocketDisconnect, RuntimeError):
+            stream_state["disconnected"] = True
+        finally:
+            stream_state["ended"] = True
+            audio_received.set()
+    
+    async def decode_buffer(final: bool = False):
+        """Decodes the buffer in the thread pool and sends the resulting events"""
+        samples = transcriber.snapshot()
+        segments = await loop.run_in_executor(None, transcriber.decode, samples) if len(samples) else []
+        for event in transcriber.update(segments, len(samples), final=final):
+            await websocket.send_json(event)
+    
+    receiver = asyncio.create_task(receive_audio())
+    try:
+        while True:
+            await audio_received.wait()
+            audio_received.clear()
+            if stream_state["ended"]:
+                break
+            if transcriber.ready():
+                await decode_buffer()
+        
+        if not stream_state["disconnected"]:
+            await decode_buffer(final=True)
+            await websocket.send_json({
+                "type": "done",
+                "language": transcriber.language,
+                "segments": transcriber.finalized_count,
+                "duration": round(transcriber.buffer_start, 2)
+            })
+            await websocket.close()
+        
+        logger.info(f"Live transcription ended for {current_user.username} ({transcriber.buffer_start:.1f}s of audio)")
+        
+    except WebSocketDisconnect:
+        logger.info(f"Live transcription client {current_user.username} disconnected")
+    except Exception as e:
+        logger.error(f"Error during live transcription: {str(e)}")
+        logger.error(traceback.format_exc())
+        try:
+            await websocket.send_json({"type": "error", "message": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        receiver.cancel()
+
 @transcription_router.get('/models', response_model=ModelsResponse)
 async def get_models():
     """Retrieves information about available transcription models"""
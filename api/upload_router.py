@@ -0,0 +1,122 @@
+"""
+Router for resumable uploads
+----------------------------------------------
+This module implements routes to upload large media files in chunks over
+several requests. A finalized upload becomes a file ID that the video and
+transcription endpoints accept instead of a multipart file.
+"""
+
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Query, Header
+from pydantic import BaseModel
+
+# Import response models
+from .response_models import ErrorResponse, SuccessResponse
+
+# Accepted media types are those of the endpoints consuming the file IDs
+from .video_router import ALLOWED_EXTENSIONS as VIDEO_EXTENSIONS
+from .transcription_router import ALLOWED_EXTENSIONS as TRANSCRIPTION_EXTENSIONS
+
+# Import for authentication
+from auth import get_current_active_user, User
+
+# Import configuration
+from config import uploads_config
+
+from utils.resumable_uploads import get_resumable_upload_manager
+
+# Logging configuration
+logger = logging.getLogger("api.uploads")
+
+# Create router
+upload_router = APIRouter(
+    prefix="/uploads",
+    tags=["Uploads"],
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        404: {"model": ErrorResponse, "description": "Upload not found"},
+        409: {"model": ErrorResponse, "description": "Offset mismatch or incomplete upload"},
+        413: {"model": ErrorResponse, "description": "File too large"}
+    }
+)
+
+# Directory of finalized files (shared with the multipart upload endpoints)
+UPLOAD_FOLDER = 'uploads'
+
+# Pydantic models for requests
+class CreateUploadRequest(BaseModel):
+    filename: str
+    total_size: int
+
+@upload_router.post('', response_model=None)
+async def create_upload(
+    upload_req: CreateUploadRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Creates a resumable upload session"""
+    status = get_resumable_upload_manager().create(
+        upload_req.filename,
+        upload_req.total_size,
+        current_user.username,
+        allowed_extensions=VIDEO_EXTENSIONS | TRANSCRIPTION_EXTENSIONS
+    )
+    status["chunk_size"] = int(uploads_config.get("resumable_chunk_size_mb", 8) * 1024 * 1024)
+    return status
+
+@upload_router.put('/{upload_id}', response_model=None)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: Optional[int] = Query(None),
+    upload_offset: Optional[int] = Header(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Appends a chunk to an upload
+
+    The raw request body is the chunk. Its position is given by the 'offset' query
+    parameter or the 'Upload-Offset' header and must equal the number of bytes
+    already received (409 with the expected offset otherwise).
+    """
+    chunk_offset = offset if offset is not None else upload_offset
+    if chunk_offset is None:
+        raise HTTPException(status_code=400, detail="The chunk offset is required")
+
+    return await get_resumable_upload_manager().write_chunk(
+        upload_id, current_user.username, chunk_offset, request.stream()
+    )
+
+@upload_router.get('/{upload_id}', response_model=None)
+async def get_upload_status(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Retrieves the number of bytes received, to resume an interrupted upload"""
+    return get_resumable_upload_manager().get_status(upload_id, current_user.username)
+
+@upload_router.post('/{upload_id}/finalize', response_model=None)
+async def finalize_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Completes an upload and returns the file ID to pass to the analysis endpoints"""
+    record = await get_resumable_upload_manager().finalize(upload_id, current_user.username, UPLOAD_FOLDER)
+    return {
+        "file_id": record["file_id"],
+        "filename": record["filename"],
+        "size_bytes": record["size_bytes"],
+        "sha256": record["sha256"],
+        "deduplicated": record.get("deduplicated_from") is not None,
+        "message": "Upload completed successfully"
+    }
+
+@upload_router.delete('/{upload_id}', response_model=SuccessResponse)
+async def cancel_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Cancels an unfinished upload"""
+    get_resumable_upload_manager().cancel(upload_id, current_user.username)
+    return SuccessResponse(success=True, message="Upload cancelled")
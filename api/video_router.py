@@ -6,6 +6,7 @@ including nonverbal analysis and manipulation strategies.
 """
 
 import os
+import asyncio
 import logging
 import time
 import traceback
@@ -26,8 +27,28 @@ from .response_models import (
 from video_models import (
     extract_video_content,
     extract_nonverbal,
+    extract_video_windows,
     analyze_nonverbal,
-    analyze_manipulation_strategies
+    analyze_manipulation_strategies,
+    get_frame_prefetcher
+)
+from video_models.video_utils import (
+    SAMPLING_STRATEGIES,
+    VIDEO_CONTENT_PROMPT,
+    NONVERBAL_EXTRACTION_PROMPT,
+    INTERNVIDEO_MODEL_PATH,
+    DEEPSEEK_MODEL_PATH,
+    run_extraction,
+    resolve_sampling
+)
+from video_models.video_session import get_session_manager, SessionNotFoundError
+from video_models.video_probe import (
+    VideoProbeError,
+    get_video_metadata,
+    probe_uploaded_video,
+    forget_video_metadata,
+    summarize_video_metadata,
+    estimate_video_cost
 )
 
 # Import for authentication
@@ -47,6 +68,9 @@ from inference_engine import (
 
 # Import prompt manager
 from utils.prompt_manager import get_prompt_manager
+from utils.upload_storage import stream_upload_to_disk, get_file_hash, resolve_file_id
+from utils.upload_index import get_upload_index
+from utils.file_responses import StreamingJSONResponse
 
 # Logging configuration
 logger = logging.getLogger("api.video")
@@ -70,11 +94,32 @@ RESULTS_FOLDER = 'results/videos'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
 
+# Serializes model inference across queued video tasks, while their frames are
+# decoded ahead of time by the frame prefetcher
+video_inference_lock = asyncio.Lock()
+
+# Analysis run by default after each extraction type in the pipeline task
+PIPELINE_DEFAULT_ANALYSIS = {
+    "standard": "manipulation",
+    "nonverbal": "nonverbal"
+}
+
 # Pydantic models for requests
 class AnalysisRequest(BaseModel):
     extraction_text: str
     extraction_path: Optional[str] = None
 
+class SessionQuestionRequest(BaseModel):
+    question: Optional[str] = None
+    preset: Optional[str] = None  # 'content' or 'nonverbal' extraction prompt
+    max_new_tokens: Optional[int] = None
+
+# Preset prompts available to video sessions
+SESSION_PRESET_PROMPTS = {
+    "content": VIDEO_CONTENT_PROMPT,
+    "nonverbal": NONVERBAL_EXTRACTION_PROMPT
+}
+
 def allowed_file(filename: str) -> bool:
     """Checks if the file has an allowed extension"""
     return '.' in filename and \
@@ -93,13 +138,47 @@ async def save_uploaded_file(file: UploadFile) -> str:
     timestamp = int(time.time())
     safe_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
     
-    # Save file
-    contents = await file.read()
-    with open(safe_path, "wb") as f:
-        f.write(contents)
+    # Stream the file to disk in chunks, hashing it and enforcing the size limit on the fly
+    await stream_upload_to_disk(file, safe_path, max_size_mb=video_config.get("max_upload_size_mb"))
+    
+    # Probe the video once now: corrupt or oversized files are rejected before any GPU work,
+    # and the metadata record is reused by every downstream stage
+    try:
+        await probe_uploaded_video(safe_path)
+    except VideoProbeError as e:
+        forget_video_metadata(safe_path)
+        os.unlink(safe_path)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     
     return safe_path
 
+async def resolve_video_input(video: Optional[UploadFile], file_id: Optional[str], user: User) -> str:
+    """
+    Gets the path of the video of a request: a multipart upload or a file ID of a resumable upload
+    
+    Args:
+        video: Uploaded video (multipart)
+        file_id: Identifier of a finalized resumable upload
+        user: Current user (must own the file)
+        
+    Returns:
+        Path to the video
+    """
+    if file_id:
+        record = resolve_file_id(file_id, user.username)
+        if not allowed_file(record["filename"]):
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+        
+        try:
+            await probe_uploaded_video(record["path"])
+        except VideoProbeError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        return record["path"]
+    
+    if video is None:
+        raise HTTPException(status_code=400, detail="A video file or a file_id is required")
+    return await save_uploaded_file(video)
+
 def create_output_filename(original_filename: str, prefix: str = "video") -> str:
     """Creates a filename for the video analysis output"""
     base_name = os.path.basename(original_filename)
@@ -107,6 +186,47 @@ def create_output_filename(original_filename: str, prefix: str = "video") -> str
     timestamp = int(time.time())
     return os.path.join(RESULTS_FOLDER, f"{prefix}_{name_without_ext}_{timestamp}.txt")
 
+def validate_sampling(sampling: Optional[str]) -> Optional[str]:
+    """Checks the requested frame sampling strategy"""
+    if sampling is None or sampling == "":
+        return None
+    
+    sampling = sampling.lower()
+    if sampling not in SAMPLING_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported sampling strategy. Use one of: {', '.join(SAMPLING_STRATEGIES)}"
+        )
+    return sampling
+
+def get_result_params(task_type: str, **params) -> Dict[str, Any]:
+    """Settings that change the result of a video task, used to reuse results of identical uploads"""
+    return {
+        "task_type": str(task_type),
+        "sampling": resolve_sampling(params.pop("sampling", None)),
+        "models": [INTERNVIDEO_MODEL_PATH, DEEPSEEK_MODEL_PATH],
+        **params
+    }
+
+def reuse_video_result(task_id: str, content_hash: Optional[str], result_params: Dict[str, Any]) -> bool:
+    """Completes a task with the result of an identical upload processed with the same settings, if any"""
+    cached = get_upload_index().get_result(content_hash, "video", result_params)
+    if cached is None:
+        return False
+    
+    update_task(task_id, {
+        "status": "completed",
+        "results": cached,
+        "reused_result": True,
+        "message": "Result reused from an identical upload"
+    })
+    logger.info(f"Video task {task_id} reused the result of an identical upload")
+    return True
+
+def is_error_output(text: Any) -> bool:
+    """Checks for the error messages returned (instead of raised) by the extraction and analysis functions"""
+    return isinstance(text, str) and text.startswith(("Error in extraction phase", "Error in analysis phase"))
+
 def progress_callback(progress: float, desc: str) -> None:
     """Progress function (for compatibility)"""
     logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
@@ -164,11 +284,54 @@ async def process_video_task(task_id: str, task_type: str, video_path: str, **kw
         
         # Initialize progress tracker
         progress_tracker = ProgressTracker(task_id)
+        loop = asyncio.get_running_loop()
+        sampling = kwargs.get("sampling")
+        
+        result_params = get_result_params(
+            task_type,
+            sampling=sampling,
+            extract_type=kwargs.get("extract_type", "standard"),
+            windowed=bool(kwargs.get("windowed")),
+            merge=bool(kwargs.get("merge"))
+        )
+        if kwargs.get("reuse_results", True) and reuse_video_result(task_id, kwargs.get("content_hash"), result_params):
+            get_frame_prefetcher().discard(video_path, sampling=sampling)
+            return
         
         # Determine task type and function to call
-        if task_type == TaskType.VIDEO_NONVERBAL:
+        if kwargs.get("windowed"):
+            update_task(task_id, {"message": "Extracting video window by window...", "partial_results": []})
+            partial_results = []
+            
+            def publish_window(window_result):
+                # Each window is visible on the task as soon as it is extracted
+                partial_results.append(window_result)
+                update_task(task_id, {
+                    "partial_results": list(partial_results),
+                    "message": f"Window {len(partial_results)} extracted"
+                })
+            
+            async with video_inference_lock:
+                result = await loop.run_in_executor(
+                    None, lambda: extract_video_windows(
+                        video_path,
+                        extraction_type=kwargs.get("extract_type", "standard"),
+                        on_window=publish_window,
+                        merge=kwargs.get("merge", False),
+                        progress=progress_tracker,
+                        sampling=sampling
+                    )
+                )
+            result["file_path"] = None
+            success_message = f"Windowed extraction completed successfully ({len(result['windows'])} windows)"
+        
+        elif task_type == TaskType.VIDEO_NONVERBAL:
             update_task(task_id, {"message": "Extracting nonverbal cues..."})
-            content, temp_path = extract_nonverbal(video_path, progress=progress_tracker)
+            # Run in a worker thread so the event loop keeps accepting (and prefetching) new jobs
+            async with video_inference_lock:
+                content, temp_path = await loop.run_in_executor(
+                    None, lambda: extract_nonverbal(video_path, progress=progress_tracker, sampling=sampling)
+                )
             result = {
                 "content": content,
                 "file_path": temp_path
@@ -177,7 +340,10 @@ async def process_video_task(task_id: str, task_type: str, video_path: str, **kw
         
         elif task_type == TaskType.VIDEO_MANIPULATION:
             update_task(task_id, {"message": "Extracting video content..."})
-            content, temp_path = extract_video_content(video_path, progress=progress_tracker)
+            async with video_inference_lock:
+                content, temp_path = await loop.run_in_executor(
+                    None, lambda: extract_video_content(video_path, progress=progress_tracker, sampling=sampling)
+                )
             result = {
                 "content": content,
                 "file_path": temp_path
@@ -194,11 +360,145 @@ async def process_video_task(task_id: str, task_type: str, video_path: str, **kw
             "message": success_message
         })
         
+        if not is_error_output(result.get("content")):
+            get_upload_index().put_result(kwargs.get("content_hash"), "video", result_params, result)
+        
         logger.info(f"Video task {task_id} completed successfully")
         
     except Exception as e:
         logger.error(f"Error during video task {task_id}: {str(e)}")
         logger.error(traceback.format_exc())
+        get_frame_prefetcher().discard(video_path, sampling=kwargs.get("sampling"))
+        update_task(task_id, {
+            "status": "failed",
+            "error": str(e),
+            "message": f"Error: {str(e)}"
+        })
+
+def run_video_pipeline(task_id: str, video_path: str, extract_type: str, analysis_type: str,
+                       sampling: Optional[str], windowed: bool, merge: bool) -> Dict[str, Any]:
+    """
+    Runs an extraction and its analysis back to back, passing the text in memory
+    
+    Args:
+        task_id: Pipeline task identifier
+        video_path: Path to the video
+        extract_type: 'standard' or 'nonverbal'
+        analysis_type: 'manipulation' or 'nonverbal'
+        sampling: Frame sampling strategy (None = configured default)
+        windowed: Extract the video window by window
+        merge: Merge the window reports into one (windowed mode)
+        
+    Returns:
+        Dictionary with the outputs of both stages
+    """
+    progress_tracker = ProgressTracker(task_id)
+    
+    # Each stage reports on its own half of the task progress
+    def extraction_progress(progress: float, desc: str = None):
+        progress_tracker(0.5 * progress, desc)
+    
+    def analysis_progress(progress: float, desc: str = None):
+        progress_tracker(0.5 + 0.5 * progress, desc)
+    
+    # Stage 1: extraction with InternVideo
+    start = time.time()
+    update_task(task_id, {"message": "Pipeline stage 1/2: extracting video content..."})
+    extraction = {"content": None}
+    
+    if windowed:
+        partial_results = []
+        
+        def publish_window(window_result):
+            partial_results.append(window_result)
+            update_task(task_id, {
+                "partial_results": list(partial_results),
+                "message": f"Pipeline stage 1/2: window {len(partial_results)} extracted"
+            })
+        
+        extraction = extract_video_windows(
+            video_path,
+            extraction_type=extract_type,
+            on_window=publish_window,
+            merge=merge,
+            progress=extraction_progress,
+            sampling=sampling
+        )
+    else:
+        prompt = NONVERBAL_EXTRACTION_PROMPT if extract_type == "nonverbal" else VIDEO_CONTENT_PROMPT
+        extraction["content"] = run_extraction(video_path, prompt, progress=extraction_progress, sampling=sampling)
+    
+    extraction["seconds"] = round(time.time() - start, 2)
+    update_task(task_id, {"stage_results": {"extraction": extraction}})
+    
+    # Stage 2: analysis with DeepSeek (the analysis functions swap the models)
+    start = time.time()
+    update_task(task_id, {"message": "Pipeline stage 2/2: analyzing extracted content..."})
+    if analysis_type == "nonverbal":
+        analysis = formatted_analyze_nonverbal(extraction["content"], None, progress=analysis_progress)
+    else:
+        analysis = formatted_analyze_manipulation(extraction["content"], None, progress=analysis_progress)
+    
+    # The analysis functions return their error message instead of raising
+    if is_error_output(analysis):
+        raise Exception(analysis)
+    
+    return {
+        "extract_type": extract_type,
+        "analysis_type": analysis_type,
+        "extraction": extraction,
+        "analysis": {
+            "content": analysis,
+            "seconds": round(time.time() - start, 2)
+        }
+    }
+
+async def process_video_pipeline_task(task_id: str, video_path: str, extract_type: str = "standard",
+                                      analysis_type: str = "manipulation", sampling: Optional[str] = None,
+                                      windowed: bool = False, merge: bool = False, **kwargs):
+    """Asynchronous function to run an extract-then-analyze pipeline task in the background"""
+    try:
+        update_task(task_id, {
+            "status": "running",
+            "message": "Video pipeline in progress..."
+        })
+        
+        result_params = get_result_params(
+            TaskType.VIDEO_PIPELINE,
+            sampling=sampling,
+            extract_type=extract_type,
+            analysis_type=analysis_type,
+            windowed=bool(windowed),
+            merge=bool(merge)
+        )
+        if kwargs.get("reuse_results", True) and reuse_video_result(task_id, kwargs.get("content_hash"), result_params):
+            get_frame_prefetcher().discard(video_path, sampling=sampling)
+            return
+        
+        # Both stages hold the inference lock, so that no other video task uses
+        # InternVideo while the analysis swaps it out for DeepSeek
+        loop = asyncio.get_running_loop()
+        async with video_inference_lock:
+            result = await loop.run_in_executor(
+                None, lambda: run_video_pipeline(
+                    task_id, video_path, extract_type, analysis_type, sampling, windowed, merge
+                )
+            )
+        
+        update_task(task_id, {
+            "status": "completed",
+            "results": result,
+            "message": "Video extraction and analysis completed successfully"
+        })
+        
+        get_upload_index().put_result(kwargs.get("content_hash"), "video", result_params, result)
+        
+        logger.info(f"Video pipeline task {task_id} completed successfully")
+        
+    except Exception as e:
+        logger.error(f"Error during video pipeline task {task_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        get_frame_prefetcher().discard(video_path, sampling=sampling)
         update_task(task_id, {
             "status": "failed",
             "error": str(e),
@@ -208,10 +508,13 @@ async def process_video_task(task_id: str, task_type: str, video_path: str, **kw
 @video_router.post('/extract', response_model=VideoExtractionResponse)
 async def video_extraction(
     video: UploadFile = File(...),
+    sampling: Optional[str] = Form(None),  # 'uniform', 'scene' or 'keyframe'
     current_user: User = Depends(get_current_active_user)
 ):
     """Extracts content from a video"""
     try:
+        sampling = validate_sampling(sampling)
+        
         # Save uploaded video
         video_path = await save_uploaded_file(video)
         logger.info(f"Video saved to {video_path}")
@@ -219,9 +522,14 @@ async def video_extraction(
         # Extract video content
         content, temp_path = extract_video_content(
             video_path, 
-            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
+            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}"),
+            sampling=sampling
         )
         
+        # The extraction returns its error message instead of raising
+        if temp_path is None:
+            raise HTTPException(status_code=500, detail=f"Error during video extraction: {content}")
+        
         # Prepare response
         response = VideoExtractionResponse(
             content=content,
@@ -240,10 +548,13 @@ async def video_extraction(
 @video_router.post('/extract_nonverbal', response_model=VideoExtractionResponse)
 async def nonverbal_extraction(
     video: UploadFile = File(...),
+    sampling: Optional[str] = Form(None),  # 'uniform', 'scene' or 'keyframe'
     current_user: User = Depends(get_current_active_user)
 ):
     """Extracts nonverbal cues from a video"""
     try:
+        sampling = validate_sampling(sampling)
+        
         # Save uploaded video
         video_path = await save_uploaded_file(video)
         logger.info(f"Video saved to {video_path}")
@@ -251,9 +562,14 @@ async def nonverbal_extraction(
         # Extract nonverbal cues
         content, temp_path = extract_nonverbal(
             video_path, 
-            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}")
+            progress=lambda progress, desc: logger.debug(f"Progress: {progress*100:.1f}% - {desc}"),
+            sampling=sampling
         )
         
+        # The extraction returns its error message instead of raising
+        if temp_path is None:
+            raise HTTPException(status_code=500, detail=f"Error during nonverbal cues extraction: {content}")
+        
         # Prepare response
         response = VideoExtractionResponse(
             content=content,
@@ -336,14 +652,21 @@ async def analyze_manipulation_api(
 @video_router.post('/async_extract', response_model=TaskResponse)
 async def async_video_extraction(
     background_tasks: BackgroundTasks,
-    video: UploadFile = File(...),
+    video: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a video file
     extract_type: str = Form("standard"),  # 'standard' or 'nonverbal'
+    sampling: Optional[str] = Form(None),  # 'uniform', 'scene' or 'keyframe'
+    windowed: Optional[bool] = Form(None),  # None = automatic for long videos
+    merge: bool = Form(False),  # merge window reports into one (windowed mode)
+    reuse_results: bool = Form(True),  # return the result of an identical upload with the same settings
     current_user: User = Depends(get_current_active_user)
 ):
     """Starts an asynchronous video extraction (in background)"""
     try:
-        # Save uploaded video
-        video_path = await save_uploaded_file(video)
+        sampling = validate_sampling(sampling)
+        
+        # Save uploaded video (or reuse a resumable upload)
+        video_path = await resolve_video_input(video, file_id, current_user)
         logger.info(f"Video saved to {video_path} for asynchronous extraction")
         
         # Determine task type
@@ -354,11 +677,22 @@ async def async_video_extraction(
             task_type = TaskType.VIDEO_MANIPULATION
             task_desc = "video content extraction"
         
-        # Task parameters
+        # Task parameters, with the probed metadata and the cost estimate used for scheduling
+        video_metadata = get_video_metadata(video_path)
+        if windowed is None:
+            windowed = video_metadata["duration"] > video_config.get("windowed_min_duration_seconds", 300)
+        
         task_params = {
             "video_path": video_path,
+            "content_hash": get_file_hash(video_path),
             "extract_type": extract_type,
-            "output_txt": create_output_filename(video_path, prefix=extract_type)
+            "sampling": sampling,
+            "output_txt": create_output_filename(video_path, prefix=extract_type),
+            "video_metadata": summarize_video_metadata(video_metadata),
+            "estimated_cost": estimate_video_cost(video_metadata, sampling=sampling),
+            "windowed": windowed,
+            "merge": merge,
+            "reuse_results": reuse_results
         }
         
         # Create task
@@ -368,13 +702,17 @@ async def async_video_extraction(
             params=task_params
         )
         
+        # Start decoding the frames now, so they are ready when the task reaches the model
+        # (windowed extractions decode each window ahead of the previous one's generation instead)
+        if not windowed:
+            get_frame_prefetcher().prefetch(video_path, sampling=sampling)
+        
         # Launch task in background
         background_tasks.add_task(
             process_video_task,
             task_id=task_id,
             task_type=task_type,
-            video_path=video_path,
-            **task_params
+            **task_params  # includes video_path
         )
         
         return TaskResponse(
@@ -545,6 +883,176 @@ async def async_video_analysis(
             detail=f"Error launching asynchronous video analysis: {str(e)}"
         )
 
+@video_router.post('/async_pipeline', response_model=TaskResponse)
+async def async_video_pipeline(
+    background_tasks: BackgroundTasks,
+    video: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a video file
+    extract_type: str = Form("standard"),  # 'standard' or 'nonverbal'
+    analysis_type: Optional[str] = Form(None),  # 'manipulation' or 'nonverbal', defaults to the extraction type's
+    sampling: Optional[str] = Form(None),  # 'uniform', 'scene' or 'keyframe'
+    windowed: Optional[bool] = Form(None),  # None = automatic for long videos
+    merge: bool = Form(False),  # merge window reports into one (windowed mode)
+    reuse_results: bool = Form(True),  # return the result of an identical upload with the same settings
+    current_user: User = Depends(get_current_active_user)
+):
+    """Starts an asynchronous extraction followed by its analysis, in a single background task"""
+    try:
+        sampling = validate_sampling(sampling)
+        
+        extract_type = extract_type.lower()
+        if extract_type not in PIPELINE_DEFAULT_ANALYSIS:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid extraction type. Use 'standard' or 'nonverbal'"
+            )
+        
+        analysis_type = (analysis_type or PIPELINE_DEFAULT_ANALYSIS[extract_type]).lower()
+        if analysis_type not in ["nonverbal", "manipulation"]:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid analysis type. Use 'nonverbal' or 'manipulation'"
+            )
+        
+        # Save uploaded video (or reuse a resumable upload)
+        video_path = await resolve_video_input(video, file_id, current_user)
+        logger.info(f"Video saved to {video_path} for extraction and analysis pipeline")
+        
+        video_metadata = get_video_metadata(video_path)
+        if windowed is None:
+            windowed = video_metadata["duration"] > video_config.get("windowed_min_duration_seconds", 300)
+        
+        task_params = {
+            "video_path": video_path,
+            "content_hash": get_file_hash(video_path),
+            "extract_type": extract_type,
+            "analysis_type": analysis_type,
+            "sampling": sampling,
+            "video_metadata": summarize_video_metadata(video_metadata),
+            "estimated_cost": estimate_video_cost(video_metadata, sampling=sampling),
+            "windowed": windowed,
+            "merge": merge,
+            "reuse_results": reuse_results
+        }
+        
+        task_id = create_task(
+            task_type=TaskType.VIDEO_PIPELINE,
+            user_id=current_user.username,
+            params=task_params
+        )
+        
+        if not windowed:
+            get_frame_prefetcher().prefetch(video_path, sampling=sampling)
+        
+        background_tasks.add_task(
+            process_video_pipeline_task,
+            task_id=task_id,
+            **task_params  # includes video_path
+        )
+        
+        return TaskResponse(
+            task_id=task_id,
+            status="pending",
+            message=f"Video {extract_type} extraction and {analysis_type} analysis task launched successfully"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error launching video pipeline: {str(e)}")
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error launching video pipeline: {str(e)}"
+        )
+
+@video_router.post('/sessions', response_model=None)
+async def create_video_session(
+    video: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),  # finalized resumable upload, instead of a video file
+    sampling: Optional[str] = Form(None),  # 'uniform', 'scene' or 'keyframe'
+    current_user: User = Depends(get_current_active_user)
+):
+    """Decodes and encodes a video once, for several questions on the same visual features"""
+    try:
+        sampling = validate_sampling(sampling)
+        
+        video_path = await resolve_video_input(video, file_id, current_user)
+        logger.info(f"Video saved to {video_path} for a video session")
+        
+        loop = asyncio.get_running_loop()
+        async with video_inference_lock:
+            session = await loop.run_in_executor(
+                None, lambda: get_session_manager().create_session(video_path, current_user.username, sampling=sampling)
+            )
+        
+        session["video_metadata"] = summarize_video_metadata(get_video_metadata(video_path))
+        return session
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating video session: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error creating video session: {str(e)}")
+
+@video_router.post('/sessions/{session_id}/ask', response_model=None)
+async def ask_video_session(
+    session_id: str,
+    question_req: SessionQuestionRequest = Body(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Asks a question (or runs a preset extraction) on the video of a session"""
+    if question_req.preset:
+        if question_req.preset not in SESSION_PRESET_PROMPTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown preset. Use one of: {', '.join(SESSION_PRESET_PROMPTS)}"
+            )
+        question = SESSION_PRESET_PROMPTS[question_req.preset]
+    elif question_req.question:
+        question = question_req.question
+    else:
+        raise HTTPException(status_code=400, detail="A question or a preset is required")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        async with video_inference_lock:
+            return await loop.run_in_executor(
+                None, lambda: get_session_manager().ask(
+                    session_id, current_user.username, question,
+                    max_new_tokens=question_req.max_new_tokens
+                )
+            )
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Video session not found or expired")
+    except Exception as e:
+        logger.error(f"Error in video session {session_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Error in video session: {str(e)}")
+
+@video_router.get('/sessions/{session_id}', response_model=None)
+async def get_video_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Retrieves a video session and its questions and answers"""
+    try:
+        return get_session_manager().get_session_info(session_id, current_user.username)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Video session not found or expired")
+
+@video_router.delete('/sessions/{session_id}', response_model=None)
+async def delete_video_session(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Deletes a video session and releases its visual features"""
+    try:
+        get_session_manager().delete_session(session_id, current_user.username)
+        return {"session_id": session_id, "message": "Video session deleted"}
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Video session not found or expired")
+
 @video_router.get('/allowed_extensions')
 async def get_allowed_extensions():
     """Retrieves the list of allowed video file extensions"""
@@ -568,10 +1076,17 @@ async def get_task_result(
             raise HTTPException(status_code=404, detail="Task not found")
             
         if task["status"] != "completed":
-            return {
+            response = {
                 "status": task["status"],
                 "message": task.get("message", "Task is being processed")
             }
+            # Windowed extractions publish each window as soon as it is ready
+            if task.get("partial_results"):
+                response["partial_results"] = task["partial_results"]
+            # Pipeline tasks expose the extraction while the analysis is running
+            if task.get("stage_results"):
+                response["stage_results"] = task["stage_results"]
+            return response
         
         # Get results
         result = task.get("results", {})
@@ -587,11 +1102,12 @@ async def get_task_result(
                 if "plain_explanation" in processed:
                     result["plain_explanation"] = processed["plain_explanation"]
         
-        return {
+        # Completed results can be large: they are encoded while being sent
+        return StreamingJSONResponse({
             "status": "completed",
             "result": result,
             "message": task.get("message", "Task completed successfully")
-        }
+        })
         
     except HTTPException:
         raise
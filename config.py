@@ -51,6 +51,11 @@ DEFAULT_CONFIG = {
     
     # AI models configuration
     "models": {
+        # Startup preloading: entries are "type" or "type:name" (e.g. "whisper:medium")
+        "preload_models": False,
+        "preload_list": [],
+        "warmup_on_preload": True,  # run a tiny generation/transcription after loading
+        
         # General LLM configuration
         "llm": {
             "default_model": "huihui-ai/DeepSeek-R1-Distill-Qwen-14B-abliterated-v2",
@@ -70,7 +75,26 @@ DEFAULT_CONFIG = {
             "default_size": "medium",  # tiny, base, small, medium, large
             "device": "cuda",  # cuda or cpu
             "language": None,  # specific language or None for auto-detection
-            "batch_size": 16
+            "batch_size": 16,
+            "long_audio_min_seconds": 600,  # longer audio is split at silences and transcribed by chunks (0 = never)
+            "chunk_max_seconds": 120,  # maximum duration of a long-audio chunk
+            "parallel_workers": 1,  # Whisper replicas transcribing long-audio chunks concurrently
+            "batching_enabled": True,  # decode the windows (cut at silences, 30 s at most) of concurrent short jobs together
+            "batch_max_audio_seconds": 120,  # longer audio is transcribed on its own
+            "batch_max_wait_ms": 50,  # how long a window waits for others to fill a batch of batch_size
+            "live_step_seconds": 1.0,  # audio received between two decodings of a live stream
+            "live_max_buffer_seconds": 25,  # live segments are finalized before the buffer exceeds Whisper's 30 s window
+            "live_model_size": None,  # model of live streams (None = default_size)
+            "result_cache_enabled": True,  # reuse the Whisper output of audio already transcribed with the same settings
+            "result_cache_dir": "cache/transcriptions",
+            "result_cache_max_mb": 512,  # least recently used results are evicted beyond this size
+            "pool_max_sizes": 2,  # Whisper sizes resident at once (the least recently used one is unloaded)
+            "pool_memory_gb": None,  # estimated memory of the resident instances, replicas included (None = no limit)
+            "engine": "openai",  # openai, ctranslate2 (faster-whisper, int8) or auto (ctranslate2 on nodes without GPU)
+            "ct2_device": "auto",  # device of the ctranslate2 engine (auto, cpu or cuda)
+            "ct2_compute_type": "int8",  # weight quantization of the ctranslate2 engine
+            "ct2_cpu_threads": 0,  # decoding threads per ctranslate2 model (0 = every core)
+            "ct2_num_workers": 1  # ctranslate2 transcriptions running at once on a model
         },
         
         # InternVideo configuration
@@ -86,17 +110,39 @@ DEFAULT_CONFIG = {
             "model_path": "pyannote/speaker-diarization-3.1",
             "huggingface_token": "",
             "min_speakers": 1,
-            "max_speakers": 10
+            "max_speakers": 10,
+            "concurrent": True,  # diarize while Whisper transcribes the same audio
+            "workers": 1  # diarizations running at the same time
         }
     },
     
     # Video processing configuration
     "video": {
         "max_upload_size_mb": 500,
+        "max_duration_seconds": 4 * 3600,  # longer uploads are rejected at upload time
         "allowed_extensions": [".mp4", ".mov", ".avi", ".mkv", ".webm"],
         "extract_frames": 128,
         "max_resolution": 1080,  # resize videos if larger
-        "dynamic_segmentation": True  # adapts the number of segments to video duration
+        "dynamic_segmentation": True,  # adapts the number of segments to video duration
+        "decode_threads": 0,  # decoder threads per video (0 = automatic)
+        "sampling_strategy": "uniform",  # uniform, scene (scene changes + coverage floor) or keyframe (fast decode)
+        "scene_threshold": 0.25,  # change score (0-1) above which a new scene starts
+        "scene_max_gap_seconds": 10,  # coverage floor: at least one frame every N seconds
+        "scene_min_frames": 8,  # coverage floor: minimum number of frames
+        "prefetch_workers": 2,  # worker threads decoding queued videos ahead of inference
+        "prefetch_queue_size": 2,  # max videos decoded ahead (bounds host memory)
+        "prefetch_ttl_seconds": 600,  # drop prefetched frames never consumed after this delay
+        "windowed_min_duration_seconds": 300,  # videos longer than this are extracted window by window
+        "window_seconds": 120,  # maximum length of each extraction window
+        "window_frames": 64,  # frames sampled per window
+        "window_max_new_tokens": 2048,  # generation budget per window
+        "session_dir": "cache/video_sessions",  # offloaded features of video sessions
+        "session_max_resident": 4,  # sessions whose visual features stay in host memory
+        "session_ttl_seconds": 3600,  # unused sessions are deleted after this delay
+        "session_max_new_tokens": 4096,  # generation budget per session question
+        "frame_cache_enabled": True,  # cache sampled frames by video content hash
+        "frame_cache_dir": "cache/frames",
+        "frame_cache_max_size_mb": 4096  # LRU eviction beyond this size
     },
     
     # Audio processing configuration
@@ -104,7 +150,20 @@ DEFAULT_CONFIG = {
         "max_upload_size_mb": 100,
         "allowed_extensions": [".mp3", ".wav", ".flac", ".ogg", ".m4a"],
         "sample_rate": 16000,
-        "channels": 1
+        "channels": 1,
+        "decode_mmap": False  # decode media to a memory-mapped file instead of process memory
+    },
+    
+    # Upload storage configuration
+    "uploads": {
+        "files_dir": "uploads/files",  # records of stored files, referenced by file ID
+        "resumable_dir": "uploads/resumable",  # partial files of resumable uploads
+        "resumable_chunk_size_mb": 8,  # chunk size suggested to resumable upload clients
+        "resumable_ttl_hours": 24,  # unfinished resumable uploads are deleted after this delay
+        "dedup_enabled": True,  # identical uploads share one stored copy (hard links)
+        "index_dir": "uploads/index",  # content hash index and results of identical uploads
+        "reuse_results": True,  # return results already computed for identical content and settings
+        "results_max_mb": 1024  # least recently used reusable results are evicted beyond this size
     },
     
     # Segmentation configuration
@@ -141,7 +200,8 @@ DEFAULT_CONFIG = {
         "result_storage_dir": "inference_results",
         "log_level": "info",
         "token_expiration_minutes": 30,
-        "refresh_token_expiration_days": 7
+        "refresh_token_expiration_days": 7,
+        "startup_budget_seconds": 10  # Cold start budget (imports + startup), 0 to disable
     },
 
     # Authentication configuration
@@ -240,6 +300,17 @@ def load_config() -> Dict[str, Any]:
         config["database"]["echo"] = os.environ.get("DB_ECHO").lower() in ["true", "1", "yes"]
     
     # ====== AI models configuration ======
+    # Preloading
+    if os.environ.get("PRELOAD_MODELS") is not None:
+        config["models"]["preload_models"] = os.environ.get("PRELOAD_MODELS").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("PRELOAD_MODEL_LIST"):
+        preload_list = os.environ.get("PRELOAD_MODEL_LIST").split(",")
+        config["models"]["preload_list"] = [m.strip() for m in preload_list if m.strip()]
+    
+    if os.environ.get("WARMUP_ON_PRELOAD") is not None:
+        config["models"]["warmup_on_preload"] = os.environ.get("WARMUP_ON_PRELOAD").lower() in ["true", "1", "yes"]
+    
     # LLM
     if os.environ.get("MODEL_NAME"):
         config["models"]["llm"]["default_model"] = os.environ.get("MODEL_NAME")
@@ -266,6 +337,48 @@ def load_config() -> Dict[str, Any]:
     if os.environ.get("WHISPER_LANGUAGE"):
         config["models"]["whisper"]["language"] = os.environ.get("WHISPER_LANGUAGE")
     
+    if os.environ.get("WHISPER_LONG_AUDIO_MIN_SECONDS"):
+        config["models"]["whisper"]["long_audio_min_seconds"] = float(os.environ.get("WHISPER_LONG_AUDIO_MIN_SECONDS"))
+    
+    if os.environ.get("WHISPER_PARALLEL_WORKERS"):
+        config["models"]["whisper"]["parallel_workers"] = int(os.environ.get("WHISPER_PARALLEL_WORKERS"))
+    
+    if os.environ.get("WHISPER_BATCHING_ENABLED") is not None:
+        config["models"]["whisper"]["batching_enabled"] = os.environ.get("WHISPER_BATCHING_ENABLED").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("WHISPER_BATCH_SIZE"):
+        config["models"]["whisper"]["batch_size"] = int(os.environ.get("WHISPER_BATCH_SIZE"))
+    
+    if os.environ.get("WHISPER_LIVE_STEP_SECONDS"):
+        config["models"]["whisper"]["live_step_seconds"] = float(os.environ.get("WHISPER_LIVE_STEP_SECONDS"))
+    
+    if os.environ.get("WHISPER_LIVE_MODEL_SIZE"):
+        config["models"]["whisper"]["live_model_size"] = os.environ.get("WHISPER_LIVE_MODEL_SIZE")
+    
+    if os.environ.get("WHISPER_RESULT_CACHE_ENABLED") is not None:
+        config["models"]["whisper"]["result_cache_enabled"] = os.environ.get("WHISPER_RESULT_CACHE_ENABLED").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("WHISPER_RESULT_CACHE_MAX_MB"):
+        config["models"]["whisper"]["result_cache_max_mb"] = float(os.environ.get("WHISPER_RESULT_CACHE_MAX_MB"))
+    
+    if os.environ.get("WHISPER_POOL_MAX_SIZES"):
+        config["models"]["whisper"]["pool_max_sizes"] = int(os.environ.get("WHISPER_POOL_MAX_SIZES"))
+    
+    if os.environ.get("WHISPER_POOL_MEMORY_GB"):
+        config["models"]["whisper"]["pool_memory_gb"] = float(os.environ.get("WHISPER_POOL_MEMORY_GB"))
+    
+    if os.environ.get("WHISPER_ENGINE"):
+        config["models"]["whisper"]["engine"] = os.environ.get("WHISPER_ENGINE").lower()
+    
+    if os.environ.get("WHISPER_CT2_COMPUTE_TYPE"):
+        config["models"]["whisper"]["ct2_compute_type"] = os.environ.get("WHISPER_CT2_COMPUTE_TYPE")
+    
+    if os.environ.get("WHISPER_CT2_CPU_THREADS"):
+        config["models"]["whisper"]["ct2_cpu_threads"] = int(os.environ.get("WHISPER_CT2_CPU_THREADS"))
+    
+    if os.environ.get("WHISPER_CT2_NUM_WORKERS"):
+        config["models"]["whisper"]["ct2_num_workers"] = int(os.environ.get("WHISPER_CT2_NUM_WORKERS"))
+    
     # Diarization
     if os.environ.get("HUGGINGFACE_TOKEN"):
         config["models"]["diarization"]["huggingface_token"] = os.environ.get("HUGGINGFACE_TOKEN")
@@ -273,6 +386,65 @@ def load_config() -> Dict[str, Any]:
     if os.environ.get("DIARIZATION_MODEL"):
         config["models"]["diarization"]["model_path"] = os.environ.get("DIARIZATION_MODEL")
     
+    if os.environ.get("DIARIZATION_CONCURRENT") is not None:
+        config["models"]["diarization"]["concurrent"] = os.environ.get("DIARIZATION_CONCURRENT").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("DIARIZATION_WORKERS"):
+        config["models"]["diarization"]["workers"] = int(os.environ.get("DIARIZATION_WORKERS"))
+    
+    # ====== Video processing configuration ======
+    if os.environ.get("VIDEO_DECODE_THREADS"):
+        config["video"]["decode_threads"] = int(os.environ.get("VIDEO_DECODE_THREADS"))
+    
+    if os.environ.get("VIDEO_MAX_DURATION_SECONDS"):
+        config["video"]["max_duration_seconds"] = int(os.environ.get("VIDEO_MAX_DURATION_SECONDS"))
+    
+    if os.environ.get("VIDEO_WINDOWED_MIN_DURATION_SECONDS"):
+        config["video"]["windowed_min_duration_seconds"] = int(os.environ.get("VIDEO_WINDOWED_MIN_DURATION_SECONDS"))
+    
+    if os.environ.get("VIDEO_WINDOW_SECONDS"):
+        config["video"]["window_seconds"] = int(os.environ.get("VIDEO_WINDOW_SECONDS"))
+    
+    if os.environ.get("VIDEO_SAMPLING_STRATEGY"):
+        config["video"]["sampling_strategy"] = os.environ.get("VIDEO_SAMPLING_STRATEGY").lower()
+    
+    if os.environ.get("VIDEO_SCENE_THRESHOLD"):
+        config["video"]["scene_threshold"] = float(os.environ.get("VIDEO_SCENE_THRESHOLD"))
+    
+    if os.environ.get("VIDEO_FRAME_CACHE_ENABLED") is not None:
+        config["video"]["frame_cache_enabled"] = os.environ.get("VIDEO_FRAME_CACHE_ENABLED").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("VIDEO_FRAME_CACHE_DIR"):
+        config["video"]["frame_cache_dir"] = os.environ.get("VIDEO_FRAME_CACHE_DIR")
+    
+    if os.environ.get("VIDEO_FRAME_CACHE_MAX_SIZE_MB"):
+        config["video"]["frame_cache_max_size_mb"] = int(os.environ.get("VIDEO_FRAME_CACHE_MAX_SIZE_MB"))
+    
+    if os.environ.get("VIDEO_PREFETCH_WORKERS"):
+        config["video"]["prefetch_workers"] = int(os.environ.get("VIDEO_PREFETCH_WORKERS"))
+    
+    if os.environ.get("VIDEO_PREFETCH_QUEUE_SIZE"):
+        config["video"]["prefetch_queue_size"] = int(os.environ.get("VIDEO_PREFETCH_QUEUE_SIZE"))
+    
+    # ====== Upload configuration ======
+    if os.environ.get("UPLOAD_RESUMABLE_DIR"):
+        config["uploads"]["resumable_dir"] = os.environ.get("UPLOAD_RESUMABLE_DIR")
+    
+    if os.environ.get("UPLOAD_RESUMABLE_TTL_HOURS"):
+        config["uploads"]["resumable_ttl_hours"] = float(os.environ.get("UPLOAD_RESUMABLE_TTL_HOURS"))
+    
+    if os.environ.get("UPLOAD_DEDUP_ENABLED") is not None:
+        config["uploads"]["dedup_enabled"] = os.environ.get("UPLOAD_DEDUP_ENABLED").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("UPLOAD_REUSE_RESULTS") is not None:
+        config["uploads"]["reuse_results"] = os.environ.get("UPLOAD_REUSE_RESULTS").lower() in ["true", "1", "yes"]
+    
+    if os.environ.get("UPLOAD_RESULTS_MAX_MB"):
+        config["uploads"]["results_max_mb"] = float(os.environ.get("UPLOAD_RESULTS_MAX_MB"))
+    
+    if os.environ.get("AUDIO_DECODE_MMAP") is not None:
+        config["audio"]["decode_mmap"] = os.environ.get("AUDIO_DECODE_MMAP").lower() in ["true", "1", "yes"]
+    
     # ====== Segmentation configuration ======
     if os.environ.get("USE_SEGMENTATION") is not None:
         config["segmentation"]["enabled"] = os.environ.get("USE_SEGMENTATION").lower() in ["true", "1", "yes"]
@@ -315,6 +487,9 @@ def load_config() -> Dict[str, Any]:
     if os.environ.get("PORT"):
         config["api"]["port"] = int(os.environ.get("PORT"))
     
+    if os.environ.get("STARTUP_BUDGET_SECONDS"):
+        config["api"]["startup_budget_seconds"] = float(os.environ.get("STARTUP_BUDGET_SECONDS"))
+    
     # ====== Post-processors configuration ======
     # JSONSimplifier configuration
     if os.environ.get("JSON_SIMPLIFIER_ENABLED") is not None:
@@ -580,6 +755,7 @@ db_config = config["database"]
 model_config = config["models"]
 video_config = config["video"]
 audio_config = config["audio"]
+uploads_config = config["uploads"]
 segmentation_config = config["segmentation"]
 inference_config = config["inference"]
 api_config = config["api"]
@@ -54,6 +54,7 @@ class TaskType(str, Enum):
     TRANSCRIPTION_MULTISPEAKER = "transcription_multispeaker"
     VIDEO_MANIPULATION = "video_manipulation_analysis"
     VIDEO_NONVERBAL = "video_nonverbal_analysis"
+    VIDEO_PIPELINE = "video_pipeline"  # extraction then analysis in a single task
     BATCH = "batch"
     SYSTEM_FINAL = "system_final"  # Nouveau type pour l'inférence finale
 
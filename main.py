@@ -5,10 +5,17 @@ This module initializes the FastAPI application and mounts the various routers.
 """
 
 import os
+import sys
+import asyncio
 import logging
 import time
 import traceback
 from pathlib import Path
+
+# Startup phases are timed from here to keep cold start under budget
+from utils.startup_profiler import StartupTimer
+startup_timer = StartupTimer()
+
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -25,6 +32,7 @@ from api import (
     video_router,
     subscription_router,
     task_router,
+    upload_router,
     auth_router
 )
 
@@ -39,6 +47,7 @@ from config import setup_logging, app_config, model_config, api_config
 # Initial logging configuration
 setup_logging()
 logger = logging.getLogger("api.main")
+startup_timer.mark("imports")
 
 # Creating necessary directories
 for directory in ["inference_results", "uploads", "results", "logs", "cache", "translation_models"]:
@@ -268,6 +277,7 @@ app.include_router(video_router, prefix="/api/video")
 app.include_router(transcription_router, prefix="/api/transcription")
 app.include_router(subscription_router, prefix="/api/subscription")
 app.include_router(task_router, prefix="/api/tasks")
+app.include_router(upload_router, prefix="/api")
 app.include_router(auth_router, prefix="/auth")
 
 # Mounting error handlers
@@ -283,9 +293,12 @@ frontend_dir = Path("frontend/dist")
 if frontend_dir.exists() and frontend_dir.is_dir():
     app.mount("/", StaticFiles(directory="frontend/dist", html=True), name="frontend")
 
+startup_timer.mark("app_setup")
+
 @app.on_event("startup")
 async def startup_event():
     """Executed at application startup."""
+    startup_timer.mark("server")
     logger.info("=== Starting Cerastes API ===")
     
     # Initialize global resources (database, cache, etc.)
@@ -297,6 +310,7 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
         logger.error(traceback.format_exc())
+    startup_timer.mark("database")
     
     # Model manager initialization
     try:
@@ -304,19 +318,21 @@ async def startup_event():
         ModelManager.initialize()
         logger.info("Model manager initialized successfully")
         
-        # Preload models if configured
+        # Preload and warm up models if configured. This runs in the background:
+        # the readiness probe reports not ready until every configured model is warm.
         if model_config.get("preload_models", False):
-            logger.info("Model preloading requested...")
             preload_list = model_config.get("preload_list", [])
-            for model_name in preload_list:
-                try:
-                    logger.info(f"Preloading model {model_name}...")
-                    ModelManager.get_instance().load_model(model_name)
-                except Exception as e:
-                    logger.warning(f"Failed to preload model {model_name}: {str(e)}")
+            logger.info(f"Model preloading requested: {', '.join(preload_list) or 'no model configured'}")
+            app.state.warmup_task = asyncio.create_task(
+                ModelManager.get_instance().warmup_models_async(
+                    preload_list,
+                    warmup=model_config.get("warmup_on_preload", True)
+                )
+            )
     except Exception as e:
         logger.error(f"Error initializing model manager: {str(e)}")
         logger.error(traceback.format_exc())
+    startup_timer.mark("model_manager")
     
     # Post-processors initialization
     try:
@@ -332,6 +348,7 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error initializing JSONSimplifier: {str(e)}")
         logger.error(traceback.format_exc())
+    startup_timer.mark("postprocessors")
     
     # Advanced middleware initialization
     try:
@@ -345,14 +362,18 @@ async def startup_event():
         logger.info(f"Cache middleware initialized: {get_cache_stats()}")
     except Exception as e:
         logger.warning(f"Error initializing advanced middleware: {str(e)}")
+    startup_timer.mark("middleware")
     
     # Startup information
     logger.info(f"Version: {app.version}")
     logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
     logger.info(f"Log level: {os.getenv('LOG_LEVEL', 'INFO')}")
     
-    # GPU verification
+    # GPU verification - importing torch only for this log line costs seconds of cold start,
+    # so it is skipped unless models are preloaded or torch is already imported
     try:
+        if not model_config.get("preload_models", False) and "torch" not in sys.modules:
+            raise ImportError("torch not imported yet")
         import torch
         gpu_available = torch.cuda.is_available()
         gpu_count = torch.cuda.device_count() if gpu_available else 0
@@ -361,8 +382,8 @@ async def startup_event():
         if gpu_available:
             for i in range(gpu_count):
                 logger.info(f"GPU {i}: {torch.cuda.get_device_name(i)}, Total memory: {torch.cuda.get_device_properties(i).total_memory / 1024**3:.2f} GB")
-    except ImportError:
-        logger.warning("PyTorch not available, operating in CPU-only mode")
+    except ImportError as e:
+        logger.info(f"GPU check skipped: {str(e)}")
     except Exception as e:
         logger.warning(f"Error checking GPUs: {str(e)}")
     
@@ -384,11 +405,16 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error loading system prompts: {str(e)}")
         logger.error(traceback.format_exc())
+    startup_timer.mark("prompts")
     
     # Mounted middleware verification
     middleware_list = [m.__class__.__name__ for m in app.user_middleware]
     logger.info(f"Active middlewares: {', '.join(middleware_list)}")
     
+    startup_timer.mark("checks")
+    logger.info(startup_timer.report())
+    startup_timer.check_budget(api_config.get("startup_budget_seconds"))
+    
     logger.info("Cerastes API started successfully and ready to receive requests!")
 
 @app.on_event("shutdown")
@@ -404,6 +430,13 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error releasing models: {str(e)}")
     
+    # Stop the video frame prefetch workers
+    try:
+        from video_models.frame_prefetcher import get_frame_prefetcher
+        get_frame_prefetcher().shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping frame prefetcher: {str(e)}")
+    
     # Release middleware resources
     try:
         # Translator resources
@@ -447,8 +480,10 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error cleaning temporary files: {str(e)}")
     
-    # Release CUDA resources
+    # Release CUDA resources (only if torch was ever imported)
     try:
+        if "torch" not in sys.modules:
+            raise ImportError("torch not imported")
         import torch
         if torch.cuda.is_available():
             logger.info("Releasing CUDA memory...")
@@ -470,6 +505,22 @@ async def shutdown_event():
 
 # Entry point for direct execution
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Cerastes API server")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="Profile the import time of the application per package and exit")
+    parser.add_argument("--top", type=int, default=25,
+                        help="Number of packages shown by --profile-imports")
+    args = parser.parse_args()
+    
+    if args.profile_imports:
+        from utils.startup_profiler import profile_imports, print_import_profile
+        
+        profile = profile_imports("main", top=args.top)
+        within_budget = print_import_profile(profile, api_config.get("startup_budget_seconds"))
+        sys.exit(0 if within_budget else 1)
+    
     import uvicorn
     
     host = os.getenv("HOST", "0.0.0.0")
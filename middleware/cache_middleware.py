@@ -174,6 +174,10 @@ class CacheMiddleware(BaseHTTPMiddleware):
         if not self._should_cache_path(request.url.path):
             return await call_next(request)
         
+        # Partial and conditional requests are answered by the endpoint from its own validators
+        if any(header in request.headers for header in ("range", "if-range", "if-none-match", "if-modified-since")):
+            return await call_next(request)
+        
         # Generate cache key
         cache_key = self._generate_cache_key(request)
         
@@ -195,8 +199,8 @@ class CacheMiddleware(BaseHTTPMiddleware):
         # Get response from the application
         response = await call_next(request)
         
-        # Only cache successful responses
-        if 200 <= response.status_code < 300:
+        # Only cache successful, complete responses
+        if 200 <= response.status_code < 300 and response.status_code != 206:
             # Get headers and body of the response
             headers = dict(response.headers)
             headers["X-Cache"] = "MISS"
@@ -217,6 +221,14 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 # Store response in cache
                 self.cache.set(cache_key, response_body, headers, response.status_code, ttl)
                 
+                # The body iterator was consumed: send the body that was read
+                if not hasattr(response, "body"):
+                    return Response(
+                        content=response_body,
+                        status_code=response.status_code,
+                        headers=headers
+                    )
+                
                 # Add cache-specific headers to original response
                 response.headers["X-Cache"] = "MISS"
         
@@ -4,6 +4,7 @@ This module detects the input language of text, translates it to English if nece
 then retranslates the response into the original language.
 """
 
+import sys
 import json
 import logging
 from typing import Dict, Any, Optional, List, Union, Callable
@@ -13,14 +14,8 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
-# For language detection
-from langdetect import detect, LangDetectException
-from langdetect.detector_factory import DetectorFactory
-DetectorFactory.seed = 0  # For consistent results
-
-# For translation
-from transformers import MarianMTModel, MarianTokenizer
-import torch
+# langdetect (language detection) and transformers/torch (Marian translation)
+# are imported on first use, so that importing the middleware stays cheap
 
 # Logging configuration
 logger = logging.getLogger("translation_middleware")
@@ -52,8 +47,17 @@ class TranslationManager:
     def __init__(self):
         self.tokenizers = {}
         self.models = {}
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"TranslationManager initialized on {self.device}")
+        self._device = None
+        logger.info("TranslationManager initialized (models loaded on first use)")
+    
+    @property
+    def device(self) -> str:
+        """Device used for translation, resolved on first use."""
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+            logger.info(f"TranslationManager running on {self._device}")
+        return self._device
     
     def get_model_name(self, source_lang: str, target_lang: str) -> str:
         """Returns the model name for the language pair."""
@@ -76,6 +80,8 @@ class TranslationManager:
         logger.info(f"Loading translation model {model_name}")
         
         try:
+            from transformers import MarianMTModel, MarianTokenizer
+            
             tokenizer = MarianTokenizer.from_pretrained(model_name, cache_dir=MODELS_CACHE_DIR)
             model = MarianMTModel.from_pretrained(model_name, cache_dir=MODELS_CACHE_DIR)
             
@@ -127,6 +133,10 @@ class TranslationManager:
         if not text or len(text) < 10:
             return None
         
+        from langdetect import detect, LangDetectException
+        from langdetect.detector_factory import DetectorFactory
+        DetectorFactory.seed = 0  # For consistent results
+        
         try:
             detected_lang = detect(text)
             return detected_lang if detected_lang in SUPPORTED_LANGUAGES else None
@@ -137,8 +147,12 @@ class TranslationManager:
         """Releases resources."""
         self.models.clear()
         self.tokenizers.clear()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        
+        # Nothing to release if no model was ever loaded
+        if "torch" in sys.modules:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
 
 # Instantiate the translation manager
 translation_manager = TranslationManager()
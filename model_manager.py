@@ -6,16 +6,23 @@ This module provides a unified interface for loading, managing and releasing AI
 
 import os
 import gc
+import sys
+import time
+import asyncio
 import logging
-import torch
+import threading
+from contextlib import contextmanager
 from enum import Enum  # Ajoutez cette ligne
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, List
 
 logger = logging.getLogger("model_manager")
 
 # Configuration du logging
 logger = logging.getLogger("model_manager")
 
+# Approximate memory of one instance of each Whisper size, in GB (residency budget)
+WHISPER_MEMORY_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "large": 10, "turbo": 6}
+
 # Énumération des types de modèles supportés
 class ModelType(str, Enum):
     """Types de modèles supportés par le gestionnaire"""
@@ -23,6 +30,8 @@ class ModelType(str, Enum):
     INTERNVIDEO = "internvideo"
     DEEPSEEK = "deepseek"
     DIARIZATION = "diarization"
+    VOICE_ENCODER = "voice_encoder"
+    FASTER_WHISPER = "faster_whisper"
 
 class ModelManager:
     """AI model manager with singleton pattern"""
@@ -53,6 +62,13 @@ class ModelManager:
         """Initialize the manager with empty dictionaries"""
         self.loaded_models = {}
         self.model_metadata = {}
+        self.warmup_state = {}
+        # Guards the dictionaries above; held briefly, never during a load
+        self._lock = threading.RLock()
+        # One lock per model key, held while that model loads
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # Models being loaded (key -> (type, name)), counted by the Whisper pool limits
+        self._loading: Dict[str, Tuple[str, str]] = {}
     
     def get_model(self, model_type: str, model_name: str, **kwargs) -> Any:
         """
@@ -68,43 +84,337 @@ class ModelManager:
         """
         model_key = f"{model_type}_{model_name}"
         
-        # Check if the model is already loaded
-        if model_key in self.loaded_models:
-            logger.debug(f"Model {model_key} already loaded, reusing")
-            return self.loaded_models[model_key]
-        
-        # Load the model according to its type
-        logger.info(f"Loading model {model_key}")
-        
-        if model_type == "whisper":
-            model = self._load_whisper_model(model_name, **kwargs)
-        elif model_type == "internvideo":
-            model = self._load_internvideo_model(model_name, **kwargs)
-        elif model_type == "deepseek":
-            model = self._load_deepseek_model(model_name, **kwargs)
-        elif model_type == "diarization":
-            model = self._load_diarization_model(model_name, **kwargs)
-        else:
-            raise ValueError(f"Unsupported model type: {model_type}")
-        
-        # Store the model and its metadata
-        self.loaded_models[model_key] = model
-        self.model_metadata[model_key] = {
-            "loaded_at": self._get_current_timestamp(),
-            "last_used": self._get_current_timestamp(),
-            "type": model_type,
-            "name": model_name
-        }
+        # Lookups only hold the manager lock briefly: a model loading for minutes
+        # (InternVideo, DeepSeek) never delays the lookups of models already loaded
+        with self._lock:
+            if model_key in self.loaded_models:
+                logger.debug(f"Model {model_key} already loaded, reusing")
+                self.model_metadata[model_key]["last_used"] = self._get_current_timestamp()
+                return self.loaded_models[model_key]
+            load_lock = self._load_locks.setdefault(model_key, threading.Lock())
+        
+        # Loads are serialized per model, so that warmup and requests never load the
+        # same weights twice while different models load side by side
+        with load_lock:
+            with self._lock:
+                if model_key in self.loaded_models:
+                    self.model_metadata[model_key]["last_used"] = self._get_current_timestamp()
+                    return self.loaded_models[model_key]
+                
+                # Make room in the pool of this model type before loading
+                evicted = self._evict_for(model_type, model_name)
+                self._loading[model_key] = (model_type, model_name)
+            
+            if evicted:
+                self._free_memory()
+            
+            try:
+                # Load the model according to its type
+                logger.info(f"Loading model {model_key}")
+                
+                if model_type == "whisper":
+                    model = self._load_whisper_model(model_name, **kwargs)
+                elif model_type == "internvideo":
+                    model = self._load_internvideo_model(model_name, **kwargs)
+                elif model_type == "deepseek":
+                    model = self._load_deepseek_model(model_name, **kwargs)
+                elif model_type == "diarization":
+                    model = self._load_diarization_model(model_name, **kwargs)
+                elif model_type == "voice_encoder":
+                    model = self._load_voice_encoder_model(model_name, **kwargs)
+                elif model_type == "faster_whisper":
+                    model = self._load_faster_whisper_model(model_name, **kwargs)
+                else:
+                    raise ValueError(f"Unsupported model type: {model_type}")
+            finally:
+                with self._lock:
+                    self._loading.pop(model_key, None)
+            
+            # Store the model and its metadata
+            with self._lock:
+                self.loaded_models[model_key] = model
+                self.model_metadata[model_key] = {
+                    "loaded_at": self._get_current_timestamp(),
+                    "last_used": self._get_current_timestamp(),
+                    "type": model_type,
+                    "name": model_name,
+                    # Holders of the instance (see hold_model), which the pool never evicts
+                    "in_use": 0
+                }
         
         return model
     
+    @contextmanager
+    def hold_model(self, model_type: str, model_name: str, **kwargs):
+        """
+        Get a model and keep it in the pool while the block runs
+        
+        An instance evicted while a job still decodes with it is not freed, but is no
+        longer tracked: the next request would load a second copy. Held instances are
+        therefore skipped by the eviction, and their last use is refreshed on release.
+        
+        Args:
+            model_type: Model type
+            model_name: Model name/version
+            **kwargs: Additional arguments for loading
+            
+        Yields:
+            Model instance
+        """
+        model_key = f"{model_type}_{model_name}"
+        
+        while True:
+            model = self.get_model(model_type, model_name, **kwargs)
+            with self._lock:
+                # The instance may have been evicted between the load and this check
+                if self.loaded_models.get(model_key) is model:
+                    self.model_metadata[model_key]["in_use"] += 1
+                    break
+        
+        try:
+            yield model
+        finally:
+            with self._lock:
+                if self.loaded_models.get(model_key) is model:
+                    self.model_metadata[model_key]["in_use"] -= 1
+                    self.model_metadata[model_key]["last_used"] = self._get_current_timestamp()
+    
+    def resolve_model_spec(self, model_spec: str) -> Tuple[str, str]:
+        """
+        Resolve a preload entry into a (model_type, model_name) pair
+        
+        Args:
+            model_spec: "type" or "type:name" (e.g.: 'whisper:medium', 'internvideo')
+            
+        Returns:
+            Tuple (model_type, model_name), the name defaulting to the configured one
+        """
+        from config import model_config
+        
+        model_type, _, model_name = model_spec.partition(":")
+        model_type = model_type.strip().lower()
+        model_name = model_name.strip()
+        
+        if not model_name:
+            default_names = {
+                "whisper": model_config["whisper"]["default_size"],
+                "internvideo": model_config["internvideo"]["model_path"],
+                "deepseek": model_config["llm"]["default_model"],
+                "diarization": model_config["diarization"]["model_path"],
+                "voice_encoder": "resemblyzer",
+                "faster_whisper": model_config["whisper"]["default_size"],
+            }
+            if model_type not in default_names:
+                raise ValueError(f"Unsupported model type: {model_type}")
+            model_name = default_names[model_type]
+        
+        return model_type, model_name
+    
+    def load_model(self, model_spec: str, **kwargs) -> Any:
+        """
+        Load a model from a preload entry
+        
+        Args:
+            model_spec: "type" or "type:name" (e.g.: 'whisper:medium')
+            **kwargs: Additional arguments for loading
+            
+        Returns:
+            Model instance
+        """
+        model_type, model_name = self.resolve_model_spec(model_spec)
+        return self.get_model(model_type, model_name, **kwargs)
+    
+    def warmup_model(self, model_type: str, model_name: str, warmup: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        Load a model and run a tiny inference on it to populate caches and compile kernels
+        
+        Args:
+            model_type: Model type (e.g.: 'whisper', 'internvideo', 'deepseek')
+            model_name: Model name/version
+            warmup: Run the warmup inference after loading
+            **kwargs: Additional arguments for loading
+            
+        Returns:
+            Warm state of the model
+        """
+        model_key = f"{model_type}_{model_name}"
+        state = self.warmup_state.setdefault(model_key, {"type": model_type, "name": model_name})
+        start = time.time()
+        
+        try:
+            state.update({"status": "loading", "error": None})
+            model = self.get_model(model_type, model_name, **kwargs)
+            state["load_seconds"] = round(time.time() - start, 2)
+            
+            if warmup:
+                state["status"] = "warming"
+                warmup_start = time.time()
+                
+                if model_type == "whisper":
+                    self._warmup_whisper_model(model)
+                elif model_type == "internvideo":
+                    self._warmup_internvideo_model(model)
+                elif model_type == "deepseek":
+                    self._warmup_deepseek_model(model)
+                elif model_type == "diarization":
+                    self._warmup_diarization_model(model)
+                elif model_type == "voice_encoder":
+                    self._warmup_voice_encoder_model(model)
+                elif model_type == "faster_whisper":
+                    self._warmup_faster_whisper_model(model)
+                
+                state["warmup_seconds"] = round(time.time() - warmup_start, 2)
+            
+            state["status"] = "warm" if warmup else "loaded"
+            logger.info(f"Model {model_key} {state['status']} in {time.time() - start:.2f}s")
+            
+        except Exception as e:
+            state.update({"status": "failed", "error": str(e)})
+            logger.error(f"Warmup of model {model_key} failed: {str(e)}")
+        
+        return state
+    
+    def warmup_models(self, model_specs: List[str], warmup: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Load and warm up a list of preload entries sequentially
+        
+        Args:
+            model_specs: Preload entries ("type" or "type:name")
+            warmup: Run the warmup inference after loading
+            
+        Returns:
+            Warm state of every model, indexed by model key
+        """
+        for model_type, model_name in self._register_warmup(model_specs):
+            self.warmup_model(model_type, model_name, warmup=warmup)
+        
+        return self.get_warmup_status()["models"]
+    
+    async def warmup_models_async(self, model_specs: List[str], warmup: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Run warmup_models in a worker thread without blocking the event loop
+        
+        The models are registered as pending before returning control, so that
+        the readiness probe reports them as not yet warm right away.
+        """
+        self._register_warmup(model_specs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.warmup_models, model_specs, warmup)
+    
+    def get_warmup_status(self) -> Dict[str, Any]:
+        """
+        Get the per-model warm state for readiness gating
+        
+        Returns:
+            Dictionary with 'ready' (all registered models warm), 'pending',
+            'failed' and the per-model 'models' states
+        """
+        models = {}
+        for model_key, state in self.warmup_state.items():
+            models[model_key] = dict(state, resident=model_key in self.loaded_models)
+        
+        pending = [k for k, s in models.items() if s.get("status") not in ("warm", "loaded", "failed")]
+        failed = [k for k, s in models.items() if s.get("status") == "failed"]
+        
+        return {
+            "ready": not pending and not failed,
+            "pending": pending,
+            "failed": failed,
+            "models": models
+        }
+    
+    def _register_warmup(self, model_specs: List[str]) -> List[Tuple[str, str]]:
+        """Register preload entries as pending and return their resolved (type, name) pairs"""
+        resolved = []
+        for model_spec in model_specs:
+            try:
+                model_type, model_name = self.resolve_model_spec(model_spec)
+            except ValueError as e:
+                logger.warning(f"Ignoring preload entry {model_spec}: {str(e)}")
+                continue
+            
+            model_key = f"{model_type}_{model_name}"
+            if model_key not in self.warmup_state:
+                self.warmup_state[model_key] = {"type": model_type, "name": model_name, "status": "pending"}
+            resolved.append((model_type, model_name))
+        
+        return resolved
+    
+    def _warmup_whisper_model(self, model):
+        """Transcribe one second of silence"""
+        import numpy as np
+        import torch
+        
+        silence = np.zeros(16000, dtype=np.float32)
+        model.transcribe(silence, fp16=torch.cuda.is_available(), language="en", verbose=None)
+    
+    def _warmup_faster_whisper_model(self, model):
+        """Transcribe one second of silence (segments are decoded while they are iterated)"""
+        import numpy as np
+        
+        segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en", beam_size=1)
+        list(segments)
+    
+    def _warmup_internvideo_model(self, model_bundle):
+        """Generate a single token from one blank frame"""
+        import torch
+        from config import model_config
+        
+        model, tokenizer = model_bundle
+        input_size = model_config["internvideo"].get("input_size", 448)
+        pixel_values = torch.zeros((1, 3, input_size, input_size), dtype=torch.bfloat16, device=model.device)
+        
+        with torch.no_grad():
+            model.chat(
+                tokenizer, pixel_values, "Frame 1: <image>\nDescribe the frame.",
+                dict(do_sample=False, max_new_tokens=1),
+                num_patches_list=[1],
+                history=None, return_history=False
+            )
+    
+    def _warmup_deepseek_model(self, model):
+        """Generate a single token from a short prompt"""
+        from vllm import SamplingParams
+        
+        model.generate(["Hello"], SamplingParams(temperature=0, max_tokens=1))
+    
+    def _warmup_diarization_model(self, pipeline):
+        """Run the diarization pipeline on two seconds of silence"""
+        import torch
+        pipeline({"waveform": torch.zeros((1, 32000)), "sample_rate": 16000})
+    
+    def _warmup_voice_encoder_model(self, encoder):
+        """Embed a batch of partial utterances of noise"""
+        import torch
+        from resemblyzer.hparams import partials_n_frames, mel_n_channels
+        
+        with torch.no_grad():
+            encoder(torch.rand((8, partials_n_frames, mel_n_channels), device=encoder.device))
+    
     def _load_whisper_model(self, model_name, **kwargs):
-        """Load a Whisper model"""
+        """Load a Whisper model ('size@n' names the n-th replica of a size, loaded separately)"""
+        import torch
         import whisper
-        return whisper.load_model(model_name, device="cuda" if torch.cuda.is_available() else "cpu")
+        model_size = model_name.split("@", 1)[0]
+        return whisper.load_model(model_size, device="cuda" if torch.cuda.is_available() else "cpu")
+    
+    def _load_faster_whisper_model(self, model_name, **kwargs):
+        """Load a Whisper model converted to CTranslate2 (int8 weights, multi-threaded CPU decoding)"""
+        from faster_whisper import WhisperModel
+        from config import model_config
+        
+        whisper_config = model_config["whisper"]
+        return WhisperModel(
+            model_name,
+            device=whisper_config.get("ct2_device", "auto"),
+            compute_type=whisper_config.get("ct2_compute_type", "int8"),
+            cpu_threads=whisper_config.get("ct2_cpu_threads") or os.cpu_count() or 4,
+            num_workers=whisper_config.get("ct2_num_workers", 1)
+        )
     
     def _load_internvideo_model(self, model_name, **kwargs):
         """Load an InternVideo model"""
+        import torch
         from transformers import AutoModel, AutoTokenizer
         
         tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
@@ -118,6 +428,7 @@ class ModelManager:
     
     def _load_deepseek_model(self, model_name, **kwargs):
         """Load a DeepSeek model"""
+        import torch
         from vllm import LLM
         import os
         
@@ -134,14 +445,26 @@ class ModelManager:
         )
     
     def _load_diarization_model(self, model_name, **kwargs):
-        """Load a diarization model"""
+        """Load a diarization pipeline (on the GPU when there is one)"""
+        import torch
         from pyannote.audio import Pipeline
+        from config import model_config
         
-        token = kwargs.get("token") or os.environ.get("HUGGINGFACE_TOKEN", "")
+        token = kwargs.get("token") or os.environ.get("HUGGINGFACE_TOKEN", "") or model_config["diarization"]["huggingface_token"]
         if not token:
             raise ValueError("A Hugging Face token is required for diarization")
         
-        return Pipeline.from_pretrained(model_name, use_auth_token=token)
+        pipeline = Pipeline.from_pretrained(model_name, use_auth_token=token)
+        if torch.cuda.is_available():
+            pipeline.to(torch.device("cuda"))
+        return pipeline
+    
+    def _load_voice_encoder_model(self, model_name, **kwargs):
+        """Load the resemblyzer speaker encoder"""
+        import torch
+        from resemblyzer import VoiceEncoder
+        
+        return VoiceEncoder(device="cuda" if torch.cuda.is_available() else "cpu", verbose=False)
     
     def unload_model(self, model_type: str, model_name: str) -> bool:
         """
@@ -155,20 +478,107 @@ class ModelManager:
             True if the model was unloaded, False otherwise
         """
         model_key = f"{model_type}_{model_name}"
-        
-        if model_key in self.loaded_models:
+
+        with self._lock:
+            if model_key not in self.loaded_models:
+                return False
+
             del self.loaded_models[model_key]
             self.model_metadata.pop(model_key, None)
+
+        # Free memory
+        self._free_memory()
+
+        logger.info(f"Model {model_key} unloaded")
+        return True
+    
+    def unload_models(self, model_type: str, model_name: Optional[str] = None) -> int:
+        """
+        Unload every instance of a model type, or of one model ('name' and its 'name@n' replicas)
+        
+        Args:
+            model_type: Model type
+            model_name: Model name (all models of the type by default)
             
-            # Free memory
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+        Returns:
+            Number of instances unloaded
+        """
+        with self._lock:
+            model_keys = [
+                model_key for model_key, metadata in self.model_metadata.items()
+                if metadata["type"] == model_type
+                and (model_name is None or metadata["name"].split("@", 1)[0] == model_name)
+            ]
+            for model_key in model_keys:
+                del self.loaded_models[model_key]
+                del self.model_metadata[model_key]
+        
+        if model_keys:
+            self._free_memory()
+            logger.info(f"Models {', '.join(model_keys)} unloaded")
+        return len(model_keys)
+    
+    def _evict_for(self, model_type: str, model_name: str) -> List[str]:
+        """
+        Unload the least recently used Whisper sizes so that a new instance fits (lock must be held)
+        
+        Whisper sizes stay resident side by side, up to whisper.pool_max_sizes sizes and
+        whisper.pool_memory_gb of estimated memory; a size is evicted with its replicas.
+        Sizes held by a decoding (see hold_model) or still loading are never evicted: the
+        pool then goes over its limits until they are released.
+        The caller frees the memory once the lock is released.
+        
+        Returns:
+            Keys of the evicted instances
+        """
+        if model_type != "whisper":
+            return []
+        
+        from config import model_config
+        whisper_config = model_config["whisper"]
+        max_sizes = whisper_config.get("pool_max_sizes", 2)
+        memory_budget = whisper_config.get("pool_memory_gb")
+        new_size = model_name.split("@", 1)[0]
+        
+        # Resident instances grouped by size: last use, keys and estimated memory
+        sizes: Dict[str, Dict[str, Any]] = {new_size: {"last_used": float("inf"), "keys": [], "memory": 0}}
+        for model_key, metadata in self.model_metadata.items():
+            if metadata["type"] != "whisper":
+                continue
+            size = sizes.setdefault(metadata["name"].split("@", 1)[0], {"last_used": 0, "keys": [], "memory": 0})
+            size["last_used"] = max(size["last_used"], metadata["last_used"])
+            size["keys"].append(model_key)
+            if metadata.get("in_use"):
+                # A size still decoding cannot be evicted
+                size["last_used"] = float("inf")
+        # Instances still loading in other threads count, and their size cannot be evicted
+        loading = [name.split("@", 1)[0] for loading_type, name in self._loading.values() if loading_type == "whisper"]
+        for size_name in loading:
+            sizes.setdefault(size_name, {"last_used": 0, "keys": [], "memory": 0})["last_used"] = float("inf")
+        for size_name, size in sizes.items():
+            instances = len(size["keys"]) + (size_name == new_size) + loading.count(size_name)
+            size["memory"] = WHISPER_MEMORY_GB.get(size_name, 5) * instances
+        
+        evicted = []
+        while True:
+            over_count = max_sizes and len(sizes) > max_sizes
+            over_memory = memory_budget and sum(size["memory"] for size in sizes.values()) > memory_budget
+            candidates = [
+                size_name for size_name in sizes
+                if size_name != new_size and sizes[size_name]["last_used"] != float("inf")
+            ]
+            if not (over_count or over_memory) or not candidates:
+                break
             
-            logger.info(f"Model {model_key} unloaded")
-            return True
+            victim = min(candidates, key=lambda size_name: sizes[size_name]["last_used"])
+            for model_key in sizes.pop(victim)["keys"]:
+                del self.loaded_models[model_key]
+                del self.model_metadata[model_key]
+                evicted.append(model_key)
         
-        return False
+        if evicted:
+            logger.info(f"Evicted least recently used Whisper models {', '.join(evicted)} to load {model_name}")
+        return evicted
     
     def _cleanup_all_models(self):
         """Unload all models and free memory"""
@@ -176,12 +586,20 @@ class ModelManager:
         self.model_metadata.clear()
         
         # Free memory
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        self._free_memory()
         
         logger.info("All models have been unloaded")
     
+    def _free_memory(self):
+        """Run the garbage collector and release cached CUDA memory"""
+        gc.collect()
+        
+        # torch is only imported lazily by the loaders: nothing to release if it never was
+        if "torch" in sys.modules:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+    
     def _get_current_timestamp(self):
         """Get the current timestamp"""
         import time
@@ -0,0 +1,107 @@
+"""
+Benchmark of the speaker assignment
+----------------------------------------
+Compares the sweep-line assign_speakers with the former comparison of every
+segment with every diarization turn, on synthetic long transcripts, and checks
+that both give the same speakers.
+
+Usage: python tests/benchmark_speaker_assignment.py [--hours 2] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcription_models.diarization import assign_speakers
+
+
+def assign_speakers_pairwise(transcription, diarization):
+    """Former implementation: every segment is compared with every turn."""
+    final_transcription = []
+    for segment in transcription["segments"]:
+        start, end, text = segment["start"], segment["end"], segment["text"]
+        speaker = "Unknown"
+        speaker_times = {}
+        for d_start, d_end, d_speaker in diarization:
+            overlap_start = max(d_start, start)
+            overlap_end = min(d_end, end)
+            if overlap_start < overlap_end:
+                speaker_times[d_speaker] = speaker_times.get(d_speaker, 0) + (overlap_end - overlap_start)
+        if speaker_times:
+            speaker = max(speaker_times, key=speaker_times.get)
+        final_transcription.append({"start": start, "end": end, "speaker": speaker, "text": text})
+    return final_transcription
+
+
+def synthetic_recording(hours, speakers=4, seed=0):
+    """Builds a Whisper-like transcript (with words) and overlapping diarization turns."""
+    rng = random.Random(seed)
+    duration = hours * 3600
+
+    segments = []
+    position = 0.0
+    while position < duration:
+        start = position + rng.uniform(0, 0.8)
+        words = []
+        word_start = start
+        for _ in range(rng.randint(3, 25)):
+            word_end = word_start + rng.uniform(0.15, 0.6)
+            words.append({"start": round(word_start, 2), "end": round(word_end, 2), "word": " word"})
+            word_start = word_end + rng.uniform(0, 0.2)
+        segments.append({
+            "start": words[0]["start"],
+            "end": words[-1]["end"],
+            "text": "".join(word["word"] for word in words),
+            "words": words
+        })
+        position = words[-1]["end"]
+
+    turns = []
+    position = 0.0
+    while position < duration:
+        start = max(0.0, position - rng.uniform(0, 0.5))  # turns overlap a little
+        end = start + rng.uniform(0.5, 8.0)
+        turns.append((start, end, f"Speaker_{rng.randrange(speakers)}"))
+        position = end
+    # Diarization output is not guaranteed to be sorted
+    rng.shuffle(turns)
+
+    return {"segments": segments}, turns
+
+
+def measure(function, repeat):
+    """Best wall time of several runs, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=2.0, help="Duration of the synthetic recording")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation")
+    args = parser.parse_args()
+
+    transcription, diarization = synthetic_recording(args.hours)
+    print(f"{len(transcription['segments'])} segments, {len(diarization)} turns")
+
+    sweep_time, sweep_result = measure(lambda: assign_speakers(transcription, diarization), args.repeat)
+    pairwise_time, pairwise_result = measure(lambda: assign_speakers_pairwise(transcription, diarization), args.repeat)
+    word_time, word_result = measure(lambda: assign_speakers(transcription, diarization, word_level=True), args.repeat)
+
+    assert sweep_result == pairwise_result, "The sweep-line assignment differs from the pairwise one"
+
+    print(f"pairwise:         {pairwise_time * 1000:10.1f} ms")
+    print(f"sweep-line:       {sweep_time * 1000:10.1f} ms  ({pairwise_time / sweep_time:.0f}x)")
+    print(f"word-level sweep: {word_time * 1000:10.1f} ms  ({len(word_result)} speaker turns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -90,7 +90,27 @@ class TestHealth:
         data = response.json()
         assert "status" in data
         assert data["status"] == "ready"
-    
+
+    def test_readiness_reports_model_warmup(self, api_url):
+        """Test that the readiness probe reports the per-model warm state."""
+        response = requests.get(f"{api_url}/health/ready")
+
+        # If ready endpoint doesn't exist, skip test
+        if response.status_code == 404:
+            pytest.skip("Readiness endpoint not available")
+
+        # 503 is expected while configured models are still warming up
+        assert response.status_code in [200, 503], f"Unexpected status code: {response.status_code}, {response.text}"
+
+        data = response.json()
+        if "models" not in data:
+            pytest.skip("Readiness endpoint does not report model warm state")
+
+        for model_key, state in data["models"].items():
+            assert state["status"] in ["pending", "loading", "warming", "warm", "loaded", "failed"]
+            if response.status_code == 200:
+                assert state["status"] in ["warm", "loaded"], f"Model {model_key} not warm on a ready replica"
+
     def test_liveness_probe(self, api_url):
         """Test the liveness probe endpoint."""
         response = requests.get(f"{api_url}/health/live")
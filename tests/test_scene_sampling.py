@@ -0,0 +1,93 @@
+"""
+Tests for the scene sampling cost
+------------------------------------
+This module checks that the scene pass of get_scene_indices decodes fewer frames
+than a uniform decode of the same budget. Decoding is simulated: reading a frame
+decodes every frame since the previous keyframe, as when seeking in a GOP.
+"""
+
+import sys
+import types
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from video_models.video_utils import (
+    SCENE_MAX_CANDIDATES, SCENE_SIGNATURE_SIZE, get_index, get_scene_indices
+)
+
+FPS = 25.0
+DURATION = 600  # seconds
+KEYFRAME_INTERVAL = 50  # frames, a keyframe every 2 s
+SCENE_LENGTH = 900  # frames, a new scene every 36 s
+NUM_SEGMENTS = 128
+
+MAX_FRAME = int(DURATION * FPS) - 1
+KEYFRAMES = list(range(0, MAX_FRAME + 1, KEYFRAME_INTERVAL))
+
+
+def decode_cost(indices):
+    """Number of frames decoded to read the given frames, each one sought from its keyframe."""
+    return sum(int(index) % KEYFRAME_INTERVAL + 1 for index in indices)
+
+
+class FakeVideoReader:
+    """Stand-in for decord.VideoReader: one flat color per scene, decoded frames counted."""
+
+    decoded_frames = 0
+
+    def __init__(self, video_path, ctx=None, width=-1, height=-1, num_threads=0):
+        self.size = (height, width)
+
+    def get_batch(self, indices):
+        FakeVideoReader.decoded_frames += decode_cost(indices)
+        scenes = np.asarray(indices) // SCENE_LENGTH
+        frames = np.empty((len(indices), *self.size, 3), dtype=np.uint8)
+        frames[:] = ((scenes * 97) % 256).astype(np.uint8)[:, None, None, None]
+        return types.SimpleNamespace(asnumpy=lambda: frames)
+
+
+@pytest.fixture
+def fake_decord():
+    FakeVideoReader.decoded_frames = 0
+    decord = types.SimpleNamespace(VideoReader=FakeVideoReader, cpu=lambda device: device)
+    with patch.dict(sys.modules, {"decord": decord}):
+        yield FakeVideoReader
+
+
+class TestSceneSampling:
+    """Test class for the cost of the scene sampling."""
+
+    def test_scene_pass_is_cheaper_than_uniform_decode(self, fake_decord):
+        """Test that scanning keyframes and decoding the selection costs less than a uniform decode."""
+        indices = get_scene_indices("video.mp4", FPS, MAX_FRAME, NUM_SEGMENTS, key_indices=KEYFRAMES)
+        scene_cost = fake_decord.decoded_frames + decode_cost(indices)
+        uniform_cost = decode_cost(get_index(None, FPS, MAX_FRAME, num_segments=NUM_SEGMENTS))
+
+        assert len(indices) <= NUM_SEGMENTS
+        assert scene_cost < uniform_cost
+
+    def test_candidates_are_keyframes(self, fake_decord):
+        """Test that the scan only reads keyframes, at the signature resolution and within the cap."""
+        scanned = []
+        get_batch = FakeVideoReader.get_batch
+
+        def record_batch(reader, indices):
+            scanned.append((reader.size, list(indices)))
+            return get_batch(reader, indices)
+
+        with patch.object(FakeVideoReader, "get_batch", record_batch):
+            get_scene_indices("video.mp4", FPS, MAX_FRAME, NUM_SEGMENTS, key_indices=KEYFRAMES)
+
+        (size, candidates), = scanned
+        assert size == (SCENE_SIGNATURE_SIZE, SCENE_SIGNATURE_SIZE)
+        assert len(candidates) <= SCENE_MAX_CANDIDATES
+        assert set(candidates) <= set(KEYFRAMES)
+
+    def test_scene_changes_are_selected(self, fake_decord):
+        """Test that the first keyframe of every scene is selected."""
+        indices = get_scene_indices("video.mp4", FPS, MAX_FRAME, NUM_SEGMENTS, key_indices=KEYFRAMES)
+
+        scene_starts = range(SCENE_LENGTH, MAX_FRAME + 1, SCENE_LENGTH)
+        assert set(scene_starts) <= set(indices.tolist())
@@ -0,0 +1,62 @@
+"""
+Tests for the speaker assignment
+------------------------------------
+This module checks that the sweep-line assign_speakers gives the same speakers
+as comparing every segment with every diarization turn, including overlapping
+and unsorted turns and ties.
+"""
+
+import random
+
+import pytest
+
+from benchmark_speaker_assignment import assign_speakers_pairwise, synthetic_recording
+from transcription_models.diarization import assign_speakers
+
+
+class TestSpeakerAssignment:
+    """Test class for the sweep-line speaker assignment."""
+
+    def test_synthetic_recording_matches_pairwise(self):
+        """Test a long transcript with overlapping, shuffled turns."""
+        transcription, diarization = synthetic_recording(0.25, seed=1)
+
+        assert assign_speakers(transcription, diarization) == assign_speakers_pairwise(transcription, diarization)
+
+    @pytest.mark.parametrize("seed", range(50))
+    def test_random_grid_matches_pairwise(self, seed):
+        """Test random segments and turns on a coarse grid, where overlaps often tie."""
+        rng = random.Random(seed)
+
+        segments = []
+        for _ in range(rng.randint(1, 30)):
+            start = rng.randint(0, 40) / 2
+            segments.append({"start": start, "end": start + rng.randint(0, 8) / 2, "text": " text"})
+
+        diarization = []
+        for _ in range(rng.randint(0, 30)):
+            start = rng.randint(0, 40) / 2
+            diarization.append((start, start + rng.randint(1, 8) / 2, f"Speaker_{rng.randrange(3)}"))
+
+        transcription = {"segments": segments}
+        assert assign_speakers(transcription, diarization) == assign_speakers_pairwise(transcription, diarization)
+
+    @pytest.mark.parametrize("diarization, expected", [
+        ([(0.0, 1.0, "Speaker_B"), (1.0, 2.0, "Speaker_A")], "Speaker_B"),
+        ([(1.0, 2.0, "Speaker_A"), (0.0, 1.0, "Speaker_B")], "Speaker_A"),
+    ])
+    def test_tie_goes_to_first_listed_speaker(self, diarization, expected):
+        """Test that a tie goes to the speaker listed first, whatever the turn order in time."""
+        transcription = {"segments": [{"start": 0.0, "end": 2.0, "text": " text"}]}
+
+        result = assign_speakers(transcription, diarization)
+
+        assert result == assign_speakers_pairwise(transcription, diarization)
+        assert result[0]["speaker"] == expected
+
+    def test_segment_without_turn_is_unknown(self):
+        """Test that a segment overlapping no turn has an unknown speaker."""
+        transcription = {"segments": [{"start": 5.0, "end": 6.0, "text": " text"}]}
+        diarization = [(0.0, 5.0, "Speaker_0"), (6.0, 7.0, "Speaker_1")]
+
+        assert assign_speakers(transcription, diarization)[0]["speaker"] == "Unknown"
@@ -281,7 +281,33 @@ class TestTranscription:
             # Transcription can be a string or a list for diarization
             transcription = results["transcription"]
             assert isinstance(transcription, (str, list)), f"Invalid transcription type: {type(transcription)}"
-    
+
+    def test_download_transcript_range(self, api_url, api_headers, transcription_task, wait_for_task):
+        """Test downloading part of a transcript and revalidating it with its ETag."""
+        result = wait_for_task(transcription_task, api_headers, max_retries=10, delay=3)
+        if result is None:
+            pytest.skip(f"Task {transcription_task} did not complete in the allotted time")
+
+        response = requests.get(
+            f"{api_url}/api/transcription/transcription/task/{transcription_task}/download",
+            headers={**api_headers, "Range": "bytes=0-9"}
+        )
+
+        # If endpoint doesn't exist, skip test
+        if response.status_code == 404:
+            pytest.skip("Transcript download endpoint not available")
+
+        assert response.status_code == 206, f"Unexpected status code: {response.status_code}, {response.text}"
+        assert response.headers["Content-Range"].startswith("bytes 0-"), "Invalid Content-Range"
+        assert len(response.content) <= 10, "Range not honored"
+
+        # The same file is not sent again while unchanged
+        response = requests.get(
+            f"{api_url}/api/transcription/transcription/task/{transcription_task}/download",
+            headers={**api_headers, "If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == 304, f"Unexpected status code: {response.status_code}"
+
     def test_list_transcription_tasks(self, api_url, api_headers, transcription_task):
         """Test listing all transcription tasks."""
         response = requests.get(
@@ -406,4 +432,45 @@ class TestTranscription:
         assert response.status_code == 200, f"Cannot verify cancellation: {response.status_code}, {response.text}"
         
         task_data = response.json()
-        assert task_data["status"] in ["cancelled", "deleted"], f"Task not cancelled correctly: {task_data['status']}"
\ No newline at end of file
+        assert task_data["status"] in ["cancelled", "deleted"], f"Task not cancelled correctly: {task_data['status']}"
+    
+    def test_live_transcription_stream(self, api_url, auth_token):
+        """Test streaming silence to the live transcription WebSocket."""
+        websocket = pytest.importorskip("websocket")
+        import json
+
+        ws_url = api_url.replace("http", "ws", 1) + "/api/transcription/transcription/live"
+        try:
+            connection = websocket.create_connection(f"{ws_url}?token={auth_token}", timeout=30)
+        except websocket.WebSocketBadStatusException as e:
+            pytest.skip(f"Live transcription endpoint not available: {e.status_code}")
+
+        try:
+            assert json.loads(connection.recv())["type"] == "ready"
+
+            # Two seconds of 16 kHz 16-bit silence, in 100 ms frames
+            for _ in range(20):
+                connection.send_binary(b"\x00\x00" * 1600)
+            connection.send(json.dumps({"type": "stop"}))
+
+            message = json.loads(connection.recv())
+            while message["type"] != "done":
+                assert message["type"] in ["partial", "final"], f"Unexpected message: {message}"
+                message = json.loads(connection.recv())
+
+            # Silence produces no finalized segment
+            assert message["segments"] == 0
+        finally:
+            connection.close()
+
+    def test_live_transcription_requires_token(self, api_url, health_check):
+        """Test that the live transcription WebSocket refuses unauthenticated clients."""
+        websocket = pytest.importorskip("websocket")
+
+        ws_url = api_url.replace("http", "ws", 1) + "/api/transcription/transcription/live"
+        with pytest.raises(websocket.WebSocketBadStatusException) as excinfo:
+            websocket.create_connection(ws_url, timeout=10)
+
+        if excinfo.value.status_code == 404:
+            pytest.skip("Live transcription endpoint not available")
+        assert excinfo.value.status_code == 403
@@ -0,0 +1,91 @@
+"""
+Tests for resumable uploads
+------------------------------------
+This module tests the resumable upload API: session creation,
+chunked transfer with offsets, status and finalization.
+"""
+
+import os
+import pytest
+import requests
+
+
+class TestUploads:
+    """Test class for resumable upload endpoints."""
+
+    @pytest.fixture(scope="function")
+    def upload_data(self):
+        """Content uploaded in two chunks."""
+        return os.urandom(64 * 1024)
+
+    @pytest.fixture(scope="function")
+    def upload_session(self, api_url, api_headers, upload_data):
+        """Create a resumable upload session and return its identifier."""
+        response = requests.post(
+            f"{api_url}/api/uploads",
+            headers=api_headers,
+            json={"filename": "test_audio.wav", "total_size": len(upload_data)}
+        )
+
+        # If endpoint doesn't exist, skip test
+        if response.status_code == 404:
+            pytest.skip("Resumable upload endpoint not available")
+
+        # If authentication is required but we don't have valid credentials
+        if response.status_code in [401, 403]:
+            pytest.skip("Authentication required for resumable uploads")
+
+        assert response.status_code == 200, f"Upload creation failed: {response.status_code}, {response.text}"
+        data = response.json()
+        assert data["offset"] == 0, "New upload should start at offset 0"
+        return data["upload_id"]
+
+    def test_resumable_upload(self, api_url, api_headers, upload_session, upload_data):
+        """Test uploading a file in two chunks and finalizing it."""
+        half = len(upload_data) // 2
+
+        response = requests.put(
+            f"{api_url}/api/uploads/{upload_session}",
+            headers=api_headers,
+            params={"offset": 0},
+            data=upload_data[:half]
+        )
+        assert response.status_code == 200, f"Chunk upload failed: {response.status_code}, {response.text}"
+
+        # The status gives the offset to resume from
+        response = requests.get(f"{api_url}/api/uploads/{upload_session}", headers=api_headers)
+        assert response.status_code == 200
+        assert response.json()["offset"] == half, "Unexpected received offset"
+
+        response = requests.put(
+            f"{api_url}/api/uploads/{upload_session}",
+            headers=api_headers,
+            params={"offset": half},
+            data=upload_data[half:]
+        )
+        assert response.status_code == 200, f"Chunk upload failed: {response.status_code}, {response.text}"
+        assert response.json()["complete"], "Upload should be complete"
+
+        response = requests.post(f"{api_url}/api/uploads/{upload_session}/finalize", headers=api_headers)
+        assert response.status_code == 200, f"Finalization failed: {response.status_code}, {response.text}"
+
+        data = response.json()
+        assert "file_id" in data, "No file_id in response"
+        assert data["size_bytes"] == len(upload_data), "Unexpected file size"
+
+    def test_chunk_offset_mismatch(self, api_url, api_headers, upload_session, upload_data):
+        """Test that a chunk sent at the wrong offset is rejected."""
+        response = requests.put(
+            f"{api_url}/api/uploads/{upload_session}",
+            headers=api_headers,
+            params={"offset": 1024},
+            data=upload_data[1024:2048]
+        )
+
+        assert response.status_code == 409, f"Unexpected status code: {response.status_code}, {response.text}"
+
+    def test_finalize_incomplete_upload(self, api_url, api_headers, upload_session):
+        """Test that an incomplete upload cannot be finalized."""
+        response = requests.post(f"{api_url}/api/uploads/{upload_session}/finalize", headers=api_headers)
+
+        assert response.status_code == 409, f"Unexpected status code: {response.status_code}, {response.text}"
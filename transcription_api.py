@@ -1,5 +1,5 @@
 from fastapi import APIRouter, File, UploadFile, BackgroundTasks, HTTPException, Depends, Form, Request, Query
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 from typing import Dict, List, Optional, Union, Any
 import os
 import uuid
@@ -12,6 +12,9 @@ from pathlib import Path
 
 # Import des fonctions de transcription
 from transcription_utils import process_monologue, process_multiple_speakers
+from utils.upload_storage import stream_upload_to_disk, get_file_hash
+from utils.file_responses import file_download_response, StreamingJSONResponse
+from config import video_config
 
 # Import des dépendances d'authentification
 from auth import validate_api_key, authorize_advanced_models
@@ -72,10 +75,8 @@ async def save_uploaded_video(file: UploadFile) -> str:
     filename = f"{uuid.uuid4().hex}{file_extension}"
     file_path = UPLOAD_DIR / filename
     
-    # Sauvegarder le fichier
-    async with aiofiles.open(file_path, "wb") as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    # Sauvegarder le fichier par blocs (hash et taille maximale vérifiés au fil de l'eau)
+    await stream_upload_to_disk(file, str(file_path), max_size_mb=video_config.get("max_upload_size_mb"))
     
     return str(file_path)
 
@@ -253,6 +254,7 @@ async def start_monologue_transcription(
         "status": "pending",
         "video_path": video_path,
         "filename": file.filename,
+        "content_hash": get_file_hash(video_path),
         "created_at": time.time(),
         "keep_video": keep_video,
         "model_size": model_size,
@@ -336,6 +338,7 @@ async def start_multispeaker_transcription(
         "status": "pending",
         "video_path": video_path,
         "filename": file.filename,
+        "content_hash": get_file_hash(video_path),
         "created_at": time.time(),
         "keep_video": keep_video,
         "model_size": model_size,
@@ -412,6 +415,7 @@ async def get_transcription_task_status(
         "message": task_info.get("message"),
         "progress": task_info.get("progress", 0),
         "filename": task_info.get("filename"),
+        "content_hash": task_info.get("content_hash"),
         "model_size": task_info.get("model_size"),
         "created_at": task_info.get("created_at"),
         "started_at": task_info.get("started_at"),
@@ -437,6 +441,10 @@ async def get_transcription_task_status(
         response["completed_at"] = task_info.get("completed_at")
         response["result_file"] = task_info.get("result_file")
         response["text_file"] = task_info.get("text_file")
+    
+    # Les résultats complets peuvent être volumineux : encodage JSON au fil de l'envoi
+    if task_info.get("status") == "completed":
+        return StreamingJSONResponse(response)
     return JSONResponse(response)
 
 @transcription_router.get("/tasks/{task_id}", tags=["video transcription"])
@@ -473,6 +481,7 @@ async def get_transcription_task_status(
         "message": task_info.get("message"),
         "progress": task_info.get("progress", 0),
         "filename": task_info.get("filename"),
+        "content_hash": task_info.get("content_hash"),
         "model_size": task_info.get("model_size"),
         "created_at": task_info.get("created_at"),
         "started_at": task_info.get("started_at"),
@@ -494,17 +503,21 @@ async def get_transcription_task_status(
 async def download_file(
     task_id: str, 
     file_type: str, 
+    request: Request,
     api_key_info = Depends(validate_api_key)
 ):
     """
     Permet de télécharger le fichier de transcription associé à une tâche.
     
+    Les requêtes Range (reprise, lecture partielle) et conditionnelles (ETag) sont prises en charge.
+    
     Args:
         task_id: Identifiant de la tâche.
         file_type: Type de fichier à télécharger ("text" ou "json").
+        request: La requête (en-têtes Range / If-None-Match).
         
     Returns:
-        Un FileResponse contenant le fichier demandé.
+        Le fichier demandé, entier ou la plage demandée.
     """
     if task_id not in transcription_tasks:
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
@@ -525,7 +538,7 @@ async def download_file(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
     
-    return FileResponse(file_path, filename=os.path.basename(file_path))
+    return file_download_response(file_path, request)
 
 
 @transcription_router.get("/tasks", tags=["video transcription"])
@@ -15,9 +15,10 @@ from .transcription_core import (
 )
 
 # Exposer des fonctions utilitaires spécifiques qui peuvent être utiles ailleurs
-from .audio_extraction import extract_audio, cleanup_audio_file
+from .audio_extraction import extract_audio, cleanup_audio_file, load_audio_array, cleanup_audio_array
 from .whisper_utils import cleanup_whisper_model
 from .diarization import format_diarized_transcription
+from .live_transcription import LiveTranscriber
 
 __all__ = [
     'process_monologue',
@@ -26,7 +27,10 @@ __all__ = [
     'get_available_models',
     'extract_audio',
     'cleanup_audio_file',
+    'load_audio_array',
+    'cleanup_audio_array',
     'cleanup_whisper_model',
     'format_diarized_transcription',
+    'LiveTranscriber',
     'analyze_transcript'  # Ajoutez également cette ligne
 ]
\ No newline at end of file
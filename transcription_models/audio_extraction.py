@@ -5,13 +5,22 @@ This module provides functions for audio extraction from video files.
 """
 
 import os
+import wave
+import shutil
 import logging
 import traceback
+import subprocess
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryFile
+import importlib.util
 from typing import Optional, Callable, Union
-from moviepy import AudioFileClip
-MOVIEPY_AVAILABLE = True
+
+import numpy as np
+
+# MoviePy is imported lazily on first extraction
+MOVIEPY_AVAILABLE = importlib.util.find_spec("moviepy") is not None
+# The ffmpeg binary decodes media straight to PCM samples
+FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
 # Logging configuration
 logger = logging.getLogger("transcription.audio_extraction")
 
@@ -21,6 +30,185 @@ logger = logging.getLogger("transcription.audio_extraction")
 AUDIO_TMP_DIR = Path("uploads/audio")
 AUDIO_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# Sample rate expected by Whisper and the speaker encoder
+SAMPLE_RATE = 16000
+
+# Size of the reads from the ffmpeg pipe
+PIPE_CHUNK_SIZE = 1024 * 1024
+
+def _ffmpeg_decode_command(media_path: str, output: str, sample_rate: int) -> list:
+    """ffmpeg command decoding the first audio stream of a media to mono float32 PCM"""
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-threads", "0",
+        "-i", media_path, "-vn", "-map", "0:a:0",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(sample_rate),
+        "-y", output
+    ]
+
+def _ffmpeg_error(stderr: bytes) -> str:
+    """Last lines of the ffmpeg error output (a corrupt stream can log one error per packet)"""
+    message = stderr[-4096:].decode(errors="replace").strip()
+    return message.split("\n", 1)[-1] if len(stderr) > 4096 else message or "ffmpeg failed"
+
+def load_audio_array(
+    media_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    use_mmap: Optional[bool] = None,
+    progress: Optional[Callable] = None
+) -> np.ndarray:
+    """
+    Decodes the audio of a media file once into a mono float32 buffer
+    
+    The media is decoded and resampled by ffmpeg, whose output is read from a pipe
+    (or, in memory-mapped mode, written to a raw file mapped copy-on-write), so no
+    intermediate WAV is written. The buffer can be passed to Whisper and to the
+    diarizer, which then do not decode the file again.
+    
+    Args:
+        media_path: Path to the audio or video file
+        sample_rate: Output sample rate (default: 16 kHz)
+        use_mmap: Map the samples from disk instead of holding them in memory
+                  (default: audio configuration)
+        progress: Progress tracking function (optional)
+        
+    Returns:
+        Mono float32 samples in [-1, 1] (np.memmap in memory-mapped mode,
+        to be released with cleanup_audio_array)
+        
+    Raises:
+        Exception: If ffmpeg is not available or the media cannot be decoded
+    """
+    if not FFMPEG_AVAILABLE:
+        raise Exception("ffmpeg is required to decode audio")
+    
+    if use_mmap is None:
+        from config import audio_config
+        use_mmap = audio_config.get("decode_mmap", False)
+    
+    if progress:
+        progress(0.1, desc="Decoding audio...")
+    
+    try:
+        if use_mmap:
+            raw_file = NamedTemporaryFile(delete=False, suffix=".f32", dir=AUDIO_TMP_DIR)
+            raw_path = raw_file.name
+            raw_file.close()
+            try:
+                completed = subprocess.run(
+                    _ffmpeg_decode_command(media_path, raw_path, sample_rate),
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+                )
+                if completed.returncode != 0:
+                    raise Exception(_ffmpeg_error(completed.stderr))
+                if os.path.getsize(raw_path) == 0:
+                    raise Exception("No audio stream in the media")
+                # Copy-on-write: pages are read from the file on demand and never written back
+                samples = np.memmap(raw_path, dtype=np.float32, mode="c")
+            except BaseException:
+                os.unlink(raw_path)
+                raise
+        else:
+            # Errors go to a file: a full stderr pipe would block ffmpeg while stdout is read
+            with TemporaryFile() as stderr_file:
+                process = subprocess.Popen(
+                    _ffmpeg_decode_command(media_path, "-", sample_rate),
+                    stdout=subprocess.PIPE, stderr=stderr_file
+                )
+                # One growing buffer, viewed as samples without a copy
+                buffer = bytearray()
+                try:
+                    for chunk in iter(lambda: process.stdout.read(PIPE_CHUNK_SIZE), b""):
+                        buffer += chunk
+                finally:
+                    process.stdout.close()
+                    process.wait()
+                
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+            
+            if process.returncode != 0:
+                raise Exception(_ffmpeg_error(stderr))
+            if not buffer:
+                raise Exception("No audio stream in the media")
+            samples = np.frombuffer(buffer, dtype=np.float32)
+        
+        if progress:
+            progress(0.3, desc="Audio decoding completed")
+        
+        logger.debug(f"Decoded {media_path}: {len(samples) / sample_rate:.1f}s at {sample_rate} Hz")
+        return samples
+        
+    except Exception as e:
+        error_msg = f"Error during audio decoding: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        raise Exception(error_msg)
+
+def write_temp_wav(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> str:
+    """
+    Writes decoded samples to a temporary 16-bit WAV, for backends that only accept a path
+    
+    Args:
+        samples: Mono float32 samples
+        sample_rate: Sample rate of the samples
+        
+    Returns:
+        Path to the WAV file (to be removed with cleanup_audio_file)
+    """
+    audio_file = NamedTemporaryFile(delete=False, suffix=".wav", dir=AUDIO_TMP_DIR)
+    audio_path = audio_file.name
+    audio_file.close()
+    
+    with wave.open(audio_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        # Converted block by block to bound the extra memory
+        block_size = sample_rate * 60
+        for start in range(0, len(samples), block_size):
+            block = np.clip(samples[start:start + block_size], -1.0, 1.0)
+            wav_file.writeframes((block * 32767).astype("<i2").tobytes())
+    
+    return audio_path
+
+def cleanup_audio_array(samples: Optional[np.ndarray]) -> bool:
+    """
+    Releases the file backing memory-mapped samples
+    
+    Args:
+        samples: Samples returned by load_audio_array
+        
+    Returns:
+        True if a backing file was deleted, False otherwise
+    """
+    if isinstance(samples, np.memmap) and samples.filename:
+        # The mapping stays valid until the array is garbage collected, the file name can go now
+        return cleanup_audio_file(str(samples.filename))
+    return False
+
+def get_audio_input(media_path: str, progress: Optional[Callable] = None) -> Union[np.ndarray, str]:
+    """
+    Gets the audio of a media in the form consumed by Whisper and the diarizer
+    
+    Args:
+        media_path: Path to the audio or video file
+        progress: Progress tracking function (optional)
+        
+    Returns:
+        Decoded 16 kHz mono samples, or the path to an extracted WAV when ffmpeg is not available
+    """
+    if FFMPEG_AVAILABLE:
+        return load_audio_array(media_path, progress=progress)
+    
+    logger.warning("ffmpeg not found, falling back to MoviePy audio extraction")
+    return extract_audio(media_path, progress=progress)
+
+def release_audio_input(audio: Union[np.ndarray, str, None]) -> bool:
+    """Releases the audio returned by get_audio_input (backing file or extracted WAV)"""
+    if isinstance(audio, np.ndarray):
+        return cleanup_audio_array(audio)
+    return cleanup_audio_file(audio)
+
 def extract_audio(
     video_path: str, 
     audio_path: Optional[str] = None, 
@@ -59,6 +247,7 @@ def extract_audio(
             audio_file.close()
         
         # Extract audio
+        from moviepy import AudioFileClip
         audio = AudioFileClip(video_path)
         audio.write_audiofile(audio_path, codec=codec, verbose=False, logger=None)
         
@@ -84,8 +273,8 @@ def cleanup_audio_file(audio_path: str) -> bool:
         True if the file was deleted, False otherwise
     """
     if audio_path and isinstance(audio_path, str) and os.path.exists(audio_path):
-        # Check if it's a temporary file in our directory
-        if audio_path.startswith(str(AUDIO_TMP_DIR)):
+        # Check if it's a temporary file in our directory (temporary file names may be absolute)
+        if Path(audio_path).resolve().is_relative_to(AUDIO_TMP_DIR.resolve()):
             try:
                 os.unlink(audio_path)
                 return True
@@ -110,6 +299,7 @@ def get_audio_duration(audio_path: str) -> float:
         raise ImportError("MoviePy is required to get audio duration")
     
     try:
+        from moviepy import AudioFileClip
         audio = AudioFileClip(audio_path)
         duration = audio.duration
         audio.close()
@@ -0,0 +1,337 @@
+"""
+Batched Whisper transcription engine
+----------------------------------------------------------
+This module transcribes short recordings of concurrent jobs together: each job
+is cut at silences into windows of at most 30 seconds, windows waiting from
+several jobs are decoded in one batched Whisper call, and the decoded segments
+are routed back to their job. Windows whose decoding Whisper's transcribe would
+retry (repetitive, improbable or cut short) are transcribed again on their own.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_extraction import SAMPLE_RATE
+from .vad import detect_speech_regions, plan_chunks
+
+# Logging configuration
+logger = logging.getLogger("transcription.batch_engine")
+
+# Whisper decodes fixed 30-second windows
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+# Duration of a timestamp token
+TIMESTAMP_SECONDS = 0.02
+
+# Thresholds of Whisper's transcribe: a decoding above the compression ratio or below
+# the log probability is retried, unless the window is silent (no-speech probability)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+class BatchTranscriptionJob:
+    """Windows of one recording and the segments decoded for them so far"""
+
+    def __init__(self, samples: np.ndarray, model_size: str, language: Optional[str]):
+        self.samples = samples
+        self.model_size = model_size
+        self.language = language
+        # Windows are cut at silences, so that no word straddles two of them; silences are not decoded
+        self.windows = plan_chunks(
+            samples, detect_speech_regions(samples), max_chunk_seconds=WINDOW_SAMPLES / SAMPLE_RATE
+        )
+        self.window_count = len(self.windows)
+        self.window_results: List[Optional[Dict[str, Any]]] = [None] * self.window_count
+        self.remaining = self.window_count
+        self.future: Future = Future()
+
+    def to_result(self) -> Dict[str, Any]:
+        """Assembles the Whisper-like result of the job once every window is decoded"""
+        segments = []
+        for window_result in self.window_results:
+            for segment in window_result["segments"]:
+                segment["id"] = len(segments)
+                segments.append(segment)
+
+        languages = [window_result["language"] for window_result in self.window_results if window_result["language"]]
+        return {
+            "text": "".join(window_result["text"] for window_result in self.window_results),
+            "segments": segments,
+            "language": self.language or (max(set(languages), key=languages.count) if languages else ""),
+            "duration": len(self.samples) / SAMPLE_RATE
+        }
+
+class BatchTranscriptionEngine:
+    """Queue of 30-second windows decoded in batches by a single scheduler thread"""
+
+    def __init__(self, batch_size: int = 16, max_wait_ms: float = 50):
+        """
+        Initializes the engine
+
+        Args:
+            batch_size: Maximum number of windows decoded in one call
+            max_wait_ms: How long a window waits for others to fill its batch
+        """
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._pending: "deque[Tuple[BatchTranscriptionJob, int]]" = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"jobs": 0, "windows": 0, "batches": 0, "retried_windows": 0}
+
+    def submit(self, samples: np.ndarray, model_size: str, language: Optional[str] = None) -> Future:
+        """
+        Queues a recording for batched transcription
+
+        Args:
+            samples: 16 kHz mono float32 samples
+            model_size: Size of the Whisper model to use
+            language: Language code, or None to detect it per window
+
+        Returns:
+            Future resolved with the Whisper-like result (text, segments, language, duration)
+        """
+        job = BatchTranscriptionJob(samples, model_size, language)
+        if job.window_count == 0:
+            job.future.set_result(job.to_result())
+            return job.future
+
+        with self._condition:
+            self._ensure_started()
+            for window_index in range(job.window_count):
+                self._pending.append((job, window_index))
+            self.stats["jobs"] += 1
+            self._condition.notify()
+
+        return job.future
+
+    def get_status(self) -> Dict[str, Any]:
+        """Gets the queue status"""
+        with self._condition:
+            return {
+                "pending_windows": len(self._pending),
+                "batch_size": self.batch_size,
+                **self.stats
+            }
+
+    def _ensure_started(self):
+        """Starts the scheduler thread on first use (condition must be held)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Scheduler loop: collects a batch of compatible windows and decodes it"""
+        while True:
+            batch = self._next_batch()
+            try:
+                self._decode_batch(batch)
+            except Exception as e:
+                logger.error(f"Batched transcription failed: {str(e)}")
+                failed_jobs = {id(job): job for job, _ in batch}
+                with self._condition:
+                    # The other windows of the failed jobs are not decoded
+                    self._pending = deque(item for item in self._pending if id(item[0]) not in failed_jobs)
+                for job in failed_jobs.values():
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+    def _next_batch(self) -> List[Tuple[BatchTranscriptionJob, int]]:
+        """Waits for windows, then gives the others a short delay to join the batch"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            # Windows of one batch share the model and the decoding options
+            first_job, _ = self._pending[0]
+            key = (first_job.model_size, first_job.language)
+            batch, kept = [], deque()
+            while self._pending:
+                item = self._pending.popleft()
+                if len(batch) < self.batch_size and (item[0].model_size, item[0].language) == key:
+                    batch.append(item)
+                else:
+                    kept.append(item)
+            self._pending = kept
+
+        return batch
+
+    def _decode_batch(self, batch: List[Tuple[BatchTranscriptionJob, int]]):
+        """Decodes a batch of windows in one Whisper call and routes the segments to their jobs"""
+        import torch
+        import whisper
+        from .whisper_utils import whisper_instance
+
+        job, _ = batch[0]
+        start = time.time()
+
+        with whisper_instance(job.model_size) as model:
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(self._window(item_job, window_index))),
+                    n_mels=model.dims.n_mels
+                )
+                for item_job, window_index in batch
+            ]).to(model.device)
+
+            options = whisper.DecodingOptions(
+                language=job.language,
+                fp16=model.device.type == "cuda"
+            )
+            results = whisper.decode(model, mel, options)
+
+            window_results = []
+            retried = 0
+            for (item_job, window_index), decoding_result in zip(batch, results):
+                offset = item_job.windows[window_index][0] / SAMPLE_RATE
+                window_seconds = len(self._window(item_job, window_index)) / SAMPLE_RATE
+                window_result = self._to_window_result(model, decoding_result, offset, window_seconds)
+                if window_result is None:
+                    window_result = self._transcribe_window(model, item_job, window_index, decoding_result.language)
+                    retried += 1
+                window_results.append(window_result)
+
+        self.stats["batches"] += 1
+        self.stats["windows"] += len(batch)
+        self.stats["retried_windows"] += retried
+        logger.debug(f"Decoded {len(batch)} windows in {time.time() - start:.2f}s ({retried} transcribed again)")
+
+        for (item_job, window_index), window_result in zip(batch, window_results):
+            item_job.window_results[window_index] = window_result
+            item_job.remaining -= 1
+            if item_job.remaining == 0 and not item_job.future.done():
+                item_job.future.set_result(item_job.to_result())
+
+    def _transcribe_window(self, model, job: BatchTranscriptionJob, window_index: int,
+                           detected_language: Optional[str]) -> Dict[str, Any]:
+        """Transcribes one window with Whisper's transcribe (temperature fallback, seeking, previous text)"""
+        start = job.windows[window_index][0]
+        result = model.transcribe(
+            self._window(job, window_index),
+            language=job.language or detected_language,
+            fp16=model.device.type == "cuda",
+            verbose=None
+        )
+
+        for segment in result["segments"]:
+            segment["start"] += start / SAMPLE_RATE
+            segment["end"] += start / SAMPLE_RATE
+            segment["seek"] = segment.get("seek", 0) + start // 160
+
+        return {"text": result["text"], "segments": result["segments"], "language": result.get("language")}
+
+    def _window(self, job: BatchTranscriptionJob, window_index: int) -> np.ndarray:
+        """Samples of one window of a job"""
+        start, end = job.windows[window_index]
+        return np.ascontiguousarray(job.samples[start:end], dtype=np.float32)
+
+    def _to_window_result(self, model, decoding_result, offset: float,
+                          window_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Splits the tokens of a decoded window into timestamped segments
+
+        Returns:
+            Window result, or None when Whisper's transcribe would not keep this decoding
+            (the window is then transcribed on its own)
+        """
+        from whisper.tokenizer import get_tokenizer
+
+        # Same rules as Whisper's transcribe: a silent window decodes to hallucinated text,
+        # a repetitive or improbable decoding is retried at a higher temperature
+        needs_fallback = (
+            decoding_result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or decoding_result.avg_logprob < LOGPROB_THRESHOLD
+        )
+        if decoding_result.no_speech_prob > NO_SPEECH_THRESHOLD:
+            if decoding_result.avg_logprob < LOGPROB_THRESHOLD:
+                return {"text": "", "segments": [], "language": decoding_result.language}
+            needs_fallback = False
+        if needs_fallback:
+            return None
+
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=decoding_result.language,
+            task="transcribe"
+        )
+
+        # A decoding that does not end on a closing timestamp stopped before the end of the
+        # window: transcribe seeks to its last timestamp and decodes the rest
+        tokens = list(decoding_result.tokens)
+        timestamps = [token for token in tokens if token >= tokenizer.timestamp_begin]
+        closed = len(tokens) >= 2 and tokens[-1] >= tokenizer.timestamp_begin and tokens[-2] < tokenizer.timestamp_begin
+        if timestamps and not closed:
+            last_timestamp = (timestamps[-1] - tokenizer.timestamp_begin) * TIMESTAMP_SECONDS
+            if tokens[-1] < tokenizer.timestamp_begin or last_timestamp < window_seconds - 1.0:
+                return None
+
+        segments = []
+        segment_start = 0.0
+        text_tokens: List[int] = []
+
+        def close_segment(segment_end: float):
+            text = tokenizer.decode(text_tokens)
+            if text.strip():
+                segments.append({
+                    "seek": int(offset * SAMPLE_RATE) // 160,
+                    "start": offset + segment_start,
+                    "end": offset + min(segment_end, window_seconds),
+                    "text": text,
+                    "tokens": list(text_tokens),
+                    "temperature": decoding_result.temperature,
+                    "avg_logprob": decoding_result.avg_logprob,
+                    "compression_ratio": decoding_result.compression_ratio,
+                    "no_speech_prob": decoding_result.no_speech_prob
+                })
+
+        for token in decoding_result.tokens:
+            if token >= tokenizer.timestamp_begin:
+                timestamp = (token - tokenizer.timestamp_begin) * TIMESTAMP_SECONDS
+                if text_tokens:
+                    close_segment(timestamp)
+                    text_tokens = []
+                segment_start = timestamp
+            else:
+                text_tokens.append(token)
+
+        # Without any timestamp, the text covers the whole window
+        if text_tokens:
+            close_segment(window_seconds)
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": decoding_result.language
+        }
+
+# Global instance, created on first use
+_batch_engine: Optional[BatchTranscriptionEngine] = None
+_batch_engine_lock = threading.Lock()
+
+def get_batch_engine() -> BatchTranscriptionEngine:
+    """Retrieves the batched transcription engine instance."""
+    global _batch_engine
+
+    with _batch_engine_lock:
+        if _batch_engine is None:
+            from config import model_config
+            _batch_engine = BatchTranscriptionEngine(
+                batch_size=model_config["whisper"].get("batch_size", 16),
+                max_wait_ms=model_config["whisper"].get("batch_max_wait_ms", 50)
+            )
+
+    return _batch_engine
@@ -0,0 +1,152 @@
+"""
+CTranslate2 transcription engine
+----------------------------------------------------------
+This module transcribes audio with faster-whisper, which runs the Whisper
+models converted to CTranslate2 with int8 weights and multi-threaded CPU
+decoding. It returns the same result shape as openai-whisper (text, segments,
+language), so that it can replace it behind transcribe_audio on CPU-only nodes.
+"""
+
+import logging
+import importlib.util
+from typing import Dict, Any, Optional, Callable, Union
+
+import numpy as np
+
+from .audio_extraction import SAMPLE_RATE
+
+# faster-whisper is imported lazily on first transcription
+logger = logging.getLogger("transcription.ct2_engine")
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+# Transcription engines accepted by transcribe_audio
+ENGINES = ("openai", "ctranslate2", "auto")
+
+# openai-whisper options understood by faster-whisper, with their faster-whisper name
+OPTION_NAMES = {
+    "language": "language",
+    "task": "task",
+    "temperature": "temperature",
+    "beam_size": "beam_size",
+    "best_of": "best_of",
+    "patience": "patience",
+    "length_penalty": "length_penalty",
+    "initial_prompt": "initial_prompt",
+    "condition_on_previous_text": "condition_on_previous_text",
+    "compression_ratio_threshold": "compression_ratio_threshold",
+    "logprob_threshold": "log_prob_threshold",
+    "no_speech_threshold": "no_speech_threshold",
+    "word_timestamps": "word_timestamps",
+    "prepend_punctuations": "prepend_punctuations",
+    "append_punctuations": "append_punctuations",
+    "suppress_tokens": "suppress_tokens",
+    "vad_filter": "vad_filter"
+}
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """
+    Resolves the transcription engine of a request
+
+    Args:
+        engine: Requested engine ('openai', 'ctranslate2' or 'auto'), or None for the configured one
+
+    Returns:
+        'openai' or 'ctranslate2'; 'auto' selects ctranslate2 on nodes without a GPU when it is installed
+
+    Raises:
+        ValueError: If the engine is unknown
+        ImportError: If ctranslate2 is requested but faster-whisper is not installed
+    """
+    if engine is None:
+        from config import model_config
+        engine = model_config["whisper"].get("engine", "openai")
+
+    engine = engine.lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown transcription engine '{engine}', use one of {list(ENGINES)}")
+
+    if engine == "auto":
+        from .whisper_utils import get_device
+        return "ctranslate2" if FASTER_WHISPER_AVAILABLE and get_device() == "cpu" else "openai"
+
+    if engine == "ctranslate2" and not FASTER_WHISPER_AVAILABLE:
+        raise ImportError("faster-whisper is required for the ctranslate2 transcription engine")
+
+    return engine
+
+def get_ct2_model(model_size: str) -> Any:
+    """
+    Retrieves the resident CTranslate2 model of a Whisper size
+
+    Args:
+        model_size: Size of the Whisper model
+
+    Returns:
+        faster_whisper.WhisperModel instance
+    """
+    from model_manager import ModelManager
+    return ModelManager.get_instance().get_model("faster_whisper", model_size)
+
+def transcribe_ct2(
+    audio: Union[str, np.ndarray],
+    model_size: str,
+    progress: Optional[Callable] = None,
+    **options
+) -> Dict[str, Any]:
+    """
+    Transcribes audio with the CTranslate2 engine
+
+    Args:
+        audio: Path to the audio file, or 16 kHz mono float32 samples already decoded
+        model_size: Size of the Whisper model
+        progress: Progress tracking function (optional)
+        options: openai-whisper transcription options (see OPTION_NAMES; fp16 and verbose are ignored)
+
+    Returns:
+        Dictionary with text, segments (openai-whisper fields), language and duration
+    """
+    ct2_options = {OPTION_NAMES[key]: value for key, value in options.items() if key in OPTION_NAMES and value is not None}
+    ignored = sorted(set(options) - set(OPTION_NAMES) - {"fp16", "verbose"})
+    if ignored:
+        logger.debug(f"Options not supported by the ctranslate2 engine: {', '.join(ignored)}")
+
+    # openai-whisper's transcribe decodes greedily by default, faster-whisper with a beam of 5
+    ct2_options.setdefault("beam_size", 1)
+
+    if isinstance(audio, np.ndarray):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+
+    model = get_ct2_model(model_size)
+    segment_iterator, info = model.transcribe(audio, **ct2_options)
+
+    # Segments are decoded lazily, while the iterator is consumed
+    segments = []
+    for segment in segment_iterator:
+        converted = {
+            "id": len(segments),
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob
+        }
+        if segment.words is not None:
+            converted["words"] = [
+                {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                for word in segment.words
+            ]
+        segments.append(converted)
+
+        if progress and info.duration:
+            progress(0.5 + 0.3 * min(segment.end / info.duration, 1.0), desc="Audio transcription in progress...")
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": info.language,
+        "duration": info.duration if info.duration else (len(audio) / SAMPLE_RATE if isinstance(audio, np.ndarray) else 0)
+    }
@@ -1,19 +1,160 @@
 import os
 import logging
 import traceback
-from typing import List, Dict, Tuple, Optional, Callable, Any
+from typing import List, Dict, Tuple, Optional, Callable, Any, Union
 
-from resemblyzer import VoiceEncoder, preprocess_wav
-from resemblyzer.hparams import sampling_rate
-from pydub import AudioSegment
 import numpy as np
-from sklearn.cluster import KMeans
+
+from .audio_extraction import SAMPLE_RATE, FFMPEG_AVAILABLE, load_audio_array
+from .vad import detect_speech_regions
+from .whisper_utils import format_time
+
+# resemblyzer and scikit-learn are imported lazily on first diarization
 
 # Logging configuration
 logger = logging.getLogger("transcription.diarization")
 
+# Partial utterances embedded per second of audio, and embedded per forward pass
+PARTIALS_PER_SECOND = 1.3
+EMBEDDING_BATCH_SIZE = 256
+
+# Share of its most similar embeddings each embedding stays connected to when estimating the speaker count
+AFFINITY_PRUNING = 0.1
+
+# Embeddings used to estimate the speaker count (evenly spread over the recording)
+MAX_ESTIMATION_EMBEDDINGS = 1000
+
+def get_voice_encoder() -> Any:
+    """Retrieves the resident speaker encoder (loaded once by the model manager)."""
+    from model_manager import ModelManager
+    return ModelManager.get_instance().get_model("voice_encoder", "resemblyzer")
+
+def _speech_before(positions: np.ndarray, regions: np.ndarray) -> np.ndarray:
+    """Number of speech samples before each position, for sorted non-overlapping (start, end) regions"""
+    if len(regions) == 0:
+        return np.zeros(len(positions))
+    lengths = regions[:, 1] - regions[:, 0]
+    completed = np.concatenate(([0], np.cumsum(lengths)))
+    index = np.searchsorted(regions[:, 0], positions, side="right") - 1
+    inside = np.clip(positions - regions[np.maximum(index, 0), 0], 0, lengths[np.maximum(index, 0)])
+    return np.where(index >= 0, completed[np.maximum(index, 0)] + inside, 0)
+
+def _embed_partials(encoder: Any, wav: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Embeds the partial utterances of a recording that contain speech
+
+    The mel spectrogram is computed once for the whole recording; the partials
+    are gathered from it with one indexing operation and embedded in batches.
+    Partials mostly made of silence are neither embedded nor clustered.
+
+    Args:
+        encoder: Resident VoiceEncoder
+        wav: 16 kHz mono samples, volume-normalized
+
+    Returns:
+        Tuple (embeddings, start times, end times) of the speech partials
+    """
+    import torch
+    from resemblyzer import audio as resemblyzer_audio
+    from resemblyzer.hparams import partials_n_frames
+
+    wav_slices, mel_slices = encoder.compute_partial_slices(len(wav), rate=PARTIALS_PER_SECOND, min_coverage=0.75)
+    if wav_slices[-1].stop >= len(wav):
+        wav = np.pad(wav, (0, wav_slices[-1].stop - len(wav)), "constant")
+
+    wav_starts = np.array([wav_slice.start for wav_slice in wav_slices])
+    wav_stops = np.array([wav_slice.stop for wav_slice in wav_slices])
+    mel_starts = np.array([mel_slice.start for mel_slice in mel_slices])
+
+    # Share of speech of each partial
+    regions = np.array(detect_speech_regions(wav), dtype=np.int64).reshape(-1, 2)
+    coverage = (_speech_before(wav_stops, regions) - _speech_before(wav_starts, regions)) / (wav_stops - wav_starts)
+    kept = np.flatnonzero(coverage >= 0.5)
+
+    if len(kept) == 0:
+        return np.zeros((0, 256), dtype=np.float32), np.zeros(0), np.zeros(0)
+
+    mel = resemblyzer_audio.wav_to_mel_spectrogram(wav)
+    frame_offsets = np.arange(partials_n_frames)
+
+    embeddings = []
+    with torch.no_grad():
+        for first in range(0, len(kept), EMBEDDING_BATCH_SIZE):
+            batch_starts = mel_starts[kept[first:first + EMBEDDING_BATCH_SIZE]]
+            mels = torch.from_numpy(mel[batch_starts[:, None] + frame_offsets]).to(encoder.device)
+            embeddings.append(encoder(mels).cpu().numpy())
+
+    return (
+        np.concatenate(embeddings),
+        wav_starts[kept] / SAMPLE_RATE,
+        wav_stops[kept] / SAMPLE_RATE
+    )
+
+def estimate_speaker_count(
+    embeddings: np.ndarray,
+    min_speakers: int = 1,
+    max_speakers: int = 10
+) -> int:
+    """
+    Estimates the number of speakers from the eigengap of the embedding affinity
+
+    Each embedding is connected to its most similar ones only, so that each
+    speaker forms a nearly separate component of the affinity graph; the
+    number of near-zero eigenvalues of its Laplacian, found at the largest gap
+    between consecutive eigenvalues, is the number of speakers.
+
+    Args:
+        embeddings: L2-normalized partial embeddings
+        min_speakers: Smallest count returned
+        max_speakers: Largest count returned
+
+    Returns:
+        Estimated number of speakers
+    """
+    if len(embeddings) > MAX_ESTIMATION_EMBEDDINGS:
+        embeddings = embeddings[np.linspace(0, len(embeddings) - 1, MAX_ESTIMATION_EMBEDDINGS).astype(int)]
+
+    count = len(embeddings)
+    max_speakers = min(max_speakers, count - 1)
+    if max_speakers <= min_speakers:
+        return max(1, min(min_speakers, count))
+
+    similarity = embeddings @ embeddings.T
+    neighbors = max(2, int(np.ceil(AFFINITY_PRUNING * count)))
+    thresholds = np.partition(similarity, count - neighbors, axis=1)[:, count - neighbors]
+    affinity = np.where(similarity >= thresholds[:, None], similarity, 0.0)
+    affinity = (affinity + affinity.T) / 2
+    np.fill_diagonal(affinity, 0.0)
+
+    laplacian = np.diag(affinity.sum(axis=1)) - affinity
+    eigenvalues = np.linalg.eigvalsh(laplacian)[:max_speakers + 1]
+    gaps = np.diff(eigenvalues)
+
+    return int(np.argmax(gaps[min_speakers - 1:max_speakers])) + min_speakers
+
+def _speaker_turns(labels: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> List[Tuple[float, float, str]]:
+    """
+    Merges the labelled partials into speaker turns
+
+    Consecutive partials overlap: each one owns the time up to the midpoint with
+    its neighbours, and a turn ends where the label changes or at a silence.
+    """
+    centers = (starts + ends) / 2
+    midpoints = (centers[:-1] + centers[1:]) / 2
+    owned_starts = np.maximum(starts, np.concatenate(([-np.inf], midpoints)))
+    owned_ends = np.minimum(ends, np.concatenate((midpoints, [np.inf])))
+
+    breaks = np.flatnonzero((labels[1:] != labels[:-1]) | (owned_starts[1:] > owned_ends[:-1]))
+    firsts = np.concatenate(([0], breaks + 1))
+    lasts = np.concatenate((breaks, [len(labels) - 1]))
+
+    return [
+        (round(float(owned_starts[first]), 3), round(float(owned_ends[last]), 3), f"Speaker_{labels[first]}")
+        for first, last in zip(firsts, lasts)
+    ]
+
 def diarize_audio(
-    audio_path: str,
+    audio_path: Union[str, np.ndarray],
     progress: Optional[Callable] = None,
     num_speakers: Optional[int] = None
 ) -> List[Tuple[float, float, str]]:
@@ -21,46 +162,220 @@ def diarize_audio(
     Simple speaker diarization using speaker embeddings and clustering.
 
     Args:
-        audio_path: Path to the audio file
+        audio_path: Path to the audio file, or 16 kHz mono float32 samples already decoded
         progress: Progress callback (optional)
-        num_speakers: Expected number of speakers. If None, estimated (WIP)
+        num_speakers: Expected number of speakers. If None, estimated from the embeddings
 
     Returns:
         List of segments (start_time, end_time, speaker_label)
     """
     try:
+        from resemblyzer.audio import normalize_volume
+        from resemblyzer.hparams import audio_norm_target_dBFS
+        from sklearn.cluster import KMeans
+        from config import model_config
+        
         if progress:
             progress(0.2, desc="Loading and preprocessing audio...")
 
-        wav = preprocess_wav(audio_path)
+        if isinstance(audio_path, np.ndarray):
+            samples = audio_path
+        elif FFMPEG_AVAILABLE:
+            samples = load_audio_array(audio_path, use_mmap=False)
+        else:
+            import librosa
+            samples, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+
+        # Silences are not trimmed (unlike preprocess_wav): the turns stay on the timeline of the audio
+        wav = normalize_volume(np.asarray(samples, dtype=np.float32), audio_norm_target_dBFS, increase_only=True)
 
         if progress:
             progress(0.4, desc="Generating embeddings...")
 
-        encoder = VoiceEncoder()
-        _, cont_embeds, wav_splits = encoder.embed_utterance(wav, return_partials=True)
+        embeddings, starts, ends = _embed_partials(get_voice_encoder(), wav)
+        if len(embeddings) == 0:
+            return []
 
         if progress:
             progress(0.6, desc="Clustering voices...")
 
-        X = np.array(cont_embeds)
+        diarization_config = model_config["diarization"]
         if num_speakers is None:
-            num_speakers = 2  # default, or use heuristic
+            num_speakers = estimate_speaker_count(
+                embeddings,
+                min_speakers=max(1, diarization_config.get("min_speakers", 1)),
+                max_speakers=diarization_config.get("max_speakers", 10)
+            )
+            logger.info(f"Estimated {num_speakers} speakers")
+        num_speakers = max(1, min(num_speakers, len(embeddings)))
 
-        kmeans = KMeans(n_clusters=num_speakers, random_state=0)
-        labels = kmeans.fit_predict(X)
+        if num_speakers == 1:
+            labels = np.zeros(len(embeddings), dtype=int)
+        else:
+            labels = KMeans(n_clusters=num_speakers, n_init=10, random_state=0).fit_predict(embeddings)
 
         if progress:
             progress(0.8, desc="Building diarization result...")
 
-        speaker_segments = []
-        for (s, e), label in zip(wav_splits, labels):
-            speaker_segments.append((s, e, f"Speaker_{label}"))
-
-        return speaker_segments
+        return _speaker_turns(labels, starts, ends)
 
     except Exception as e:
         error_msg = f"Error during diarization: {str(e)}"
         logger.error(error_msg)
         logger.error(traceback.format_exc())
         raise Exception(error_msg)
+
+def _dominant_speakers(
+    intervals: List[Tuple[float, float]],
+    diarization: List[Tuple[float, float, str]]
+) -> List[Optional[str]]:
+    """
+    Finds the speaker talking the longest during each interval
+
+    Intervals and turns are both swept in start order, so each interval is only
+    compared with the turns still open when it starts instead of every turn.
+    Overlaps are summed in the order of the diarization list, so that ties and
+    rounding are the same as comparing every interval with every turn.
+
+    Args:
+        intervals: (start, end) of the segments or words
+        diarization: Speaker turns (start, end, speaker)
+
+    Returns:
+        Speaker of each interval, or None when no turn overlaps it
+    """
+    turn_order = sorted(range(len(diarization)), key=lambda index: diarization[index][0])
+    interval_order = sorted(range(len(intervals)), key=lambda index: intervals[index][0])
+
+    speakers: List[Optional[str]] = [None] * len(intervals)
+    active: List[int] = []
+    next_turn = 0
+
+    for interval_index in interval_order:
+        start, end = intervals[interval_index]
+
+        # Open the turns starting before the end of the interval
+        while next_turn < len(turn_order) and diarization[turn_order[next_turn]][0] < end:
+            active.append(turn_order[next_turn])
+            next_turn += 1
+
+        # Turns ended before this interval cannot overlap the next ones either
+        active = [turn_index for turn_index in active if diarization[turn_index][1] > start]
+
+        speaker_times: Dict[str, float] = {}
+        for turn_index in sorted(active):
+            d_start, d_end, d_speaker = diarization[turn_index]
+            overlap_start = max(d_start, start)
+            overlap_end = min(d_end, end)
+            if overlap_start < overlap_end:
+                speaker_times[d_speaker] = speaker_times.get(d_speaker, 0) + (overlap_end - overlap_start)
+
+        if speaker_times:
+            speakers[interval_index] = max(speaker_times, key=speaker_times.get)
+
+    return speakers
+
+def assign_speakers(
+    transcription: Dict[str, Any],
+    diarization: List[Tuple[float, float, str]],
+    word_level: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Associates the identified speakers with the transcription segments
+
+    Args:
+        transcription: Whisper transcription result
+        diarization: Speaker turns (start, end, speaker)
+        word_level: Assign each word (transcription made with word_timestamps)
+            and split the segments where the speaker changes
+
+    Returns:
+        List of segments with start, end, speaker and text
+    """
+    segments = transcription["segments"]
+
+    if word_level and any(segment.get("words") for segment in segments):
+        return _assign_speakers_to_words(segments, diarization)
+
+    speakers = _dominant_speakers([(segment["start"], segment["end"]) for segment in segments], diarization)
+
+    return [
+        {
+            "start": segment["start"],
+            "end": segment["end"],
+            "speaker": speaker or "Unknown",
+            "text": segment["text"]
+        }
+        for segment, speaker in zip(segments, speakers)
+    ]
+
+def _assign_speakers_to_words(
+    segments: List[Dict[str, Any]],
+    diarization: List[Tuple[float, float, str]]
+) -> List[Dict[str, Any]]:
+    """Assigns a speaker to each word and groups the consecutive words of a speaker"""
+    segment_speakers = _dominant_speakers([(segment["start"], segment["end"]) for segment in segments], diarization)
+    words = [(segment_index, word) for segment_index, segment in enumerate(segments) for word in segment.get("words", [])]
+    word_speakers = _dominant_speakers([(word["start"], word["end"]) for _, word in words], diarization)
+
+    words_by_segment: Dict[int, List[Tuple[Dict[str, Any], Optional[str]]]] = {}
+    for (segment_index, word), speaker in zip(words, word_speakers):
+        words_by_segment.setdefault(segment_index, []).append((word, speaker))
+
+    final_transcription = []
+    for segment_index, segment in enumerate(segments):
+        segment_speaker = segment_speakers[segment_index] or "Unknown"
+        segment_words = words_by_segment.get(segment_index)
+
+        if not segment_words:
+            final_transcription.append({
+                "start": segment["start"],
+                "end": segment["end"],
+                "speaker": segment_speaker,
+                "text": segment["text"]
+            })
+            continue
+
+        # A segment may only be split between words: it is never cut inside a sentence
+        # of a speaker, and words outside every turn keep the speaker of their segment
+        current = None
+        for word, speaker in segment_words:
+            speaker = speaker or segment_speaker
+            if current is None or current["speaker"] != speaker:
+                current = {"start": word["start"], "end": word["end"], "speaker": speaker, "text": "", "words": []}
+                final_transcription.append(current)
+            current["end"] = word["end"]
+            current["text"] += word["word"]
+            current["words"].append({"start": word["start"], "end": word["end"], "word": word["word"]})
+
+    return final_transcription
+
+def format_diarized_transcription(
+    segments: List[Dict[str, Any]],
+    include_timestamps: bool = True
+) -> str:
+    """
+    Formats the segments with speakers into readable text
+
+    Args:
+        segments: Segments with start, end, speaker and text (see assign_speakers)
+        include_timestamps: One timestamped line per segment; otherwise one line
+            per speaker turn, consecutive segments of a speaker being merged
+
+    Returns:
+        Formatted text
+    """
+    if include_timestamps:
+        return "\n".join(
+            f"[{format_time(segment['start'])}-{format_time(segment['end'])}] {segment['speaker']}: {segment['text'].strip()}"
+            for segment in segments
+        )
+
+    turns: List[List[str]] = []
+    for segment in segments:
+        if turns and turns[-1][0] == segment["speaker"]:
+            turns[-1][1] += " " + segment["text"].strip()
+        else:
+            turns.append([segment["speaker"], segment["text"].strip()])
+
+    return "\n".join(f"{speaker}: {text}" for speaker, text in turns)
@@ -0,0 +1,231 @@
+"""
+Live transcription module
+----------------------------------------------------------
+This module transcribes an audio stream incrementally: received frames are
+appended to a rolling buffer, the buffer is decoded again as audio arrives,
+and segments are finalized (and dropped from the buffer) once two successive
+decodings agree on them. The last, still changing, segments are reported as
+partial results.
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .audio_extraction import SAMPLE_RATE
+from .vad import detect_speech_regions
+
+# Logging configuration
+logger = logging.getLogger("transcription.live")
+
+# Supported encodings of the received frames
+FRAME_DTYPES = {"pcm_s16le": "<i2", "pcm_f32le": "<f4"}
+
+def _normalize(text: str) -> str:
+    """Text compared between two decodings (case and punctuation may still change)"""
+    return re.sub(r"[^\w\s]", "", text).strip().lower()
+
+class LiveTranscriber:
+    """Rolling-buffer transcription state of one audio stream"""
+
+    def __init__(
+        self,
+        model_size: Optional[str] = None,
+        language: Optional[str] = None,
+        sample_rate: int = SAMPLE_RATE,
+        encoding: str = "pcm_s16le",
+        step_seconds: float = 1.0,
+        max_buffer_seconds: float = 25.0,
+        stability_margin_seconds: float = 1.0
+    ):
+        """
+        Initializes the stream state
+
+        Args:
+            model_size: Size of the Whisper model to use
+            language: Language code, or None to detect it on the first decoding
+            sample_rate: Sample rate of the received frames
+            encoding: Encoding of the received frames ('pcm_s16le' or 'pcm_f32le', mono)
+            step_seconds: Audio received between two decodings
+            max_buffer_seconds: Segments are finalized anyway when the buffer grows longer
+            stability_margin_seconds: Segments ending this close to the end of the buffer stay partial
+
+        Raises:
+            ValueError: If the encoding or the sample rate is not supported
+        """
+        if encoding not in FRAME_DTYPES:
+            raise ValueError(f"Unsupported encoding '{encoding}', use one of {list(FRAME_DTYPES)}")
+        if not 8000 <= sample_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate {sample_rate}")
+
+        self.model_size = model_size
+        self.language = language
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(FRAME_DTYPES[encoding])
+        self.step_samples = int(step_seconds * SAMPLE_RATE)
+        self.max_buffer_samples = int(max_buffer_seconds * SAMPLE_RATE)
+        self.stability_margin = stability_margin_seconds
+
+        self._chunks: List[np.ndarray] = []
+        self._remainder = b""
+        self._unprocessed = 0
+        # Position of the buffer in the stream, in seconds
+        self.buffer_start = 0.0
+        self._previous_segments: List[Dict[str, Any]] = []
+        self._finalized_text = ""
+        self.finalized_count = 0
+
+    def add_audio(self, frame: bytes):
+        """
+        Appends a received frame to the buffer, resampled to 16 kHz
+
+        Args:
+            frame: Raw PCM bytes (a frame may end in the middle of a sample)
+        """
+        data = self._remainder + frame
+        usable = len(data) - len(data) % self.dtype.itemsize
+        self._remainder = data[usable:]
+        if not usable:
+            return
+
+        samples = np.frombuffer(data[:usable], dtype=self.dtype).astype(np.float32)
+        if self.dtype.kind == "i":
+            samples /= 32768.0
+
+        if self.sample_rate != SAMPLE_RATE:
+            target_length = int(round(len(samples) * SAMPLE_RATE / self.sample_rate))
+            samples = np.interp(
+                np.linspace(0, len(samples) - 1, target_length), np.arange(len(samples)), samples
+            ).astype(np.float32)
+
+        self._chunks.append(samples)
+        self._unprocessed += len(samples)
+
+    def ready(self) -> bool:
+        """Whether enough audio arrived since the last decoding"""
+        return self._unprocessed >= self.step_samples
+
+    def snapshot(self) -> np.ndarray:
+        """Current buffer, decoded while new frames keep arriving"""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        self._unprocessed = 0
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def decode(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Transcribes a buffer snapshot with the resident Whisper model
+
+        Args:
+            samples: Buffer snapshot (see snapshot)
+
+        Returns:
+            Segments relative to the start of the buffer
+        """
+        from .whisper_utils import get_device, whisper_instance
+
+        # Nothing but silence: no decoding, the buffer is dropped by the caller
+        if not detect_speech_regions(samples):
+            return []
+
+        options = {
+            "fp16": get_device() == "cuda",
+            "verbose": None,
+            "temperature": 0.0,
+            "condition_on_previous_text": False,
+            # The end of the finalized text gives the context the buffer no longer has
+            "initial_prompt": self._finalized_text[-200:] or None
+        }
+        if self.language:
+            options["language"] = self.language
+
+        with whisper_instance(self.model_size) as model:
+            result = model.transcribe(samples, **options)
+
+        if not self.language and result.get("language"):
+            self.language = result["language"]
+
+        return [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+            for segment in result["segments"] if segment["text"].strip()
+        ]
+
+    def update(self, segments: List[Dict[str, Any]], buffer_length: int, final: bool = False) -> List[Dict[str, Any]]:
+        """
+        Finalizes the stable segments of a decoding and reports the others as partial
+
+        Args:
+            segments: Segments of the decoded snapshot
+            buffer_length: Number of samples of the decoded snapshot
+            final: End of the stream: every segment is finalized
+
+        Returns:
+            Events to send: 'final' segments then one 'partial' with the unstable text
+        """
+        buffer_seconds = buffer_length / SAMPLE_RATE
+        events = []
+
+        stable_count = 0
+        if final:
+            stable_count = len(segments)
+        else:
+            previous_texts = [_normalize(segment["text"]) for segment in self._previous_segments]
+            for index, segment in enumerate(segments[:-1]):
+                if segment["end"] > buffer_seconds - self.stability_margin:
+                    break
+                if index >= len(previous_texts) or _normalize(segment["text"]) != previous_texts[index]:
+                    break
+                stable_count += 1
+
+            # A buffer close to Whisper's 30 s window is finalized up to its last segment
+            if buffer_length >= self.max_buffer_samples:
+                stable_count = max(stable_count, len(segments) - 1 if len(segments) > 1 else len(segments))
+
+        for segment in segments[:stable_count]:
+            events.append({
+                "type": "final",
+                "id": self.finalized_count,
+                "start": round(self.buffer_start + segment["start"], 2),
+                "end": round(self.buffer_start + segment["end"], 2),
+                "text": segment["text"].strip()
+            })
+            self.finalized_count += 1
+            self._finalized_text += segment["text"]
+
+        # Finalized audio leaves the buffer
+        if final:
+            consumed = buffer_length
+        elif stable_count:
+            consumed = min(int(segments[stable_count - 1]["end"] * SAMPLE_RATE), buffer_length)
+        elif not segments and buffer_length >= self.step_samples:
+            # Silence or no text: keep only the last step, where speech may be starting
+            consumed = buffer_length - self.step_samples
+        else:
+            consumed = 0
+        self._consume(consumed)
+
+        remaining = segments[stable_count:]
+        self._previous_segments = [
+            {**segment, "start": segment["start"] - consumed / SAMPLE_RATE, "end": segment["end"] - consumed / SAMPLE_RATE}
+            for segment in remaining
+        ]
+
+        if remaining and not final:
+            events.append({
+                "type": "partial",
+                "start": round(self.buffer_start + self._previous_segments[0]["start"], 2),
+                "end": round(self.buffer_start + self._previous_segments[-1]["end"], 2),
+                "text": "".join(segment["text"] for segment in remaining).strip()
+            })
+
+        return events
+
+    def _consume(self, sample_count: int):
+        """Drops the first samples of the buffer"""
+        if sample_count <= 0:
+            return
+        buffer = np.concatenate(self._chunks) if len(self._chunks) > 1 else self._chunks[0]
+        self._chunks = [buffer[sample_count:]]
+        self.buffer_start += sample_count / SAMPLE_RATE
@@ -0,0 +1,218 @@
+"""
+Transcription result cache
+----------------------------------------------------------
+This module stores Whisper outputs on disk, keyed by a fingerprint of the
+decoded audio, the model size and the decoding options, so that the same
+audio transcribed again (re-uploaded, retried, or analyzed differently) does
+not run Whisper. The least recently used results are evicted when the cache
+exceeds its size limit.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+import numpy as np
+
+# Logging configuration
+logger = logging.getLogger("transcription.result_cache")
+
+# Size of the reads when fingerprinting an audio file that was not decoded
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _json_default(value: Any) -> Any:
+    """Encodes the numpy values Whisper may leave in its results"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+def audio_fingerprint(audio: Union[str, np.ndarray]) -> str:
+    """
+    Fingerprints audio by its content
+
+    Args:
+        audio: Decoded samples, or path to an audio file
+
+    Returns:
+        Hex digest of the samples (or of the file bytes)
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(audio, np.ndarray):
+        digest.update(b"samples:")
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).view(np.uint8))
+    else:
+        digest.update(b"file:")
+        with open(audio, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+class TranscriptionCache:
+    """Disk cache of Whisper results with least-recently-used eviction"""
+
+    def __init__(self, cache_dir: str = "cache/transcriptions", max_size_mb: float = 512, enabled: bool = True):
+        """
+        Initializes the cache
+
+        Args:
+            cache_dir: Directory of the cached results
+            max_size_mb: Total size above which the least recently used results are deleted
+            enabled: Whether results are cached
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # Cached entries (key -> size in bytes), least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_entries()
+
+    def make_key(self, audio: Union[str, np.ndarray], model_size: str, options: Dict[str, Any]) -> str:
+        """
+        Builds the cache key of a transcription
+
+        Args:
+            audio: Decoded samples, or path to an audio file
+            model_size: Size of the Whisper model
+            options: Decoding options that change the result (language, word timestamps...)
+
+        Returns:
+            Cache key
+        """
+        params = json.dumps({"model_size": model_size, **options}, sort_keys=True, default=str)
+        params_key = hashlib.sha256(params.encode()).hexdigest()[:16]
+        return f"{audio_fingerprint(audio)}_{params_key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Gets a cached result and marks it as recently used
+
+        Args:
+            key: Cache key (see make_key)
+
+        Returns:
+            Whisper result, or None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)["result"]
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["hits"] += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            # The modification time orders the entries again after a restart
+            os.utime(path)
+        except OSError:
+            pass
+
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """
+        Stores a result, evicting the least recently used ones beyond the size limit
+
+        Args:
+            key: Cache key (see make_key)
+            result: Whisper result (text, segments, language...)
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "result": result}, f, default=_json_default)
+            size = temp_path.stat().st_size
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Unable to cache transcription {key[:12]}: {str(e)}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._total_size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stats["stored"] += 1
+            self._evict()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets cache statistics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_mb": round(self._total_size / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+                **self.stats
+            }
+
+    def _evict(self):
+        """Deletes the least recently used results until the cache fits (lock must be held)"""
+        while self._total_size > self.max_size_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_size -= size
+            self._path(key).unlink(missing_ok=True)
+            self.stats["evicted"] += 1
+
+    def _load_entries(self):
+        """Indexes the results kept from previous runs, oldest use first"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_size += size
+
+        with self._lock:
+            self._evict()
+
+    def _path(self, key: str) -> Path:
+        """Path of a cached result"""
+        return self.cache_dir / f"{key}.json"
+
+# Global instance, created on first use
+_transcription_cache: Optional[TranscriptionCache] = None
+_transcription_cache_lock = threading.Lock()
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Retrieves the transcription result cache instance."""
+    global _transcription_cache
+
+    with _transcription_cache_lock:
+        if _transcription_cache is None:
+            from config import model_config
+            whisper_config = model_config["whisper"]
+            _transcription_cache = TranscriptionCache(
+                cache_dir=whisper_config.get("result_cache_dir", "cache/transcriptions"),
+                max_size_mb=whisper_config.get("result_cache_max_mb", 512),
+                enabled=whisper_config.get("result_cache_enabled", True)
+            )
+
+    return _transcription_cache
@@ -9,14 +9,16 @@ import os
 import json
 import logging
 import time
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Callable, Tuple, Union
 from tempfile import NamedTemporaryFile
 
 # Import specialized modules
-from .audio_extraction import extract_audio, cleanup_audio_file
-from .whisper_utils import transcribe_audio, format_whisper_result, cleanup_whisper_model
+from .audio_extraction import get_audio_input, release_audio_input
+from .whisper_utils import transcribe_audio, format_whisper_result
 from .diarization import diarize_audio, assign_speakers, format_diarized_transcription
 
 # Logging configuration
@@ -26,11 +28,30 @@ logger = logging.getLogger("transcription.core")
 RESULTS_DIR = Path("results/transcriptions")
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Executor running diarizations while the transcription runs (created on first use)
+_diarization_executor: Optional[ThreadPoolExecutor] = None
+_diarization_executor_lock = threading.Lock()
+
+def get_diarization_executor() -> ThreadPoolExecutor:
+    """Retrieves the executor running diarizations concurrently with transcriptions."""
+    global _diarization_executor
+    
+    with _diarization_executor_lock:
+        if _diarization_executor is None:
+            from config import model_config
+            _diarization_executor = ThreadPoolExecutor(
+                max_workers=max(1, model_config["diarization"].get("workers", 1)),
+                thread_name_prefix="diarization"
+            )
+    
+    return _diarization_executor
+
 def process_monologue(
     video_path: str, 
     output_txt: Optional[str] = None, 
     model_size: Optional[str] = None, 
-    progress: Optional[Callable] = None
+    progress: Optional[Callable] = None,
+    engine: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Transcribes a video in monologue mode (without speaker identification)
@@ -40,6 +61,7 @@ def process_monologue(
         output_txt: Output path for the text file (optional)
         model_size: Size of the Whisper model to use
         progress: Progress tracking function (optional)
+        engine: Transcription engine ('openai', 'ctranslate2' or 'auto'; configured one by default)
         
     Returns:
         Dictionary containing the complete transcription and segments
@@ -48,18 +70,17 @@ def process_monologue(
         Exception: If an error occurs during processing
     """
     try:
-        # Extract audio
+        # Decode the audio once, for every model that needs it
         if progress:
             progress(0.1, desc="Extracting audio...")
         
-        audio_path = extract_audio(video_path, progress=progress)
-        audio_extracted = True
+        audio = get_audio_input(video_path, progress=progress)
         
         # Transcribe audio
         if progress:
             progress(0.3, desc="Transcription in progress...")
         
-        result = transcribe_audio(audio_path, model_size, progress=progress)
+        result = transcribe_audio(audio, model_size, progress=progress, engine=engine)
         
         # Save transcription if requested
         if output_txt:
@@ -74,8 +95,7 @@ def process_monologue(
         if progress:
             progress(1.0, desc="Transcription completed")
         
-        if audio_extracted:
-            cleanup_audio_file(audio_path)
+        release_audio_input(audio)
         
         # Unified output format
         return {
@@ -91,8 +111,8 @@ def process_monologue(
         logger.error(traceback.format_exc())
         
         # Cleanup in case of error
-        if 'audio_path' in locals() and 'audio_extracted' in locals() and audio_extracted:
-            cleanup_audio_file(audio_path)
+        if 'audio' in locals():
+            release_audio_input(audio)
         
         raise Exception(error_msg)
 
@@ -100,8 +120,9 @@ def process_multiple_speakers(
     video_path: str, 
     output_txt: Optional[str] = None, 
     model_size: Optional[str] = None, 
-    huggingface_token: Optional[str] = None, 
-    progress: Optional[Callable] = None
+    progress: Optional[Callable] = None,
+    word_level: bool = False,
+    engine: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Transcribes a video with speaker identification
@@ -110,8 +131,9 @@ def process_multiple_speakers(
         video_path: Path to the video file
         output_txt: Output path for the text file (optional)
         model_size: Size of the Whisper model to use
-        huggingface_token: Hugging Face token for access to the diarization model
         progress: Progress tracking function (optional)
+        word_level: Assign speakers word by word, splitting segments at speaker changes
+        engine: Transcription engine ('openai', 'ctranslate2' or 'auto'; configured one by default)
         
     Returns:
         Dictionary containing the transcription with speaker identification
@@ -120,27 +142,40 @@ def process_multiple_speakers(
         Exception: If an error occurs during processing
     """
     try:
-        # Extract audio
+        # Decode the audio once, for every model that needs it
         if progress:
             progress(0.1, desc="Extracting audio...")
         
-        audio_path = extract_audio(video_path, progress=progress)
-        audio_extracted = True
+        audio = get_audio_input(video_path, progress=progress)
+        
+        # Diarization does not depend on the transcription: it runs on the same
+        # decoded samples in its own executor while Whisper transcribes them
+        from config import model_config
+        diarization_future: Optional[Future] = None
+        if model_config["diarization"].get("concurrent", True):
+            diarization_future = get_diarization_executor().submit(diarize_audio, audio)
         
         # Transcribe audio
         if progress:
             progress(0.3, desc="Transcription in progress...")
         
-        result = transcribe_audio(audio_path, model_size, progress=progress)
+        if word_level:
+            result = transcribe_audio(audio, model_size, progress=progress, engine=engine, word_timestamps=True)
+        else:
+            result = transcribe_audio(audio, model_size, progress=progress, engine=engine)
         
-        # Identify speakers
-        if progress:
-            progress(0.5, desc="Speaker identification in progress...")
-        
-        diarization = diarize_audio(audio_path, huggingface_token, progress=progress)
+        # Identify speakers, on the same decoded samples
+        if diarization_future is not None:
+            if progress:
+                progress(0.7, desc="Waiting for speaker identification...")
+            diarization = diarization_future.result()
+        else:
+            if progress:
+                progress(0.5, desc="Speaker identification in progress...")
+            diarization = diarize_audio(audio, progress=progress)
         
         # Associate speakers with the transcription
-        final_transcription = assign_speakers(result, diarization)
+        final_transcription = assign_speakers(result, diarization, word_level=word_level)
         
         # Save the result if requested
         if output_txt:
@@ -155,8 +190,7 @@ def process_multiple_speakers(
         if progress:
             progress(1.0, desc="Transcription completed")
         
-        if audio_extracted:
-            cleanup_audio_file(audio_path)
+        release_audio_input(audio)
         
         # Unified output format
         return {
@@ -172,20 +206,24 @@ def process_multiple_speakers(
         logger.error(error_msg)
         logger.error(traceback.format_exc())
         
-        # Cleanup in case of error
-        if 'audio_path' in locals() and 'audio_extracted' in locals() and audio_extracted:
-            cleanup_audio_file(audio_path)
+        # The audio is released once the diarization no longer reads it
+        if locals().get('diarization_future') is not None:
+            diarization_future.cancel()
+            wait([diarization_future])
         
-        # Free model memory
-        cleanup_whisper_model()
+        # Cleanup in case of error
+        if 'audio' in locals():
+            release_audio_input(audio)
         
+        # The pooled Whisper models stay loaded: other jobs may be using them
         raise Exception(error_msg)
 
 def transcribe_external_audio(
     audio_path: str,
     model_size: Optional[str] = None,
     output_txt: Optional[str] = None,
-    progress: Optional[Callable] = None
+    progress: Optional[Callable] = None,
+    engine: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Transcribes an existing audio file without extraction
@@ -195,6 +233,7 @@ def transcribe_external_audio(
         model_size: Size of the Whisper model to use
         output_txt: Output path for the text file (optional)
         progress: Progress tracking function (optional)
+        engine: Transcription engine ('openai', 'ctranslate2' or 'auto'; configured one by default)
         
     Returns:
         Dictionary containing the complete transcription and segments
@@ -207,7 +246,7 @@ def transcribe_external_audio(
         if progress:
             progress(0.2, desc="Audio transcription in progress...")
         
-        result = transcribe_audio(audio_path, model_size, progress=progress)
+        result = transcribe_audio(audio_path, model_size, progress=progress, engine=engine)
         
         # Save transcription if requested
         if output_txt:
@@ -0,0 +1,150 @@
+"""
+Voice activity detection module for long audio
+----------------------------------------------------------
+This module finds the speech regions of decoded audio from the frame energy,
+and groups them into bounded chunks cut at silences, so that long recordings
+can be transcribed chunk by chunk without their silent parts.
+"""
+
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from .audio_extraction import SAMPLE_RATE
+
+# Logging configuration
+logger = logging.getLogger("transcription.vad")
+
+# Length of the analysis frames
+FRAME_MS = 30
+
+def _frame_energies(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """Energy of each frame in dB (block by block, to bound the extra memory on long audio)"""
+    frame_count = len(samples) // frame_length
+    energies = np.empty(frame_count, dtype=np.float32)
+    block_frames = 10000
+
+    for first in range(0, frame_count, block_frames):
+        last = min(first + block_frames, frame_count)
+        block = np.asarray(samples[first * frame_length:last * frame_length], dtype=np.float32)
+        power = np.mean(block.reshape(-1, frame_length) ** 2, axis=1)
+        energies[first:last] = 10 * np.log10(power + 1e-10)
+
+    return energies
+
+def detect_speech_regions(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    min_silence_ms: int = 500,
+    min_speech_ms: int = 250,
+    padding_ms: int = 200,
+    threshold_db: float = 15.0,
+    floor_db: float = -55.0
+) -> List[Tuple[int, int]]:
+    """
+    Detects the speech regions of an audio signal
+
+    A frame is speech when its energy exceeds the noise floor of the recording
+    (5th percentile of the frame energies) by threshold_db, or is closer to the
+    speech level (95th percentile) than to the noise floor when the recording
+    has little silence. Frames below floor_db are never speech.
+
+    Args:
+        samples: Mono samples
+        sample_rate: Sample rate of the samples
+        min_silence_ms: Shorter pauses do not split a region
+        min_speech_ms: Shorter regions are dropped (clicks, noise bursts)
+        padding_ms: Margin kept around each region
+        threshold_db: Energy above the noise floor that marks speech
+        floor_db: Minimum energy of speech frames
+
+    Returns:
+        List of (start, end) sample indices of the speech regions
+    """
+    frame_length = sample_rate * FRAME_MS // 1000
+    energies = _frame_energies(samples, frame_length)
+    if len(energies) == 0:
+        return []
+
+    noise_level, speech_level = (float(level) for level in np.percentile(energies, [5, 95]))
+    threshold = max(min(noise_level + threshold_db, (noise_level + speech_level) / 2), floor_db)
+    is_speech = energies > threshold
+
+    # Edges of the runs of speech frames
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_silence_frames = max(1, min_silence_ms // FRAME_MS)
+    min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+    padding = padding_ms * sample_rate // 1000
+
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_silence_frames:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    speech_regions = []
+    for start, end in regions:
+        if end - start < min_speech_frames:
+            continue
+        # Padded regions never overlap, so no audio is transcribed twice
+        padded_start = max(0, int(start) * frame_length - padding)
+        if speech_regions:
+            padded_start = max(padded_start, speech_regions[-1][1])
+        speech_regions.append((padded_start, min(len(samples), int(end) * frame_length + padding)))
+
+    return speech_regions
+
+def plan_chunks(
+    samples: np.ndarray,
+    regions: List[Tuple[int, int]],
+    sample_rate: int = SAMPLE_RATE,
+    max_chunk_seconds: float = 120.0,
+    max_merge_gap_seconds: float = 2.0
+) -> List[Tuple[int, int]]:
+    """
+    Groups speech regions into chunks of bounded duration
+
+    Consecutive regions are merged while the chunk stays under the maximum duration
+    and the pause between them is short; longer silences are left out of the chunks.
+    A single region longer than the maximum is split at its quietest frame in the
+    last quarter of each chunk, so that words are not cut in the middle.
+
+    Args:
+        samples: Mono samples
+        regions: Speech regions (see detect_speech_regions)
+        sample_rate: Sample rate of the samples
+        max_chunk_seconds: Maximum duration of a chunk
+        max_merge_gap_seconds: Longest pause kept inside a chunk
+
+    Returns:
+        List of (start, end) sample indices of the chunks, in order
+    """
+    max_length = int(max_chunk_seconds * sample_rate)
+    frame_length = sample_rate * FRAME_MS // 1000
+
+    # Split the regions longer than a chunk
+    pieces = []
+    for start, end in regions:
+        while end - start > max_length:
+            search_start = start + max_length * 3 // 4
+            energies = _frame_energies(samples[search_start:start + max_length], frame_length)
+            cut = search_start + int(np.argmin(energies)) * frame_length if len(energies) else start + max_length
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    # Merge the consecutive pieces separated by short pauses that fit in one chunk
+    max_gap = int(max_merge_gap_seconds * sample_rate)
+    chunks = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= max_length and start - chunks[-1][1] <= max_gap:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+
+    return chunks
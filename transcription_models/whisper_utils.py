@@ -5,24 +5,52 @@ This module provides functions for audio transcription with the Whisper model.
 """
 
 import os
-import gc
+import queue
 import logging
+import threading
 import traceback
-from typing import Dict, Any, Optional, Callable, Union
-import torch
-import whisper
+import importlib.util
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Union, List, Tuple
+
+import numpy as np
+
+from .audio_extraction import SAMPLE_RATE, FFMPEG_AVAILABLE, load_audio_array, cleanup_audio_array
+from .vad import detect_speech_regions, plan_chunks
+from .result_cache import get_transcription_cache
+from .ct2_engine import resolve_engine, transcribe_ct2
+
+# torch and whisper are imported lazily on first transcription
 # Logging
 logger = logging.getLogger("transcription.whisper")
-WHISPER_AVAILABLE = True
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
 
-
-# Global model for reuse
-whisper_model = None
-current_model_size = None
+# A Whisper instance runs one decoding at a time (decoding installs hooks on the model):
+# each pooled instance ('size' or replica 'size@n') has its own lock
+_instance_locks: Dict[str, threading.RLock] = {}
+_instance_locks_guard = threading.Lock()
 
 # Configuration
 WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "medium")
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+def get_device() -> str:
+    """Returns the device used for transcription"""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def get_whisper_lock(instance_name: str) -> threading.RLock:
+    """
+    Returns the decoding lock of a pooled Whisper instance
+    
+    Args:
+        instance_name: Pool name of the instance ('size' or 'size@n')
+        
+    Returns:
+        Lock held while the instance decodes
+    """
+    with _instance_locks_guard:
+        return _instance_locks.setdefault(instance_name, threading.RLock())
 
 def get_whisper_model(model_size: Optional[str] = None) -> Any:
     """
@@ -37,44 +65,60 @@ def get_whisper_model(model_size: Optional[str] = None) -> Any:
     Raises:
         ImportError: If Whisper is not available
     """
-    global whisper_model, current_model_size
-    
     if not WHISPER_AVAILABLE:
         raise ImportError("Whisper is required for transcription")
     
-    # Define model size
-    selected_size = model_size or WHISPER_MODEL_SIZE
+    from model_manager import ModelManager
     
-    # Check if we need to load a new model
-    if whisper_model is None or current_model_size != selected_size:
-        # Free memory if a model was already loaded
-        if whisper_model is not None:
-            del whisper_model
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-        
-        logger.info(f"Loading Whisper model {selected_size}...")
-        whisper_model = whisper.load_model(selected_size, device=DEVICE)
-        current_model_size = selected_size
+    # Every size stays in the model manager's pool, which evicts the least recently used
+    # sizes beyond its limits: switching sizes no longer reloads weights on every request
+    return ModelManager.get_instance().get_model("whisper", model_size or WHISPER_MODEL_SIZE)
+
+@contextmanager
+def whisper_instance(model_size: Optional[str] = None):
+    """
+    Holds the pooled Whisper model of a size for a decoding
+    
+    The model is locked for the caller and the pool does not evict it until the block exits.
+    
+    Args:
+        model_size: Size of the Whisper model to use
         
-    return whisper_model
+    Yields:
+        Whisper model instance
+    """
+    if not WHISPER_AVAILABLE:
+        raise ImportError("Whisper is required for transcription")
+    
+    from model_manager import ModelManager
+    
+    selected_size = model_size or WHISPER_MODEL_SIZE
+    with ModelManager.get_instance().hold_model("whisper", selected_size) as model:
+        # Only decodings on this instance wait: the other sizes run in parallel
+        with get_whisper_lock(selected_size):
+            yield model
 
 def transcribe_audio(
-    audio_path: str, 
+    audio_path: Union[str, np.ndarray], 
     model_size: Optional[str] = None, 
     language: Optional[str] = None,
     progress: Optional[Callable] = None,
+    long_audio: Optional[bool] = None,
+    engine: Optional[str] = None,
     **whisper_options
 ) -> Dict[str, Any]:
     """
     Transcribes an audio file to text
     
     Args:
-        audio_path: Path to the audio file
+        audio_path: Path to the audio file, or 16 kHz mono float32 samples already decoded
         model_size: Size of the Whisper model to use
         language: Language code for transcription (e.g., 'fr', 'en')
         progress: Progress tracking function (optional)
+        long_audio: Transcribe by speech chunks (see transcribe_long_audio);
+                    None = when the audio is longer than the configured threshold
+        engine: 'openai', 'ctranslate2' (int8 CTranslate2 model, see ct2_engine) or 'auto';
+                None = the configured engine
         whisper_options: Additional options to pass to Whisper
         
     Returns:
@@ -84,19 +128,14 @@ def transcribe_audio(
         ImportError: If Whisper is not available
         Exception: If an error occurs during transcription
     """
+    # Samples decoded here from a path are released on return
+    decoded_audio = None
     try:
-        if progress:
-            progress(0.4, desc="Loading transcription model...")
-        
-        # Load the Whisper model
-        model = get_whisper_model(model_size)
-        
-        if progress:
-            progress(0.5, desc="Audio transcription in progress...")
+        engine = resolve_engine(engine)
         
         # Prepare transcription options
         options = {
-            "fp16": torch.cuda.is_available(),
+            "fp16": get_device() == "cuda",
             "verbose": False
         }
         
@@ -107,8 +146,71 @@ def transcribe_audio(
         # Add additional options
         options.update(whisper_options)
         
-        # Transcribe the audio
-        result = model.transcribe(audio_path, **options)
+        from config import model_config
+        whisper_config = model_config["whisper"]
+        min_seconds = whisper_config.get("long_audio_min_seconds", 600) if long_audio is None else 0
+        # Short recordings without custom decoding options are batched with other jobs
+        batching = whisper_config.get("batching_enabled", True) and not whisper_options and not long_audio and engine == "openai"
+        cache = get_transcription_cache()
+        
+        # Long, batched and cached transcriptions work on decoded samples
+        if isinstance(audio_path, str) and FFMPEG_AVAILABLE and (long_audio or min_seconds or batching or cache.enabled):
+            audio_path = decoded_audio = load_audio_array(audio_path)
+        
+        # The same audio already transcribed with the same model and options is not transcribed again
+        cache_key = None
+        if cache.enabled:
+            cache_options = {key: value for key, value in options.items() if key != "verbose"}
+            cache_key = cache.make_key(
+                audio_path, model_size or WHISPER_MODEL_SIZE, {**cache_options, "long_audio": long_audio, "engine": engine}
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Transcription found in the result cache")
+                if progress:
+                    progress(0.8, desc="Transcription completed (cached)")
+                return cached
+        
+        if engine == "ctranslate2":
+            # The CTranslate2 engine handles long audio itself and needs no inference lock
+            if progress:
+                progress(0.5, desc="Audio transcription in progress...")
+            result = transcribe_ct2(audio_path, model_size or WHISPER_MODEL_SIZE, progress=progress, **options)
+            if cache_key:
+                cache.put(cache_key, result)
+            if progress:
+                progress(0.8, desc="Transcription completed")
+            return result
+        
+        if progress:
+            progress(0.4, desc="Loading transcription model...")
+        
+        if progress:
+            progress(0.5, desc="Audio transcription in progress...")
+        
+        result = None
+        if not isinstance(audio_path, str):
+            duration = len(audio_path) / SAMPLE_RATE
+            
+            if long_audio or (min_seconds and duration >= min_seconds):
+                # Long recordings are transcribed by speech chunks (each instance is locked per chunk)
+                result = transcribe_long_audio(audio_path, model_size, progress=progress, **options)
+            elif batching and duration <= whisper_config.get("batch_max_audio_seconds", 120):
+                from .batch_engine import get_batch_engine
+                result = get_batch_engine().submit(
+                    audio_path, model_size or WHISPER_MODEL_SIZE, options.get("language")
+                ).result()
+        
+        if result is None:
+            # Transcribe the audio (Whisper decodes paths itself, decoded samples are used as is)
+            with whisper_instance(model_size) as model:
+                result = model.transcribe(audio_path, **options)
+        
+        if "duration" not in result and not isinstance(audio_path, str):
+            result["duration"] = len(audio_path) / SAMPLE_RATE
+        
+        if cache_key:
+            cache.put(cache_key, result)
         
         if progress:
             progress(0.8, desc="Transcription completed")
@@ -120,29 +222,153 @@ def transcribe_audio(
         logger.error(error_msg)
         logger.error(traceback.format_exc())
         raise Exception(error_msg)
+    
+    finally:
+        # Memory-mapped samples (audio.decode_mmap) are backed by a file in uploads/audio
+        cleanup_audio_array(decoded_audio)
 
-def cleanup_whisper_model() -> bool:
+@contextmanager
+def hold_whisper_replicas(model_size: Optional[str], count: int):
+    """
+    Holds independent instances of a Whisper model for a parallel job
+    
+    A Whisper instance cannot run two transcriptions at once (decoding installs
+    hooks on the model), so each parallel worker uses its own replica, under the
+    lock of that instance. Every instance stays in the pool until the block exits.
+    
+    Args:
+        model_size: Size of the Whisper model
+        count: Number of instances
+        
+    Yields:
+        (model, lock) pairs: the main model followed by count - 1 replicas, each with its own lock
+    """
+    from model_manager import ModelManager
+    
+    selected_size = model_size or WHISPER_MODEL_SIZE
+    manager = ModelManager.get_instance()
+    
+    with ExitStack() as held:
+        instances = []
+        for index in range(count):
+            # Replicas are pool entries of their size ('size@n'), evicted together with it
+            name = f"{selected_size}@{index}" if index else selected_size
+            instances.append((held.enter_context(manager.hold_model("whisper", name)), get_whisper_lock(name)))
+        yield instances
+
+def _shift_segments(segments: List[Dict[str, Any]], offset: float, seek_offset: int) -> List[Dict[str, Any]]:
+    """Moves segments (and their words) of a chunk to the timeline of the whole audio"""
+    for segment in segments:
+        segment["start"] += offset
+        segment["end"] += offset
+        if "seek" in segment:
+            segment["seek"] += seek_offset
+        for word in segment.get("words", []):
+            word["start"] += offset
+            word["end"] += offset
+    return segments
+
+def transcribe_long_audio(
+    samples: np.ndarray,
+    model_size: Optional[str] = None,
+    progress: Optional[Callable] = None,
+    workers: Optional[int] = None,
+    max_chunk_seconds: Optional[float] = None,
+    **options
+) -> Dict[str, Any]:
     """
-    Frees the Whisper model memory
+    Transcribes long audio chunk by chunk, skipping silences
+    
+    Speech regions are detected from the signal energy and grouped into chunks cut
+    at silences. The chunks are transcribed by a pool of Whisper instances and their
+    segments are put back on the timeline of the whole audio.
     
+    Args:
+        samples: 16 kHz mono float32 samples
+        model_size: Size of the Whisper model to use
+        progress: Progress tracking function (optional)
+        workers: Number of chunks transcribed at once (default: configuration)
+        max_chunk_seconds: Maximum duration of a chunk (default: configuration)
+        options: Options passed to Whisper for each chunk
+        
     Returns:
-        True if the model was freed, False otherwise
+        Whisper-like result (text, segments, language, duration) with global timestamps
     """
-    global whisper_model, current_model_size
+    from config import model_config
+    whisper_config = model_config["whisper"]
+    workers = max(1, workers or whisper_config.get("parallel_workers", 1))
+    max_chunk_seconds = max_chunk_seconds or whisper_config.get("chunk_max_seconds", 120)
     
-    if whisper_model is not None:
-        try:
-            del whisper_model
-            whisper_model = None
-            current_model_size = None
-            gc.collect()
-            
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-                
-            return True
-        except Exception as e:
-            logger.error(f"Error when freeing the Whisper model: {str(e)}")
+    duration = len(samples) / SAMPLE_RATE
+    chunks = plan_chunks(samples, detect_speech_regions(samples), max_chunk_seconds=max_chunk_seconds)
+    speech_seconds = sum(end - start for start, end in chunks) / SAMPLE_RATE
+    logger.info(f"Long audio: {duration:.0f}s, {len(chunks)} chunks, {speech_seconds:.0f}s of speech, {workers} workers")
+    
+    if not chunks:
+        return {"text": "", "segments": [], "language": options.get("language") or "", "duration": duration}
+    
+    # The main model is shared with the other transcriptions: it is only locked while it
+    # decodes a chunk, so short, batched and live jobs interleave with a long job
+    with hold_whisper_replicas(model_size, min(workers, len(chunks))) as models:
+        available_models = queue.Queue()
+        for instance in models:
+            available_models.put(instance)
+    
+        completed = [0]
+        completed_lock = threading.Lock()
+    
+        def transcribe_chunk(chunk: Tuple[int, int], chunk_options: Dict[str, Any]) -> Dict[str, Any]:
+            start, end = chunk
+            model, lock = available_models.get()
+            try:
+                with lock:
+                    result = model.transcribe(np.ascontiguousarray(samples[start:end], dtype=np.float32), **chunk_options)
+            finally:
+                available_models.put((model, lock))
+        
+            _shift_segments(result["segments"], start / SAMPLE_RATE, start // 160)
+        
+            if progress:
+                with completed_lock:
+                    completed[0] += 1
+                    done = completed[0]
+                progress(0.5 + 0.3 * done / len(chunks), desc=f"Transcribed chunk {done}/{len(chunks)}")
+            return result
+    
+        # Without a requested language, it is detected on the first chunk and imposed on
+        # the others, so that the whole recording is transcribed in one language
+        first_result = transcribe_chunk(chunks[0], options)
+        options = {**options, "language": options.get("language") or first_result.get("language")}
+    
+        with ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="whisper_chunk") as executor:
+            chunk_results = [first_result] + list(executor.map(lambda chunk: transcribe_chunk(chunk, options), chunks[1:]))
+    
+    segments = []
+    for chunk_result in chunk_results:
+        for segment in chunk_result["segments"]:
+            segment["id"] = len(segments)
+            segments.append(segment)
+    
+    return {
+        "text": "".join(chunk_result["text"] for chunk_result in chunk_results),
+        "segments": segments,
+        "language": options["language"],
+        "duration": duration,
+        "chunks": len(chunks)
+    }
+
+def cleanup_whisper_model() -> bool:
+    """
+    Frees the memory of the Whisper models (every size in the pool and its replicas)
+    
+    Returns:
+        True if a model was freed, False otherwise
+    """
+    try:
+        from model_manager import ModelManager
+        return ModelManager.get_instance().unload_models("whisper") > 0
+    except Exception as e:
+        logger.error(f"Error when freeing the Whisper model: {str(e)}")
             
     return False
 
@@ -7,12 +7,22 @@ avec et sans identification des locuteurs (diarization).
 
 import os
 import logging
-import whisper
+import threading
 import numpy as np
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
 from pathlib import Path
 
+# Décodage direct par ffmpeg (16 kHz mono float32), partagé avec transcription_models
+from transcription_models.audio_extraction import (
+    FFMPEG_AVAILABLE, SAMPLE_RATE, load_audio_array, cleanup_audio_array
+)
+from transcription_models.diarization import assign_speakers as assign_speakers_sweep
+from transcription_models.whisper_utils import whisper_instance
+from model_manager import ModelManager
+from config import model_config
+
 # Logging
 logger = logging.getLogger("transcription_utils")
 
@@ -31,8 +41,8 @@ except ImportError:
     PYANNOTE_AVAILABLE = False
     logger.warning("Pyannote.audio non disponible. La diarization sera désactivée.")
 
-# Modèle Whisper global pour réutilisation
-whisper_model = None
+# Le pipeline de diarization résident traite une requête à la fois
+diarization_lock = threading.Lock()
 
 # Configuration
 HUGGINGFACE_TOKEN = os.environ.get("HUGGINGFACE_TOKEN", "")
@@ -41,15 +51,8 @@ AUDIO_TMP_DIR = Path("uploads/audio")
 AUDIO_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
 def get_whisper_model(model_size=None):
-    """Charge ou récupère le modèle Whisper"""
-    global whisper_model
-    
-    if whisper_model is None:
-        model_size = model_size or WHISPER_MODEL_SIZE
-        logger.info(f"Chargement du modèle Whisper {model_size}...")
-        whisper_model = whisper.load_model(model_size)
-        
-    return whisper_model
+    """Charge ou récupère le modèle Whisper (pool partagé du gestionnaire de modèles)"""
+    return ModelManager.get_instance().get_model("whisper", model_size or WHISPER_MODEL_SIZE)
 
 def extract_audio(video_path, audio_path=None, progress=None):
     """
@@ -91,12 +94,37 @@ def extract_audio(video_path, audio_path=None, progress=None):
         logger.error(traceback.format_exc())
         raise Exception(error_msg)
 
+def load_audio(video_path, progress=None):
+    """
+    Décode une seule fois l'audio d'une vidéo pour la transcription et la diarization
+    
+    Args:
+        video_path: Chemin vers le fichier vidéo ou audio
+        progress: Fonction de suivi de progression (facultatif)
+        
+    Returns:
+        Échantillons 16 kHz mono (ffmpeg), ou chemin d'un WAV extrait par MoviePy si ffmpeg est absent
+    """
+    if FFMPEG_AVAILABLE:
+        return load_audio_array(video_path, progress=progress)
+    return extract_audio(video_path, progress=progress)
+
+def release_audio(audio):
+    """Libère l'audio renvoyé par load_audio (fichier mappé ou WAV temporaire)"""
+    if isinstance(audio, np.ndarray):
+        cleanup_audio_array(audio)
+    elif Path(audio).resolve().is_relative_to(AUDIO_TMP_DIR.resolve()):
+        try:
+            os.unlink(audio)
+        except OSError:
+            pass
+
 def transcribe_audio(audio_path, model_size=None, progress=None):
     """
     Transcrit un fichier audio en texte
     
     Args:
-        audio_path: Chemin vers le fichier audio
+        audio_path: Chemin vers le fichier audio, ou échantillons 16 kHz mono déjà décodés
         model_size: Taille du modèle Whisper à utiliser
         progress: Fonction de suivi de progression (facultatif)
         
@@ -107,14 +135,13 @@ def transcribe_audio(audio_path, model_size=None, progress=None):
         if progress:
             progress(0.4, desc="Chargement du modèle de transcription...")
         
-        # Charger le modèle Whisper
-        model = get_whisper_model(model_size)
-        
-        if progress:
-            progress(0.5, desc="Transcription audio en cours...")
-        
-        # Transcrire l'audio
-        result = model.transcribe(audio_path)
+        # Réserver le modèle Whisper : l'instance du pool est partagée (un décodage à la fois)
+        # et n'est pas évincée tant que la transcription n'est pas terminée
+        with whisper_instance(model_size or WHISPER_MODEL_SIZE) as model:
+            if progress:
+                progress(0.5, desc="Transcription audio en cours...")
+            
+            result = model.transcribe(audio_path)
         
         if progress:
             progress(0.8, desc="Transcription terminée")
@@ -132,7 +159,7 @@ def diarize_audio(audio_path, huggingface_token=None, progress=None):
     Identifie les locuteurs dans un fichier audio
     
     Args:
-        audio_path: Chemin vers le fichier audio
+        audio_path: Chemin vers le fichier audio, ou échantillons 16 kHz mono déjà décodés
         huggingface_token: Token Hugging Face pour l'accès au modèle
         progress: Fonction de suivi de progression (facultatif)
         
@@ -151,17 +178,28 @@ def diarize_audio(audio_path, huggingface_token=None, progress=None):
         if progress:
             progress(0.6, desc="Chargement du modèle de diarization...")
         
-        # Initialiser le pipeline de diarization
-        pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            use_auth_token=token
+        # Pipeline résident, chargé une seule fois par le gestionnaire de modèles
+        pipeline = ModelManager.get_instance().get_model(
+            "diarization", model_config["diarization"]["model_path"], token=token
         )
+        speaker_bounds = {
+            "min_speakers": model_config["diarization"].get("min_speakers"),
+            "max_speakers": model_config["diarization"].get("max_speakers")
+        }
         
         if progress:
             progress(0.7, desc="Identification des locuteurs en cours...")
         
-        # Effectuer la diarization
-        diarization = pipeline(audio_path)
+        # Effectuer la diarization (les échantillons décodés sont passés en mémoire, sans relire le fichier)
+        with diarization_lock:
+            if isinstance(audio_path, np.ndarray):
+                import torch
+                diarization = pipeline({
+                    "waveform": torch.from_numpy(np.asarray(audio_path)).unsqueeze(0),
+                    "sample_rate": SAMPLE_RATE
+                }, **speaker_bounds)
+            else:
+                diarization = pipeline(audio_path, **speaker_bounds)
         
         # Extraire les segments avec locuteurs
         speaker_segments = []
@@ -179,54 +217,20 @@ def diarize_audio(audio_path, huggingface_token=None, progress=None):
         logger.error(traceback.format_exc())
         raise Exception(error_msg)
 
-def assign_speakers(transcription, diarization):
+def assign_speakers(transcription, diarization, word_level=False):
     """
     Associe les locuteurs identifiés aux segments de transcription
     
     Args:
         transcription: Résultat de la transcription avec Whisper
         diarization: Résultat de la diarization avec Pyannote
+        word_level: Attribuer un locuteur à chaque mot (transcription avec word_timestamps)
         
     Returns:
         Liste de segments avec texte et locuteur attribué
     """
-    final_transcription = []
-    
-    segments = transcription["segments"]
-    
-    for segment in segments:
-        start, end, text = segment["start"], segment["end"], segment["text"]
-        speaker = "Unknown"
-        
-        # Trouver le locuteur principal pour ce segment
-        speaker_times = {}
-        
-        for d_start, d_end, d_speaker in diarization:
-            # Calculer le chevauchement
-            overlap_start = max(d_start, start)
-            overlap_end = min(d_end, end)
-            
-            if overlap_start < overlap_end:
-                overlap_duration = overlap_end - overlap_start
-                
-                if d_speaker in speaker_times:
-                    speaker_times[d_speaker] += overlap_duration
-                else:
-                    speaker_times[d_speaker] = overlap_duration
-        
-        # Sélectionner le locuteur avec le plus de temps de parole dans ce segment
-        if speaker_times:
-            speaker = max(speaker_times, key=speaker_times.get)
-        
-        # Ajouter le segment avec son locuteur
-        final_transcription.append({
-            "start": start,
-            "end": end,
-            "speaker": speaker,
-            "text": text
-        })
-    
-    return final_transcription
+    # Balayage des segments et des tours de parole triés, au lieu de comparer chaque paire
+    return assign_speakers_sweep(transcription, diarization, word_level=word_level)
 
 def process_monologue(video_path, output_txt=None, model_size=None, progress=None):
     """
@@ -242,8 +246,8 @@ def process_monologue(video_path, output_txt=None, model_size=None, progress=Non
         Texte transcrit et chemin vers le fichier texte s'il a été créé
     """
     try:
-        # Extraire l'audio
-        audio_path = extract_audio(video_path, progress=progress)
+        # Décoder l'audio une seule fois
+        audio_path = load_audio(video_path, progress=progress)
         
         # Transcrire l'audio
         result = transcribe_audio(audio_path, model_size, progress=progress)
@@ -260,12 +264,8 @@ def process_monologue(video_path, output_txt=None, model_size=None, progress=Non
             if progress:
                 progress(1.0, desc="Transcription terminée")
         
-        # Nettoyer le fichier audio temporaire
-        if audio_path.startswith(str(AUDIO_TMP_DIR)):
-            try:
-                os.unlink(audio_path)
-            except:
-                pass
+        # Libérer l'audio décodé
+        release_audio(audio_path)
         
         return {
             "transcription": transcription,
@@ -294,14 +294,18 @@ def process_multiple_speakers(video_path, output_txt=None, model_size=None, hugg
         Liste de segments avec texte et locuteur, et chemin vers le fichier texte s'il a été créé
     """
     try:
-        # Extraire l'audio
-        audio_path = extract_audio(video_path, progress=progress)
-        
-        # Transcrire l'audio
-        result = transcribe_audio(audio_path, model_size, progress=progress)
+        # Décoder l'audio une seule fois
+        audio_path = load_audio(video_path, progress=progress)
         
-        # Identifier les locuteurs
-        diarization = diarize_audio(audio_path, huggingface_token, progress=progress)
+        # Identifier les locuteurs pendant la transcription : la diarization ne dépend pas de Whisper
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization") as executor:
+            diarization_future = executor.submit(diarize_audio, audio_path, huggingface_token)
+            
+            # Transcrire l'audio
+            result = transcribe_audio(audio_path, model_size, progress=progress)
+            
+            # Attendre les locuteurs
+            diarization = diarization_future.result()
         
         # Associer les locuteurs à la transcription
         final_transcription = assign_speakers(result, diarization)
@@ -318,12 +322,8 @@ def process_multiple_speakers(video_path, output_txt=None, model_size=None, hugg
             if progress:
                 progress(1.0, desc="Transcription terminée")
         
-        # Nettoyer le fichier audio temporaire
-        if audio_path.startswith(str(AUDIO_TMP_DIR)):
-            try:
-                os.unlink(audio_path)
-            except:
-                pass
+        # Libérer l'audio décodé
+        release_audio(audio_path)
         
         return {
             "segments": final_transcription,
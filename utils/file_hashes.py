@@ -0,0 +1,87 @@
+"""
+Content hashes of stored files
+------------------------------------------
+This module computes the SHA-256 of stored files and memoizes it by path, size and
+modification time, so that uploads hashed on the fly are not read again. The memo
+keeps the most recently used hashes only. It only
+uses the standard library, so that the model layer can import it.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Size of the chunks read from the request and written to disk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of memoized hashes, the least recently used are dropped beyond
+MAX_FILE_HASHES = 4096
+
+# Content hashes of stored files, memoized by path, size and modification time (least recently used first)
+_file_hashes: "OrderedDict[tuple, str]" = OrderedDict()
+_file_hashes_lock = threading.Lock()
+
+def _hash_memo_key(path: str) -> tuple:
+    """Memo key of a file: its content hash is valid as long as size and mtime are unchanged"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+def _store_file_hash(memo_key: tuple, digest: str):
+    """Memoizes a content hash, dropping the least recently used beyond MAX_FILE_HASHES (lock must be held)"""
+    _file_hashes[memo_key] = digest
+    _file_hashes.move_to_end(memo_key)
+    while len(_file_hashes) > MAX_FILE_HASHES:
+        _file_hashes.popitem(last=False)
+
+def remember_file_hash(path: str, digest: str):
+    """Records the content hash of a file computed elsewhere (e.g. while it was uploaded)"""
+    memo_key = _hash_memo_key(path)
+    with _file_hashes_lock:
+        _store_file_hash(memo_key, digest)
+
+def forget_file_hash(path: str):
+    """Drops the memoized hashes of a deleted file"""
+    abs_path = os.path.abspath(path)
+    with _file_hashes_lock:
+        for memo_key in [memo_key for memo_key in _file_hashes if memo_key[0] == abs_path]:
+            del _file_hashes[memo_key]
+
+def get_known_file_hash(path: str) -> Optional[str]:
+    """Gets the content hash of a file only if already computed (e.g. at upload time)"""
+    try:
+        memo_key = _hash_memo_key(path)
+    except OSError:
+        return None
+
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            _file_hashes.move_to_end(memo_key)
+        return _file_hashes.get(memo_key)
+
+def get_file_hash(path: str) -> str:
+    """
+    Gets the SHA-256 of a file, computed while uploading or read back in chunks
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hexadecimal digest
+    """
+    memo_key = _hash_memo_key(path)
+
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            _file_hashes.move_to_end(memo_key)
+            return _file_hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DEFAULT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    with _file_hashes_lock:
+        _store_file_hash(memo_key, digest.hexdigest())
+    return digest.hexdigest()
@@ -0,0 +1,250 @@
+"""
+Download responses for stored results
+------------------------------------------
+This module serves result files with HTTP validators (ETag, Last-Modified),
+single byte-range requests, whole files handed to the server when it supports
+it (pathsend), and encodes large in-memory results to JSON incrementally. Neither response
+holds the whole payload in memory.
+"""
+
+import os
+import json
+import logging
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Any, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import Request
+from starlette.responses import Response, StreamingResponse
+
+logger = logging.getLogger("file_responses")
+
+# Size of the reads when the file cannot be handed to the server
+FILE_CHUNK_SIZE = 256 * 1024
+
+# Size of the chunks of an incrementally encoded JSON response
+JSON_CHUNK_SIZE = 64 * 1024
+
+def _file_etag(stat: os.stat_result) -> str:
+    """Validator of a file, changing whenever it is rewritten"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Checks an If-None-Match header (weak comparison)"""
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    """Checks an If-Modified-Since header against a modification time"""
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+def parse_range_header(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single byte range
+
+    Args:
+        header: Value of the Range header
+        size: Size of the file
+
+    Returns:
+        Inclusive (start, end) of the range, or None to serve the whole file
+        (unsupported unit, malformed or multiple ranges)
+
+    Raises:
+        ValueError: If the range is well-formed but outside the file
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, dash, last = ranges.partition("-")
+    if not dash:
+        return None
+
+    first, last = first.strip(), last.strip()
+    if not (first or last) or not all(value.isdigit() for value in (first, last) if value):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("Range starts after the end of the file")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+class RangeFileResponse(Response):
+    """File response covering a byte range, the whole file being sent by the server itself when possible"""
+
+    def __init__(self, path: str, start: int, length: int, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None, media_type: Optional[str] = None):
+        """
+        Initializes the response
+
+        Args:
+            path: Path to the file
+            start: Offset of the first byte sent
+            length: Number of bytes sent
+            status_code: 200 for the whole file, 206 for a range
+            headers: Additional headers
+            media_type: Content type of the file
+        """
+        self.path = path
+        self.start = start
+        self.length = length
+        super().__init__(content=b"", status_code=status_code, headers=headers, media_type=media_type)
+        # The body is streamed from the file in __call__
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope, receive, send):
+        # Ranges are never sent with http.response.zerocopysend: BaseHTTPMiddleware (used by
+        # this application) rejects that message, while it forwards pathsend
+        extensions = scope.get("extensions") or {}
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        remaining = self.length
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+        if remaining > 0:
+            # File truncated while being sent: close the body so the client sees a short response
+            logger.warning(f"{self.path} shrank while being downloaded")
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def file_download_response(path: str, request: Request, filename: Optional[str] = None,
+                           media_type: Optional[str] = None) -> Response:
+    """
+    Builds the response downloading a stored file
+
+    Honors If-None-Match / If-Modified-Since (304), If-Range and a single
+    byte range (206, or 416 outside the file). Other requests get the whole file.
+
+    Args:
+        path: Path to the file
+        request: Download request
+        filename: Name proposed to the client (file name by default)
+        media_type: Content type (guessed from the file name by default)
+
+    Returns:
+        Response to send
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    filename = filename or os.path.basename(path)
+    media_type = media_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"
+
+    etag = _file_etag(stat)
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        # Downloads are revalidated with the ETag rather than kept by response caches
+        "Cache-Control": "no-cache"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since") and _not_modified_since(request.headers["if-modified-since"], stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = (
+        f"attachment; filename*=utf-8''{quote(filename)}" if filename != quote(filename)
+        else f'attachment; filename="{filename}"'
+    )
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (etag, last_modified)):
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        return RangeFileResponse(path, 0, size, headers=headers, media_type=media_type)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(path, start, end - start + 1, status_code=206, headers=headers, media_type=media_type)
+
+def _json_default(value: Any) -> Any:
+    """Encodes values the json module does not know (numpy arrays and scalars, dates...)"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def iter_json(content: Any, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encodes a value to JSON in chunks
+
+    Args:
+        content: JSON-serializable value
+        chunk_size: Approximate size of the chunks produced
+
+    Returns:
+        Iterator over the encoded chunks
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    buffer = []
+    buffered = 0
+    for fragment in encoder.iterencode(content):
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered >= chunk_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+class StreamingJSONResponse(StreamingResponse):
+    """JSON response encoded chunk by chunk (in the threadpool) while it is sent"""
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+        """
+        Initializes the response
+
+        Args:
+            content: JSON-serializable value
+            status_code: HTTP status code
+            headers: Additional headers
+        """
+        headers = {"Cache-Control": "no-cache", **(headers or {})}
+        super().__init__(iter_json(content), status_code=status_code, headers=headers, media_type=self.media_type)
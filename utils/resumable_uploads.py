@@ -0,0 +1,289 @@
+"""
+Resumable uploads
+------------------------------------------
+This module lets clients upload large media in chunks over several requests:
+an upload session is created, chunks are appended at explicit offsets, the
+received offset can be queried after a dropped connection, and the complete
+file is finalized into a file ID accepted by the analysis endpoints.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, AsyncIterator
+
+import aiofiles
+from fastapi import HTTPException
+
+from .upload_storage import get_max_upload_size_mb, register_stored_file, remember_file_hash, get_file_hash
+from .upload_index import get_upload_index
+
+logger = logging.getLogger("resumable_uploads")
+
+class ResumableUploadManager:
+    """Upload sessions whose received offset is the size of their partial file on disk"""
+
+    def __init__(self, upload_dir: str = "uploads/resumable", ttl_hours: float = 24):
+        """
+        Initializes the manager
+
+        Args:
+            upload_dir: Directory of the partial files and their session records
+            ttl_hours: Unfinished uploads untouched for this long are deleted
+        """
+        self.upload_dir = Path(upload_dir)
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_hours * 3600
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Running hashes of the bytes received so far, lost on restart (the file is then re-read on finalize)
+        self._digests: Dict[str, Any] = {}
+
+    def create(self, filename: str, total_size: int, user_id: str, allowed_extensions: set) -> Dict[str, Any]:
+        """
+        Creates an upload session
+
+        Args:
+            filename: Name of the file to upload
+            total_size: Size of the file in bytes
+            user_id: Owner of the upload
+            allowed_extensions: Accepted file extensions (without dot)
+
+        Returns:
+            Upload status
+        """
+        self._expire()
+
+        extension = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+        if extension not in allowed_extensions:
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+
+        if total_size <= 0:
+            raise HTTPException(status_code=400, detail="The upload size must be positive")
+
+        max_size_mb = get_max_upload_size_mb(filename)
+        if max_size_mb and total_size > max_size_mb * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"File exceeds the maximum size of {max_size_mb} MB")
+
+        upload_id = uuid.uuid4().hex
+        session = {
+            "upload_id": upload_id,
+            "filename": "".join(c for c in filename if c.isalnum() or c in "._- "),
+            "total_size": total_size,
+            "user_id": user_id,
+            "created_at": time.time()
+        }
+
+        self._partial_path(upload_id).touch()
+        self._save_session(session)
+        self._digests[upload_id] = hashlib.sha256()
+
+        logger.info(f"Resumable upload {upload_id} created ({total_size} bytes)")
+        return self._status(session)
+
+    async def write_chunk(self, upload_id: str, user_id: str, offset: int,
+                          chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Appends a chunk to an upload, streaming it to disk
+
+        Args:
+            upload_id: Upload identifier
+            user_id: User sending the chunk (must own the upload)
+            offset: Position of the chunk in the file, must equal the received size
+            chunks: Body of the request
+
+        Returns:
+            Upload status after the chunk
+
+        Raises:
+            HTTPException: 409 if the offset does not match the received size
+        """
+        upload_id = self._check_id(upload_id)
+        async with self._get_lock(upload_id):
+            session = self._load_session(upload_id, user_id)
+            partial_path = self._partial_path(upload_id)
+            received = partial_path.stat().st_size
+
+            if offset != received:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset mismatch: {received} bytes received so far",
+                    headers={"Upload-Offset": str(received)}
+                )
+
+            if received == 0:
+                self._digests[upload_id] = hashlib.sha256()
+            digest = self._digests.get(upload_id)
+            try:
+                async with aiofiles.open(partial_path, "ab") as out_file:
+                    async for chunk in chunks:
+                        if not chunk:
+                            continue
+                        received += len(chunk)
+                        if received > session["total_size"]:
+                            raise HTTPException(status_code=413, detail="Chunk exceeds the declared upload size")
+                        await out_file.write(chunk)
+                        if digest is not None:
+                            digest.update(chunk)
+            except BaseException:
+                # Bytes written before the failure stay; the client resumes from the reported offset,
+                # but the running hash may no longer match them
+                self._digests.pop(upload_id, None)
+                raise
+
+            return self._status(session)
+
+    def get_status(self, upload_id: str, user_id: str) -> Dict[str, Any]:
+        """Gets the received offset of an upload"""
+        return self._status(self._load_session(upload_id, user_id))
+
+    async def finalize(self, upload_id: str, user_id: str, destination_dir: str) -> Dict[str, Any]:
+        """
+        Completes an upload and registers the file under a file ID
+
+        Args:
+            upload_id: Upload identifier
+            user_id: User finalizing the upload (must own it)
+            destination_dir: Directory where the complete file is stored
+
+        Returns:
+            File record (see register_stored_file)
+        """
+        upload_id = self._check_id(upload_id)
+        async with self._get_lock(upload_id):
+            session = self._load_session(upload_id, user_id)
+            partial_path = self._partial_path(upload_id)
+            received = partial_path.stat().st_size
+
+            if received != session["total_size"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {received}/{session['total_size']} bytes received",
+                    headers={"Upload-Offset": str(received)}
+                )
+
+            destination = os.path.join(destination_dir, f"{upload_id}_{session['filename']}")
+            os.replace(partial_path, destination)
+
+            digest = self._digests.pop(upload_id, None)
+            content_hash = digest.hexdigest() if digest is not None else None
+
+            self._session_path(upload_id).unlink(missing_ok=True)
+            self._locks.pop(upload_id, None)
+
+        # The file hash is re-read from disk only if the running hash was lost (restart, failed chunk)
+        record = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self._store(destination, session["filename"], user_id, content_hash)
+        )
+        logger.info(f"Resumable upload {upload_id} finalized as file {record['file_id']}")
+        return record
+
+    def _store(self, path: str, filename: str, user_id: str, content_hash: Optional[str]) -> Dict[str, Any]:
+        """Deduplicates a finalized file and registers it under a file ID"""
+        content_hash = content_hash or get_file_hash(path)
+        deduplicated_from = get_upload_index().deduplicate(path, content_hash)
+        remember_file_hash(path, content_hash)
+
+        record = register_stored_file(path, filename, user_id, content_hash)
+        record["deduplicated_from"] = deduplicated_from
+        return record
+
+    def cancel(self, upload_id: str, user_id: str):
+        """Deletes an unfinished upload"""
+        upload_id = self._check_id(upload_id)
+        self._load_session(upload_id, user_id)
+        self._drop(upload_id)
+
+    def _status(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Public status of an upload session"""
+        received = self._partial_path(session["upload_id"]).stat().st_size
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "offset": received,
+            "total_size": session["total_size"],
+            "complete": received == session["total_size"]
+        }
+
+    def _check_id(self, upload_id: str) -> str:
+        """Normalizes an upload identifier, which must be a generated UUID"""
+        try:
+            return uuid.UUID(upload_id).hex
+        except (ValueError, AttributeError, TypeError):
+            raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+    def _load_session(self, upload_id: str, user_id: str) -> Dict[str, Any]:
+        """Loads an upload session owned by a user"""
+        upload_id = self._check_id(upload_id)
+        try:
+            with open(self._session_path(upload_id), "r", encoding="utf-8") as f:
+                session = json.load(f)
+        except (ValueError, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Upload not found or expired")
+
+        if session.get("user_id") != user_id or not self._partial_path(upload_id).exists():
+            raise HTTPException(status_code=404, detail="Upload not found or expired")
+        return session
+
+    def _save_session(self, session: Dict[str, Any]):
+        """Stores the record of an upload session"""
+        with open(self._session_path(session["upload_id"]), "w", encoding="utf-8") as f:
+            json.dump(session, f)
+
+    def _get_lock(self, upload_id: str) -> asyncio.Lock:
+        """Serializes the requests touching one upload"""
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _expire(self):
+        """Deletes unfinished uploads whose partial file was not written for longer than the TTL"""
+        now = time.time()
+        for session_path in self.upload_dir.glob("*.json"):
+            upload_id = session_path.stem
+            partial_path = self._partial_path(upload_id)
+            try:
+                last_write = partial_path.stat().st_mtime if partial_path.exists() else session_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if now - last_write > self.ttl_seconds:
+                self._drop(upload_id)
+                logger.info(f"Resumable upload {upload_id} expired")
+
+    def _drop(self, upload_id: str):
+        """Removes an upload session and its partial file"""
+        self._partial_path(upload_id).unlink(missing_ok=True)
+        self._session_path(upload_id).unlink(missing_ok=True)
+        self._digests.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+    def _partial_path(self, upload_id: str) -> Path:
+        """Path of the partial file of an upload"""
+        return self.upload_dir / f"{upload_id}.part"
+
+    def _session_path(self, upload_id: str) -> Path:
+        """Path of the record of an upload session"""
+        return self.upload_dir / f"{upload_id}.json"
+
+# Global instance, created on first use
+_upload_manager: Optional[ResumableUploadManager] = None
+_upload_manager_lock = threading.Lock()
+
+def get_resumable_upload_manager() -> ResumableUploadManager:
+    """Retrieves the resumable upload manager instance."""
+    global _upload_manager
+
+    with _upload_manager_lock:
+        if _upload_manager is None:
+            from config import uploads_config
+            _upload_manager = ResumableUploadManager(
+                upload_dir=uploads_config.get("resumable_dir", "uploads/resumable"),
+                ttl_hours=uploads_config.get("resumable_ttl_hours", 24)
+            )
+
+    return _upload_manager
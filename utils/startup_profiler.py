@@ -0,0 +1,142 @@
+"""
+Startup profiling for Cerastes API
+------------------------------------------
+This module measures the duration of the application startup phases
+and profiles module import times, to keep cold start under a defined budget.
+"""
+
+import re
+import sys
+import time
+import logging
+import subprocess
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("startup_profiler")
+
+# Line format of `python -X importtime`: "import time: self [us] | cumulative | imported package"
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+class StartupTimer:
+    """Records the duration of consecutive startup phases."""
+
+    def __init__(self):
+        """Starts the timer."""
+        self.started_at = time.perf_counter()
+        self.last_mark = self.started_at
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        """
+        Closes a phase: its duration is the time elapsed since the previous mark.
+
+        Args:
+            phase: Name of the phase that just ended
+
+        Returns:
+            Duration of the phase in seconds
+        """
+        now = time.perf_counter()
+        duration = now - self.last_mark
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+        self.last_mark = now
+        return duration
+
+    @property
+    def total(self) -> float:
+        """Total time elapsed between the start and the last mark."""
+        return self.last_mark - self.started_at
+
+    def report(self) -> str:
+        """Formats the phase durations, slowest first."""
+        phases = sorted(self.phases.items(), key=lambda x: x[1], reverse=True)
+        details = ", ".join(f"{name}={duration:.2f}s" for name, duration in phases)
+        return f"Startup timing report: total={self.total:.2f}s ({details})"
+
+    def check_budget(self, budget_seconds: Optional[float]) -> bool:
+        """
+        Checks the total startup time against a budget and logs a warning if exceeded.
+
+        Args:
+            budget_seconds: Maximum startup time (None or 0 disables the check)
+
+        Returns:
+            True if the startup time is within the budget
+        """
+        if not budget_seconds or self.total <= budget_seconds:
+            return True
+
+        logger.warning(f"Startup took {self.total:.2f}s, exceeding the budget of {budget_seconds:.2f}s")
+        return False
+
+def profile_imports(module: str = "main", top: int = 25) -> Dict[str, Any]:
+    """
+    Profiles the import of a module in a fresh interpreter with `-X importtime`.
+
+    Import time is aggregated by top-level package, so that heavy dependencies
+    pulled in transitively (torch, transformers, whisper...) stand out.
+
+    Args:
+        module: Module to import
+        top: Number of packages to return
+
+    Returns:
+        Dictionary with the total import time and the slowest packages
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+
+    packages: Dict[str, float] = {}
+    total_us = 0
+
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+
+        self_us = int(match.group(1))
+        package = match.group(4).split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+        total_us += self_us
+
+    slowest: List[Dict[str, Any]] = [
+        {"package": package, "seconds": round(us / 1e6, 3)}
+        for package, us in sorted(packages.items(), key=lambda x: x[1], reverse=True)[:top]
+    ]
+
+    return {
+        "module": module,
+        "success": process.returncode == 0,
+        "error": process.stderr.strip().splitlines()[-1] if process.returncode != 0 and process.stderr.strip() else None,
+        "total_seconds": round(total_us / 1e6, 3),
+        "packages": slowest
+    }
+
+def print_import_profile(profile: Dict[str, Any], budget_seconds: Optional[float] = None) -> bool:
+    """
+    Prints an import profile as a table.
+
+    Args:
+        profile: Result of profile_imports
+        budget_seconds: Import time budget (None or 0 disables the check)
+
+    Returns:
+        True if the import succeeded and stayed within the budget
+    """
+    print(f"Import profile of '{profile['module']}': {profile['total_seconds']:.3f}s")
+    print(f"{'package':<40} {'seconds':>10}")
+    for entry in profile["packages"]:
+        print(f"{entry['package']:<40} {entry['seconds']:>10.3f}")
+
+    if not profile["success"]:
+        print(f"Import failed: {profile['error']}")
+        return False
+
+    if budget_seconds and profile["total_seconds"] > budget_seconds:
+        print(f"Import time exceeds the budget of {budget_seconds:.2f}s")
+        return False
+
+    return True
@@ -0,0 +1,244 @@
+"""
+Upload deduplication index
+------------------------------------------
+This module indexes stored uploads by content hash. A new upload of known content
+is replaced by a hard link to the stored copy (no extra disk space, and deleting
+one upload never removes the other), and results computed for a content hash and
+a model configuration can be reused by later submissions of the same file.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("upload_index")
+
+class UploadIndex:
+    """Content hash -> stored file index, with the results computed for each file"""
+
+    def __init__(self, index_dir: str = "uploads/index", enabled: bool = True, reuse_results: bool = True,
+                 results_max_mb: float = 1024):
+        """
+        Initializes the index
+
+        Args:
+            index_dir: Directory of the index records and cached results
+            enabled: Whether uploads are deduplicated
+            reuse_results: Whether results of identical files are reused
+            results_max_mb: Total size above which the least recently used results are deleted
+        """
+        self.index_dir = Path(index_dir)
+        self.enabled = enabled
+        self.reuse_results = reuse_results
+        self.results_max_bytes = int(results_max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        # Cached results (file name -> size in bytes), least recently used first
+        self._results: "OrderedDict[str, int]" = OrderedDict()
+        self._results_size = 0
+        self.stats = {"deduplicated": 0, "bytes_saved": 0, "result_hits": 0, "result_misses": 0, "results_evicted": 0}
+
+        if self.enabled:
+            (self.index_dir / "results").mkdir(parents=True, exist_ok=True)
+            self._load_results()
+
+    def deduplicate(self, path: str, content_hash: str) -> Optional[str]:
+        """
+        Indexes a newly stored file, or replaces it with a link to a stored file of identical content
+
+        Args:
+            path: Path to the newly stored file
+            content_hash: SHA-256 of the file
+
+        Returns:
+            Path of the stored file the new one now shares its content with, or None if the content is new
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            record = self._load_record(content_hash)
+            size = os.path.getsize(path)
+
+            if record and record["path"] != path and self._is_same_content(record["path"], size):
+                try:
+                    linked_path = f"{path}.link"
+                    os.link(record["path"], linked_path)
+                    os.replace(linked_path, path)
+                except OSError as e:
+                    # e.g. uploads on another filesystem: keep the new copy
+                    logger.warning(f"Unable to deduplicate {path} against {record['path']}: {str(e)}")
+                    return None
+
+                self.stats["deduplicated"] += 1
+                self.stats["bytes_saved"] += size
+                logger.info(f"Upload {path} deduplicated against {record['path']}")
+                return record["path"]
+
+            # New content, or the stored copy was deleted: this file becomes the reference
+            self._save_record(content_hash, {"path": path, "size_bytes": size, "created_at": time.time()})
+            return None
+
+    def get_reference(self, content_hash: str) -> Optional[str]:
+        """Gets the path of the stored copy of a content, if still present"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            record = self._load_record(content_hash)
+        if record and os.path.exists(record["path"]):
+            return record["path"]
+        return None
+
+    def get_result(self, content_hash: str, kind: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Gets a result previously computed for a file content and a model configuration
+
+        Args:
+            content_hash: SHA-256 of the processed file
+            kind: Type of processing (e.g. 'transcription', 'video_extraction')
+            params: Parameters that change the result (model, options)
+
+        Returns:
+            Cached result, or None
+        """
+        if not (self.enabled and self.reuse_results and content_hash):
+            return None
+
+        path = self._result_path(content_hash, kind, params)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)["result"]
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.stats["result_misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["result_hits"] += 1
+            if path.name in self._results:
+                self._results.move_to_end(path.name)
+        try:
+            # The modification time orders the results again after a restart
+            os.utime(path)
+        except OSError:
+            pass
+
+        return result
+
+    def put_result(self, content_hash: str, kind: str, params: Dict[str, Any], result: Any):
+        """
+        Stores the result computed for a file content and a model configuration, evicting
+        the least recently used results beyond uploads.results_max_mb
+
+        Args:
+            content_hash: SHA-256 of the processed file
+            kind: Type of processing
+            params: Parameters that change the result
+            result: JSON-serializable result
+        """
+        if not (self.enabled and self.reuse_results and content_hash):
+            return
+
+        path = self._result_path(content_hash, kind, params)
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"kind": kind, "params": params, "created_at": time.time(), "result": result}, f)
+            size = temp_path.stat().st_size
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Unable to store {kind} result of {content_hash[:12]}: {str(e)}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._results_size += size - self._results.pop(path.name, 0)
+            self._results[path.name] = size
+            self._evict_results()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets deduplication statistics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "reuse_results": self.reuse_results,
+                "results": len(self._results),
+                "results_size_mb": round(self._results_size / (1024 * 1024), 2),
+                "results_max_mb": round(self.results_max_bytes / (1024 * 1024), 2),
+                **self.stats
+            }
+
+    def _evict_results(self):
+        """Deletes the least recently used results until they fit (lock must be held)"""
+        while self._results_size > self.results_max_bytes and len(self._results) > 1:
+            name, size = self._results.popitem(last=False)
+            self._results_size -= size
+            (self.index_dir / "results" / name).unlink(missing_ok=True)
+            self.stats["results_evicted"] += 1
+
+    def _load_results(self):
+        """Indexes the results kept from previous runs, oldest use first"""
+        results = []
+        for path in (self.index_dir / "results").glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            results.append((stat.st_mtime, path.name, stat.st_size))
+
+        with self._lock:
+            for _, name, size in sorted(results):
+                self._results[name] = size
+                self._results_size += size
+            self._evict_results()
+
+    def _is_same_content(self, stored_path: str, size: int) -> bool:
+        """Checks that the indexed copy still exists with the expected size"""
+        try:
+            return os.path.getsize(stored_path) == size
+        except OSError:
+            return False
+
+    def _load_record(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Loads the index record of a content hash (lock must be held)"""
+        try:
+            with open(self.index_dir / f"{content_hash}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save_record(self, content_hash: str, record: Dict[str, Any]):
+        """Stores the index record of a content hash (lock must be held)"""
+        with open(self.index_dir / f"{content_hash}.json", "w", encoding="utf-8") as f:
+            json.dump(record, f)
+
+    def _result_path(self, content_hash: str, kind: str, params: Dict[str, Any]) -> Path:
+        """Path of a cached result"""
+        params_key = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return self.index_dir / "results" / f"{content_hash}_{kind}_{params_key}.json"
+
+# Global instance, created on first use
+_upload_index: Optional[UploadIndex] = None
+_upload_index_lock = threading.Lock()
+
+def get_upload_index() -> UploadIndex:
+    """Retrieves the upload index instance."""
+    global _upload_index
+
+    with _upload_index_lock:
+        if _upload_index is None:
+            from config import uploads_config
+            _upload_index = UploadIndex(
+                index_dir=uploads_config.get("index_dir", "uploads/index"),
+                enabled=uploads_config.get("dedup_enabled", True),
+                reuse_results=uploads_config.get("reuse_results", True),
+                results_max_mb=uploads_config.get("results_max_mb", 1024)
+            )
+
+    return _upload_index
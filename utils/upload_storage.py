@@ -0,0 +1,171 @@
+"""
+Streaming storage of uploaded files
+------------------------------------------
+This module copies uploaded files to disk in fixed-size chunks, hashing them and
+enforcing the size limit on the fly, so that the memory used by an upload does
+not depend on the size of the file. Stored files can be registered under a file
+ID, which the analysis and transcription endpoints accept instead of a new upload.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+# The hash memo has no web dependency, so that the model layer can use it too
+from .file_hashes import DEFAULT_CHUNK_SIZE, remember_file_hash, get_known_file_hash, get_file_hash
+
+logger = logging.getLogger("upload_storage")
+
+async def stream_upload_to_disk(file: UploadFile, destination: str, max_size_mb: Optional[float] = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Writes an uploaded file to disk chunk by chunk
+
+    The file is written next to its destination and renamed once complete, so that
+    a partially received upload is never visible under its final name.
+
+    Args:
+        file: Uploaded file
+        destination: Final path of the file
+        max_size_mb: Maximum size of the file (None or 0 = no limit)
+        chunk_size: Size of the chunks read and written
+
+    Returns:
+        Dictionary with the path, the size in bytes and the SHA-256 of the file
+
+    Raises:
+        HTTPException: 413 if the file exceeds the size limit
+    """
+    max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+
+    # Reject early when the client announced the size
+    announced_size = getattr(file, "size", None)
+    if max_size_bytes and announced_size and announced_size > max_size_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds the maximum size of {max_size_mb} MB")
+
+    partial_path = f"{destination}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(partial_path, "wb") as out_file:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if max_size_bytes and size > max_size_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the maximum size of {max_size_mb} MB")
+
+                digest.update(chunk)
+                await out_file.write(chunk)
+
+        os.replace(partial_path, destination)
+    except BaseException:
+        # Also covers client disconnections and cancelled requests
+        try:
+            os.unlink(partial_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    content_hash = digest.hexdigest()
+
+    # Known content is replaced by a link to the stored copy
+    from .upload_index import get_upload_index
+    deduplicated_from = get_upload_index().deduplicate(destination, content_hash)
+
+    remember_file_hash(destination, content_hash)
+    logger.debug(f"Stored upload {destination} ({size} bytes, sha256 {content_hash[:12]})")
+
+    return {
+        "path": destination,
+        "size_bytes": size,
+        "sha256": content_hash,
+        "deduplicated_from": deduplicated_from
+    }
+
+def get_max_upload_size_mb(filename: str) -> Optional[float]:
+    """Gets the size limit of an upload: the audio limit for audio files, the video limit otherwise"""
+    from config import audio_config, video_config
+
+    extension = os.path.splitext(filename)[1].lower()
+    limits_config = audio_config if extension in audio_config.get("allowed_extensions", []) else video_config
+    return limits_config.get("max_upload_size_mb")
+
+def _file_record_path(file_id: str) -> Path:
+    """Path of the record of a stored file"""
+    from config import uploads_config
+
+    # File IDs are generated UUIDs: anything else cannot name a record
+    try:
+        file_id = uuid.UUID(file_id).hex
+    except (ValueError, AttributeError, TypeError):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return Path(uploads_config.get("files_dir", "uploads/files")) / f"{file_id}.json"
+
+def register_stored_file(path: str, filename: str, user_id: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Registers a stored file under a new file ID
+
+    Args:
+        path: Path to the stored file
+        filename: Original name of the file
+        user_id: Owner of the file
+        content_hash: SHA-256 of the file (computed if not provided)
+
+    Returns:
+        File record
+    """
+    file_id = uuid.uuid4().hex
+    record = {
+        "file_id": file_id,
+        "path": path,
+        "filename": filename,
+        "size_bytes": os.path.getsize(path),
+        "sha256": content_hash or get_file_hash(path),
+        "user_id": user_id,
+        "created_at": time.time()
+    }
+
+    record_path = _file_record_path(file_id)
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(record_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+    return record
+
+def resolve_file_id(file_id: str, user_id: str) -> Dict[str, Any]:
+    """
+    Gets the record of a stored file owned by a user
+
+    Args:
+        file_id: File identifier
+        user_id: User requesting the file
+
+    Returns:
+        File record
+
+    Raises:
+        HTTPException: 404 if the file does not exist, is not owned by the user or was deleted
+    """
+    try:
+        with open(_file_record_path(file_id), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if record.get("user_id") != user_id or not os.path.exists(record["path"]):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return record
@@ -13,6 +13,9 @@ from pathlib import Path
 
 # Par:
 from video_models import extract_video_content, analyze_manipulation_strategies, extract_nonverbal, analyze_nonverbal
+from video_models.video_probe import VideoProbeError, forget_video_metadata, probe_uploaded_video
+from utils.upload_storage import stream_upload_to_disk, get_file_hash
+from config import video_config
 
 # Import des dépendances d'authentification
 from auth import validate_api_key, authorize_advanced_models
@@ -73,10 +76,16 @@ async def save_uploaded_video(file: UploadFile) -> str:
     filename = f"{uuid.uuid4().hex}{file_extension}"
     file_path = UPLOAD_DIR / filename
     
-    # Sauvegarder le fichier
-    async with aiofiles.open(file_path, "wb") as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    # Sauvegarder le fichier par blocs (hash et taille maximale vérifiés au fil de l'eau)
+    await stream_upload_to_disk(file, str(file_path), max_size_mb=video_config.get("max_upload_size_mb"))
+    
+    # Sonder la vidéo dès l'upload : les fichiers corrompus ou trop longs sont rejetés avant tout travail GPU
+    try:
+        await probe_uploaded_video(str(file_path))
+    except VideoProbeError as e:
+        forget_video_metadata(str(file_path))
+        os.unlink(file_path)
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     
     return str(file_path)
 
@@ -252,6 +261,7 @@ async def start_manipulation_analysis(
         "status": "pending",
         "video_path": video_path,
         "filename": file.filename,
+        "content_hash": get_file_hash(video_path),
         "created_at": time.time(),
         "keep_video": keep_video,
         "message": "Task queued",
@@ -321,6 +331,7 @@ async def start_nonverbal_analysis(
         "status": "pending",
         "video_path": video_path,
         "filename": file.filename,
+        "content_hash": get_file_hash(video_path),
         "created_at": time.time(),
         "keep_video": keep_video,
         "message": "Task queued",
@@ -392,6 +403,7 @@ async def get_video_task_status(
         "message": task_info.get("message"),
         "progress": task_info.get("progress", 0),
         "filename": task_info.get("filename"),
+        "content_hash": task_info.get("content_hash"),
         "created_at": task_info.get("created_at"),
         "started_at": task_info.get("started_at"),
         "completed_at": task_info.get("completed_at")
@@ -1,6 +1,8 @@
 from .video_utils import (
     extract_video_content,
     extract_nonverbal,
+    extract_video_windows,
     analyze_nonverbal,
     analyze_manipulation_strategies
-)
\ No newline at end of file
+)
+from .frame_prefetcher import get_frame_prefetcher
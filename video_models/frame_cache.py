@@ -0,0 +1,188 @@
+"""
+Content-addressed cache of sampled video frames
+------------------------------------------
+This module stores the sampled frames of a video on disk, keyed by the video content
+hash and the sampling parameters, so that repeat analyses of the same upload skip decoding.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import numpy as np
+
+from utils.file_hashes import get_file_hash
+
+logger = logging.getLogger("video_frame_cache")
+
+class FrameCache:
+    """Size-bounded LRU disk cache of decoded frames, memory-mapped on read"""
+
+    def __init__(self, cache_dir: str = "cache/frames", max_size_mb: int = 4096, enabled: bool = True):
+        """
+        Initializes the cache
+
+        Args:
+            cache_dir: Directory of the cached frame arrays
+            max_size_mb: Maximum total size of the cache, least recently used entries are evicted beyond
+            enabled: Whether the cache is used
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def file_hash(self, path: str) -> str:
+        """
+        Computes the SHA-256 of a file (reusing the hash computed at upload time if any)
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            Hexadecimal digest
+        """
+        return get_file_hash(path)
+
+    def make_key(self, video_path: str, num_segments: Optional[int], input_size: int,
+                 sampling: str, **params) -> str:
+        """
+        Builds the cache key of a sampled video
+
+        Args:
+            video_path: Path to the video
+            num_segments: Requested number of frames (None = dynamic)
+            input_size: Model input resolution
+            sampling: Resolved sampling strategy
+            **params: Other parameters affecting the selected frames (e.g. scene thresholds)
+
+        Returns:
+            Cache key
+        """
+        extra = ",".join(f"{k}={params[k]}" for k in sorted(params))
+        description = f"{self.file_hash(video_path)}:{num_segments or 'auto'}:{sampling}:{input_size}:{extra}"
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Gets cached frames
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Copy-on-write memory map of the uint8 frames, or None if absent
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            frames = np.load(path, mmap_mode="c")
+            os.utime(path)  # LRU: the modification time is the last access time
+            self.stats["hits"] += 1
+            return frames
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable frame cache entry {path}, ignoring it: {str(e)}")
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, frames: np.ndarray):
+        """
+        Stores frames in the cache
+
+        Args:
+            key: Cache key
+            frames: uint8 array of decoded frames
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        temp_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp.npy")
+
+        try:
+            stored = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8, shape=frames.shape)
+            stored[:] = frames
+            stored.flush()
+            del stored
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Unable to store frames in cache: {str(e)}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return
+
+        self._evict()
+
+    def clear(self):
+        """Removes every cached entry"""
+        with self._lock:
+            for path in self.cache_dir.glob("*.npy"):
+                path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets cache statistics"""
+        entries = list(self.cache_dir.glob("*.npy")) if self.enabled else []
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_mb": round(sum(p.stat().st_size for p in entries) / (1024 * 1024), 2),
+            "max_size_mb": self.max_size_bytes // (1024 * 1024),
+            **self.stats
+        }
+
+    def _path(self, key: str) -> Path:
+        """Path of a cache entry"""
+        return self.cache_dir / f"{key}.npy"
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache fits its size bound"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.npy"):
+                if path.name.endswith(".tmp.npy"):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total_size -= size
+                self.stats["evictions"] += 1
+                logger.debug(f"Evicted frame cache entry {path.name}")
+
+# Global instance, created on first use
+_frame_cache: Optional[FrameCache] = None
+_frame_cache_lock = threading.Lock()
+
+def get_frame_cache() -> FrameCache:
+    """Retrieves the frame cache instance."""
+    global _frame_cache
+
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            from config import video_config
+            _frame_cache = FrameCache(
+                cache_dir=video_config.get("frame_cache_dir", "cache/frames"),
+                max_size_mb=video_config.get("frame_cache_max_size_mb", 4096),
+                enabled=video_config.get("frame_cache_enabled", True)
+            )
+
+    return _frame_cache
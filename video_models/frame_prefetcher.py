@@ -0,0 +1,203 @@
+"""
+Frame prefetching for video inference
+------------------------------------------
+This module decodes and preprocesses the frames of queued videos in a worker pool,
+so that the next job's pixel values are ready when the current model.chat returns.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Optional, Callable, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger("video_prefetcher")
+
+class FramePrefetcher:
+    """Bounded queue of decoded, normalized frame tensors filled ahead of inference"""
+
+    def __init__(self, num_workers: int = 2, queue_size: int = 2, ttl_seconds: float = 600):
+        """
+        Initializes the prefetcher
+
+        Args:
+            num_workers: Worker threads decoding videos (decord and torch release the GIL)
+            queue_size: Maximum number of videos decoded ahead or in flight
+            ttl_seconds: Prefetched frames never consumed are dropped after this delay
+        """
+        self.queue_size = max(1, queue_size)
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="frame-prefetch")
+        self._lock = threading.Lock()
+        self._waiting: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._active: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"prefetched": 0, "hits": 0, "misses": 0, "expired": 0}
+
+    def prefetch(self, video_path: str, num_segments: Optional[int] = None, input_size: int = 448,
+                 sampling: Optional[str] = None):
+        """
+        Queues a video for ahead-of-time decoding
+
+        Decoding starts immediately if the bounded queue has room, otherwise as soon as
+        a previously prefetched video is consumed.
+
+        Args:
+            video_path: Path to the video
+            num_segments: Number of frames to sample (None = dynamic, based on duration)
+            input_size: Model input resolution
+            sampling: Frame sampling strategy (None = configured default)
+        """
+        key = (video_path, num_segments, input_size, sampling)
+
+        with self._lock:
+            if key not in self._waiting and key not in self._active:
+                self._waiting[key] = {"queued_at": time.time()}
+
+        self._dispatch()
+
+    def get(self, video_path: str, num_segments: Optional[int] = None, input_size: int = 448,
+            progress: Optional[Callable] = None, sampling: Optional[str] = None) -> Tuple["torch.Tensor", List[int]]:
+        """
+        Gets the preprocessed frames of a video, waiting for its prefetch if one is in flight
+
+        Args:
+            video_path: Path to the video
+            num_segments: Number of frames to sample (None = dynamic, based on duration)
+            input_size: Model input resolution
+            progress: Progress tracking function (used only when decoding on demand)
+            sampling: Frame sampling strategy (None = configured default)
+
+        Returns:
+            Tuple (pixel_values, num_patches_list) as returned by load_video
+        """
+        key = (video_path, num_segments, input_size, sampling)
+
+        with self._lock:
+            entry = self._active.pop(key, None)
+            self._waiting.pop(key, None)
+
+        # The consumed slot is freed: start decoding the next queued video right away
+        self._dispatch()
+
+        if entry is not None:
+            self.stats["hits"] += 1
+            if progress:
+                progress(0.1, desc="Waiting for prefetched video frames...")
+            return entry["future"].result()
+
+        self.stats["misses"] += 1
+        return self._decode(video_path, num_segments, input_size, sampling, progress)
+
+    def discard(self, video_path: str, num_segments: Optional[int] = None, input_size: int = 448,
+                sampling: Optional[str] = None):
+        """Drops a queued or prefetched video (e.g. when its task is cancelled or failed)"""
+        key = (video_path, num_segments, input_size, sampling)
+
+        with self._lock:
+            self._waiting.pop(key, None)
+            entry = self._active.pop(key, None)
+
+        if entry is not None:
+            entry["future"].cancel()
+
+        self._dispatch()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Gets the prefetch queue status"""
+        with self._lock:
+            return {
+                "waiting": len(self._waiting),
+                "active": len(self._active),
+                "ready": sum(1 for e in self._active.values() if e["future"].done()),
+                "queue_size": self.queue_size,
+                **self.stats
+            }
+
+    def shutdown(self):
+        """Stops the worker pool and drops every prefetched video"""
+        with self._lock:
+            self._waiting.clear()
+            self._active.clear()
+        self._executor.shutdown(wait=False)
+
+    def _dispatch(self):
+        """Starts decoding queued videos while the bounded queue has room"""
+        with self._lock:
+            self._expire()
+
+            while self._waiting and len(self._active) < self.queue_size:
+                key, entry = self._waiting.popitem(last=False)
+                entry["future"] = self._executor.submit(self._decode, *key)
+                entry["started_at"] = time.time()
+                self._active[key] = entry
+                self.stats["prefetched"] += 1
+
+    def _expire(self):
+        """Drops prefetched videos that were never consumed (lock must be held)"""
+        now = time.time()
+        for key in [k for k, e in self._active.items() if now - e["started_at"] > self.ttl_seconds]:
+            self._active.pop(key)["future"].cancel()
+            self.stats["expired"] += 1
+            logger.info(f"Prefetched frames for {key[0]} expired without being used")
+
+    def _decode(self, video_path: str, num_segments: Optional[int], input_size: int,
+                sampling: Optional[str] = None, progress: Optional[Callable] = None) -> Tuple["torch.Tensor", List[int]]:
+        """Decodes and preprocesses the frames of a video, reusing cached frames of identical content"""
+        from .video_utils import decode_video_frames, frames_to_pixel_values, get_dynamic_segments, resolve_sampling
+        from .frame_cache import get_frame_cache
+
+        start = time.time()
+        sampling = resolve_sampling(sampling)
+        frame_cache = get_frame_cache()
+        cache_key = None
+
+        if frame_cache.enabled:
+            cache_key = frame_cache.make_key(video_path, num_segments, input_size, sampling,
+                                             **self._sampling_params(sampling))
+            frames = frame_cache.get(cache_key)
+            if frames is not None:
+                logger.debug(f"Frames of {video_path} served from cache")
+                return frames_to_pixel_values(frames, input_size=input_size, progress=progress)
+
+        if num_segments is None:
+            num_segments = get_dynamic_segments(video_path, sampling=sampling)
+
+        frames = decode_video_frames(video_path, num_segments=num_segments, input_size=input_size,
+                                     progress=progress, sampling=sampling)
+        logger.debug(f"Decoded {len(frames)} frames of {video_path} in {time.time() - start:.2f}s")
+
+        if cache_key is not None:
+            frame_cache.put(cache_key, frames)
+
+        return frames_to_pixel_values(frames, input_size=input_size, progress=progress)
+
+    def _sampling_params(self, sampling: str) -> Dict[str, Any]:
+        """Configuration values that change the frames selected by a sampling strategy"""
+        from config import video_config
+
+        if sampling != "scene":
+            return {}
+        return {k: video_config.get(k) for k in ("scene_threshold", "scene_max_gap_seconds", "scene_min_frames")}
+
+# Global instance, created on first use
+_frame_prefetcher: Optional[FramePrefetcher] = None
+_frame_prefetcher_lock = threading.Lock()
+
+def get_frame_prefetcher() -> FramePrefetcher:
+    """Retrieves the frame prefetcher instance."""
+    global _frame_prefetcher
+
+    with _frame_prefetcher_lock:
+        if _frame_prefetcher is None:
+            from config import video_config
+            _frame_prefetcher = FramePrefetcher(
+                num_workers=video_config.get("prefetch_workers", 2),
+                queue_size=video_config.get("prefetch_queue_size", 2),
+                ttl_seconds=video_config.get("prefetch_ttl_seconds", 600)
+            )
+
+    return _frame_prefetcher
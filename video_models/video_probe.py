@@ -0,0 +1,245 @@
+"""
+Video metadata probing
+------------------------------------------
+This module reads the metadata of an uploaded video (fps, frame count, duration,
+resolution, keyframe index) once, stores it next to the upload and shares it with
+every downstream stage, so that the file is not re-opened by each of them.
+"""
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("video_probe")
+
+# Suffix of the metadata record stored next to each uploaded video
+METADATA_SUFFIX = ".meta.json"
+
+# Rough CPU decode throughput used by the cost estimate (frames per second, random access)
+DECODE_FRAMES_PER_SECOND = 25.0
+
+class VideoProbeError(ValueError):
+    """Raised when a video is corrupt, unsupported or exceeds the configured limits"""
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+_metadata_cache: Dict[str, Dict[str, Any]] = {}
+_metadata_lock = threading.Lock()
+
+def probe_video(video_path: str) -> Dict[str, Any]:
+    """
+    Opens a video once and reads its metadata
+
+    Args:
+        video_path: Path to the video
+
+    Returns:
+        Dictionary with fps, frame_count, duration, width, height, keyframes and size_bytes
+
+    Raises:
+        VideoProbeError: If the file cannot be opened or decoded
+    """
+    from decord import VideoReader, cpu
+
+    try:
+        vr = VideoReader(video_path, ctx=cpu(0))
+        frame_count = len(vr)
+        fps = float(vr.get_avg_fps())
+        if frame_count <= 0 or fps <= 0:
+            raise ValueError("no decodable video stream")
+
+        # Decoding the first frame both gives the resolution and checks the stream is readable
+        height, width = vr[0].shape[:2]
+        keyframes = [int(i) for i in vr.get_key_indices()]
+    except VideoProbeError:
+        raise
+    except Exception as e:
+        raise VideoProbeError(f"Corrupt or unsupported video: {str(e)}")
+
+    return {
+        "fps": fps,
+        "frame_count": frame_count,
+        "duration": frame_count / fps,
+        "width": int(width),
+        "height": int(height),
+        "keyframes": keyframes,
+        "size_bytes": os.path.getsize(video_path)
+    }
+
+def validate_video_metadata(metadata: Dict[str, Any]):
+    """
+    Checks the metadata of a video against the configured upload limits
+
+    Args:
+        metadata: Result of probe_video
+
+    Raises:
+        VideoProbeError: If the video is too large or too long
+    """
+    from config import video_config
+
+    max_size_mb = video_config.get("max_upload_size_mb")
+    if max_size_mb and metadata["size_bytes"] > max_size_mb * 1024 * 1024:
+        raise VideoProbeError(f"Video exceeds the maximum size of {max_size_mb} MB", status_code=413)
+
+    max_duration = video_config.get("max_duration_seconds")
+    if max_duration and metadata["duration"] > max_duration:
+        raise VideoProbeError(
+            f"Video lasts {metadata['duration']:.0f}s, more than the maximum of {max_duration}s",
+            status_code=413
+        )
+
+def get_video_metadata(video_path: str) -> Dict[str, Any]:
+    """
+    Gets the metadata of a video, probing it only if no record exists yet
+
+    The record is kept in memory and stored next to the video, so that it survives
+    restarts and is shared by every stage (sampling, decoding, cost estimation).
+
+    Args:
+        video_path: Path to the video
+
+    Returns:
+        Video metadata (see probe_video)
+    """
+    stat = os.stat(video_path)
+    cache_key = os.path.abspath(video_path)
+
+    with _metadata_lock:
+        metadata = _metadata_cache.get(cache_key)
+    if metadata and metadata["size_bytes"] == stat.st_size and metadata.get("mtime") == stat.st_mtime:
+        return metadata
+
+    record_path = video_path + METADATA_SUFFIX
+    metadata = None
+    try:
+        with open(record_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("size_bytes") != stat.st_size or metadata.get("mtime") != stat.st_mtime:
+            metadata = None
+    except (FileNotFoundError, ValueError):
+        metadata = None
+
+    if metadata is None:
+        metadata = _find_shared_metadata(video_path, stat)
+        if metadata is None:
+            metadata = probe_video(video_path)
+            metadata["mtime"] = stat.st_mtime
+        try:
+            with open(record_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+        except OSError as e:
+            logger.warning(f"Unable to store metadata record of {video_path}: {str(e)}")
+
+    with _metadata_lock:
+        _metadata_cache[cache_key] = metadata
+    return metadata
+
+async def probe_uploaded_video(video_path: str) -> Dict[str, Any]:
+    """
+    Gets and validates the metadata of an uploaded video from an async handler
+
+    The first probe opens the file with decord and indexes its key frames, so it runs
+    in the default executor instead of blocking the event loop.
+
+    Args:
+        video_path: Path to the video
+
+    Returns:
+        Video metadata (see probe_video)
+
+    Raises:
+        VideoProbeError: If the video cannot be decoded or exceeds the limits
+    """
+    metadata = await asyncio.get_running_loop().run_in_executor(None, get_video_metadata, video_path)
+    validate_video_metadata(metadata)
+    return metadata
+
+def _find_shared_metadata(video_path: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+    """
+    Gets the metadata record of a stored file sharing the content of a deduplicated upload
+
+    Args:
+        video_path: Path to the video
+        stat: Status of the video file
+
+    Returns:
+        Metadata record, or None if the video is not a known duplicate
+    """
+    from utils.file_hashes import get_known_file_hash
+    from utils.upload_index import get_upload_index
+
+    # Only hashes computed at upload time are used: hashing here would cost more than probing
+    content_hash = get_known_file_hash(video_path)
+    reference_path = get_upload_index().get_reference(content_hash) if content_hash else None
+    if not reference_path or os.path.abspath(reference_path) == os.path.abspath(video_path):
+        return None
+
+    try:
+        with open(reference_path + METADATA_SUFFIX, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    # Hard links share size and modification time: the record stays valid for the new path
+    if metadata.get("size_bytes") != stat.st_size or metadata.get("mtime") != stat.st_mtime:
+        return None
+    return metadata
+
+def forget_video_metadata(video_path: str):
+    """Drops the metadata record and the content hash of a deleted video"""
+    from utils.file_hashes import forget_file_hash
+
+    forget_file_hash(video_path)
+    with _metadata_lock:
+        _metadata_cache.pop(os.path.abspath(video_path), None)
+
+    try:
+        os.unlink(video_path + METADATA_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+def summarize_video_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact view of the metadata for task records and API responses (no keyframe list)"""
+    return {
+        "fps": round(metadata["fps"], 3),
+        "frame_count": metadata["frame_count"],
+        "duration": round(metadata["duration"], 2),
+        "width": metadata["width"],
+        "height": metadata["height"],
+        "keyframe_count": len(metadata.get("keyframes", [])),
+        "size_bytes": metadata["size_bytes"]
+    }
+
+def estimate_video_cost(metadata: Dict[str, Any], sampling: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Estimates the processing cost of a video from its metadata, for task scheduling
+
+    Args:
+        metadata: Video metadata
+        sampling: Frame sampling strategy (None = configured default)
+
+    Returns:
+        Dictionary with the number of sampled frames and the estimated decode time
+    """
+    from .video_utils import get_segments_for_duration, resolve_sampling
+
+    sampling = resolve_sampling(sampling)
+    frames = get_segments_for_duration(metadata["duration"])
+    if sampling == "keyframe" and metadata.get("keyframes"):
+        frames = min(frames, len(metadata["keyframes"]))
+
+    # Uniform seeks decode from the previous keyframe: cost grows with the keyframe interval
+    frames_per_sample = 1.0
+    if sampling != "keyframe" and metadata.get("keyframes"):
+        frames_per_sample = max(1.0, metadata["frame_count"] / len(metadata["keyframes"]) / 2)
+
+    return {
+        "frames": frames,
+        "sampling": sampling,
+        "estimated_decode_seconds": round(frames * frames_per_sample / DECODE_FRAMES_PER_SECOND, 2)
+    }
@@ -0,0 +1,259 @@
+"""
+Multi-question video sessions
+------------------------------------------
+This module decodes a video and runs InternVideo's vision tower once, then keeps the
+visual features under a session ID so that several prompts (manipulation extraction,
+nonverbal extraction, ad-hoc follow-ups) reuse them through model.chat history.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger("video_session")
+
+class SessionNotFoundError(KeyError):
+    """Raised when a video session does not exist or has expired"""
+
+class VideoSessionManager:
+    """Keeps the visual features of analyzed videos for follow-up questions"""
+
+    def __init__(self, session_dir: str = "cache/video_sessions", max_resident: int = 4,
+                 ttl_seconds: float = 3600):
+        """
+        Initializes the session manager
+
+        Args:
+            session_dir: Directory where features of non-resident sessions are offloaded
+            max_resident: Sessions whose features are kept in host memory, the least recently used are offloaded to disk
+            ttl_seconds: Sessions unused for this long are deleted
+        """
+        self.session_dir = Path(session_dir)
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.max_resident = max(1, max_resident)
+        self.ttl_seconds = ttl_seconds
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def create_session(self, video_path: str, user_id: str, sampling: Optional[str] = None,
+                       progress: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Decodes a video and encodes its frames once
+
+        Args:
+            video_path: Path to the video
+            user_id: Owner of the session
+            sampling: Frame sampling strategy (None = configured default)
+            progress: Progress tracking function
+
+        Returns:
+            Session information
+        """
+        import torch
+        from .video_utils import load_internvideo_model
+        from .frame_prefetcher import get_frame_prefetcher
+
+        model, _ = load_internvideo_model()
+        if model is None:
+            raise Exception("Failed to load InternVideo model")
+
+        pixel_values, num_patches_list = get_frame_prefetcher().get(video_path, progress=progress, sampling=sampling)
+        pixel_values = pixel_values.to(torch.bfloat16)
+
+        if progress:
+            progress(0.6, desc="Encoding video frames...")
+
+        # Run the vision tower once; models without extract_feature keep the pixel values instead
+        if hasattr(model, "extract_feature"):
+            with torch.no_grad():
+                features = model.extract_feature(pixel_values.to(model.device)).cpu()
+            feature_kind = "visual_features"
+        else:
+            features = pixel_values
+            feature_kind = "pixel_values"
+
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        session = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "video_path": video_path,
+            "sampling": sampling,
+            "num_patches_list": num_patches_list,
+            "feature_kind": feature_kind,
+            "features": features,
+            "history": None,
+            "turns": [],
+            "created_at": now,
+            "last_used": now
+        }
+
+        with self._lock:
+            self._expire()
+            self.sessions[session_id] = session
+            self._offload_lru()
+
+        logger.info(f"Video session {session_id} created ({len(num_patches_list)} frames, {feature_kind})")
+        return self.get_session_info(session_id, user_id)
+
+    def ask(self, session_id: str, user_id: str, question: str, first_prompt_prefix: bool = True,
+            max_new_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Asks a question about the video of a session, reusing its visual features
+
+        Args:
+            session_id: Session identifier
+            user_id: User asking (must own the session)
+            question: Prompt to run
+            first_prompt_prefix: Prefix the first question with the frame placeholders
+            max_new_tokens: Generation budget (None = configured default)
+
+        Returns:
+            Dictionary with the answer and the turn number
+        """
+        import torch
+        from config import video_config
+        from .video_utils import load_internvideo_model
+
+        with self._lock:
+            session = self._get(session_id, user_id)
+            features = self._load_features(session)
+
+        model, tokenizer = load_internvideo_model()
+        if model is None:
+            raise Exception("Failed to load InternVideo model")
+
+        num_patches_list = session["num_patches_list"]
+        generation_config = dict(
+            do_sample=True,
+            temperature=0.53,
+            max_new_tokens=max_new_tokens or video_config.get("session_max_new_tokens", 4096),
+            top_p=0.93,
+            top_k=30,
+        )
+
+        # Only the first turn carries the frame placeholders: later turns find them in the history
+        prompt = question
+        if session["history"] is None and first_prompt_prefix:
+            prompt = "".join([f"Frame {i+1}: <image>\n" for i in range(len(num_patches_list))]) + question
+
+        if len(features) != sum(num_patches_list):
+            raise ValueError(
+                f"Video session {session_id} has {len(features)} encoded patches for {sum(num_patches_list)} frame patches"
+            )
+
+        features = features.to(model.device)
+        if session["feature_kind"] == "visual_features":
+            # generate() only fills the image tokens when pixel_values is set; it then uses
+            # visual_features instead of running the vision tower. The features have one row
+            # per patch, like the pixel values, so they also satisfy chat()'s length check.
+            generation_config["visual_features"] = features
+        pixel_values = features
+
+        with torch.no_grad():
+            answer, history = model.chat(
+                tokenizer, pixel_values, prompt, generation_config,
+                num_patches_list=num_patches_list,
+                history=session["history"], return_history=True
+            )
+
+        with self._lock:
+            session["history"] = history
+            session["turns"].append({"question": question, "answer": answer, "at": time.time()})
+            session["last_used"] = time.time()
+            self.sessions.move_to_end(session_id)
+
+        return {"session_id": session_id, "turn": len(session["turns"]), "answer": answer}
+
+    def get_session_info(self, session_id: str, user_id: str) -> Dict[str, Any]:
+        """Gets the public information of a session"""
+        with self._lock:
+            session = self._get(session_id, user_id)
+            return {
+                "session_id": session_id,
+                "video_path": session["video_path"],
+                "frames": len(session["num_patches_list"]),
+                "feature_kind": session["feature_kind"],
+                "resident": session["features"] is not None,
+                "turns": [{"question": t["question"], "answer": t["answer"]} for t in session["turns"]],
+                "created_at": session["created_at"],
+                "last_used": session["last_used"]
+            }
+
+    def delete_session(self, session_id: str, user_id: str) -> bool:
+        """Deletes a session and its offloaded features"""
+        with self._lock:
+            self._get(session_id, user_id)
+            self._drop(session_id)
+        return True
+
+    def _get(self, session_id: str, user_id: str) -> Dict[str, Any]:
+        """Gets a session owned by a user (lock must be held)"""
+        self._expire()
+        session = self.sessions.get(session_id)
+        if session is None or session["user_id"] != user_id:
+            raise SessionNotFoundError(session_id)
+        return session
+
+    def _load_features(self, session: Dict[str, Any]):
+        """Gets the features of a session, reloading them from disk if offloaded (lock must be held)"""
+        import torch
+
+        if session["features"] is None:
+            session["features"] = torch.load(self._features_path(session["session_id"]))
+            self.sessions.move_to_end(session["session_id"])
+            self._offload_lru()
+        return session["features"]
+
+    def _offload_lru(self):
+        """Offloads features of the least recently used sessions beyond max_resident (lock must be held)"""
+        import torch
+
+        resident = [s for s in self.sessions.values() if s["features"] is not None]
+        for session in resident[:max(0, len(resident) - self.max_resident)]:
+            torch.save(session["features"], self._features_path(session["session_id"]))
+            session["features"] = None
+            logger.debug(f"Features of video session {session['session_id']} offloaded to disk")
+
+    def _expire(self):
+        """Deletes sessions unused for longer than the TTL (lock must be held)"""
+        now = time.time()
+        for session_id in [k for k, s in self.sessions.items() if now - s["last_used"] > self.ttl_seconds]:
+            self._drop(session_id)
+            logger.info(f"Video session {session_id} expired")
+
+    def _drop(self, session_id: str):
+        """Removes a session (lock must be held)"""
+        self.sessions.pop(session_id, None)
+        try:
+            os.unlink(self._features_path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def _features_path(self, session_id: str) -> Path:
+        """Path of the offloaded features of a session"""
+        return self.session_dir / f"{session_id}.pt"
+
+# Global instance, created on first use
+_session_manager: Optional[VideoSessionManager] = None
+_session_manager_lock = threading.Lock()
+
+def get_session_manager() -> VideoSessionManager:
+    """Retrieves the video session manager instance."""
+    global _session_manager
+
+    with _session_manager_lock:
+        if _session_manager is None:
+            from config import video_config
+            _session_manager = VideoSessionManager(
+                session_dir=video_config.get("session_dir", "cache/video_sessions"),
+                max_resident=video_config.get("session_max_resident", 4),
+                ttl_seconds=video_config.get("session_ttl_seconds", 3600)
+            )
+
+    return _session_manager